@@ -0,0 +1,172 @@
+"""
+Does a slow Spoonacular starve the rest of the API?
+
+Runs the app under uvicorn with the Spoonacular stub answering after
+--stub-latency-ms, in two modes:
+
+  sync   every route, Spoonacular included, goes through the WSGI adapter's
+         --threads worker threads (what plain Flask does);
+  async  Spoonacular routes run on the event loop (server/asgi.py); only the
+         other routes use the threads.
+
+In each mode, --upstream clients keep calling /products/spoonacular/<id>
+while one probe client calls GET /products/ in a loop. The probe's latency
+is reported. When --upstream >= --threads, the sync mode's probe waits behind
+upstream calls for a free thread, but the async mode's probe should match the
+idle baseline.
+
+    python -m benchmarks.async_proxy --threads 8 --upstream 32 --stub-latency-ms 1000
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import socket
+import tempfile
+import threading
+import time
+
+from .dataset import build
+from .spoonacular_stub import StubServer
+
+
+def _percentile(values, pct):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, round(pct / 100 * (len(values) - 1)))]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class Uvicorn:
+    """Serves an ASGI app on a background thread; use as a context manager."""
+
+    def __init__(self, app):
+        import uvicorn
+        self.port = _free_port()
+        self.server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=self.port,
+                                                    log_level="warning", lifespan="off"))
+        self._thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def __enter__(self) -> str:
+        self._thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return f"http://127.0.0.1:{self.port}"
+
+    def __exit__(self, *exc) -> None:
+        self.server.should_exit = True
+        self._thread.join(timeout=10)
+
+
+def _measure(base: str, upstream: int, seconds: float) -> dict:
+    import requests
+
+    stop = threading.Event()
+    upstream_done, upstream_errors = [0], [0]
+    lock = threading.Lock()
+
+    def upstream_client(i):
+        session = requests.Session()
+        while not stop.is_set():
+            try:
+                ok = session.get(f"{base}/products/spoonacular/{800000 + i}", timeout=60).status_code == 200
+            except requests.RequestException:
+                ok = False
+            with lock:
+                upstream_done[0] += ok
+                upstream_errors[0] += not ok
+
+    threads = [threading.Thread(target=upstream_client, args=(i,), daemon=True) for i in range(upstream)]
+    for t in threads:
+        t.start()
+    time.sleep(0.2 if upstream else 0)  # let the upstream calls take their slots
+
+    session = requests.Session()
+    latencies, probe_errors = [], 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            ok = session.get(f"{base}/products/", timeout=60).status_code == 200
+        except requests.RequestException:
+            ok = False
+        latencies.append((time.perf_counter() - start) * 1000)
+        probe_errors += not ok
+        time.sleep(0.01)
+
+    stop.set()
+    for t in threads:
+        t.join()
+    return {
+        "probes": len(latencies),
+        "p50_ms": _percentile(latencies, 50),
+        "p95_ms": _percentile(latencies, 95),
+        "max_ms": max(latencies),
+        "probe_errors": probe_errors,
+        "upstream_rps": upstream_done[0] / seconds,
+        "upstream_errors": upstream_errors[0],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=8, help="WSGI worker threads in both modes")
+    parser.add_argument("--upstream", type=int, default=32, help="concurrent Spoonacular clients")
+    parser.add_argument("--stub-latency-ms", type=float, default=1000.0)
+    parser.add_argument("--seconds", type=float, default=5.0, help="duration of each measurement")
+    parser.add_argument("--products", type=int, default=200)
+    args = parser.parse_args()
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    with StubServer(args.stub_latency_ms) as stub:
+        db_path = tempfile.mktemp(suffix=".db")
+        # spoonacular.py and config.py read these at import time
+        os.environ["SPOONACULAR_BASE_URL"] = stub.base_url
+        os.environ.setdefault("SPOONACULAR_API_KEY", "bench")
+        os.environ["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{db_path}"
+
+        from a2wsgi import WSGIMiddleware
+        from server.app import create_app
+        from server.asgi import SpoonacularRoutes
+        from server.models import db
+
+        flask_app = create_app({
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{db_path}",
+            "PRICE_TABLE_PATH": f"{db_path}.prices",
+            "RATELIMIT_ENABLED": False,
+            "SLOW_REQUEST_MS": 0,
+            "SLOW_QUERY_MS": 0,
+            "ASGI_WSGI_THREADS": args.threads,
+            "SPOONACULAR_MAX_CONCURRENCY": max(args.upstream, 1),
+            "SPOONACULAR_QUEUE_TIMEOUT": args.seconds * 2,
+        })
+        with flask_app.app_context():
+            db.create_all()
+            build(db, products=args.products, users=10, orders=0, carts=0, seed=1)
+
+        modes = [
+            ("sync", lambda: WSGIMiddleware(flask_app, workers=args.threads)),
+            ("async", lambda: SpoonacularRoutes(flask_app)),
+        ]
+        print(f"{args.threads} WSGI threads, {args.upstream} Spoonacular clients, "
+              f"upstream latency {args.stub_latency_ms:.0f}ms\n")
+        print(f"{'mode':<14} {'probes':>7} {'p50':>9} {'p95':>9} {'max':>9} {'upstream/s':>11} {'errors':>7}")
+        for label, factory in modes:
+            with Uvicorn(factory()) as base:
+                for load in (0, args.upstream):
+                    r = _measure(base, load, args.seconds)
+                    name = f"{label}, {'loaded' if load else 'idle'}"
+                    print(f"{name:<14} {r['probes']:>7} {r['p50_ms']:>7.1f}ms {r['p95_ms']:>7.1f}ms "
+                          f"{r['max_ms']:>7.1f}ms {r['upstream_rps']:>11.1f} "
+                          f"{r['probe_errors'] + r['upstream_errors']:>7}")
+
+
+if __name__ == "__main__":
+    main()
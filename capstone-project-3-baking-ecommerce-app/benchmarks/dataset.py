@@ -0,0 +1,42 @@
+"""
+Benchmark dataset presets on top of `server.seed.generate()`.
+
+    preset   products    users   orders   carts
+    small      10,000   10,000   10,000   1,000
+    medium    100,000  100,000  100,000  10,000
+    large   1,000,000  200,000 1,000,000  50,000
+
+The data is anchored to a fixed date so a given preset and seed always
+produce the same rows. User 1 is the admin; clients get tokens from
+`identity.issue_access_token` instead of logging in.
+"""
+from __future__ import annotations
+
+from datetime import date
+
+from sqlalchemy import select
+
+PRESETS = {
+    "small": {"products": 10_000, "users": 10_000, "orders": 10_000, "carts": 1_000},
+    "medium": {"products": 100_000, "users": 100_000, "orders": 100_000, "carts": 10_000},
+    "large": {"products": 1_000_000, "users": 200_000, "orders": 1_000_000, "carts": 50_000},
+}
+
+ANCHOR = date(2026, 1, 1)
+
+
+def build(db, products: int, users: int, orders: int, carts: int, seed: int = 1) -> dict:
+    """Populate a fresh database bound to `db`. Returns ids the scenarios need."""
+    from server.seed import generate
+    from server.enums import CartStatus
+    from server.models import Cart, Order, Product
+
+    generate(users=users, products=products, orders=orders, carts=carts, seed=seed, anchor=ANCHOR, reset=False)
+    return {
+        "admin_id": 1,
+        "cart_user_ids": list(db.session.execute(
+            select(Cart.user_id).where(Cart.status == CartStatus.draft).order_by(Cart.id)).scalars()),
+        "active_product_ids": list(db.session.execute(
+            select(Product.id).where(Product.is_active.is_(True))).scalars()),
+        "order_ids": list(db.session.execute(select(Order.id)).scalars()),
+    }
@@ -0,0 +1,117 @@
+"""
+Read/write throughput per database engine profile.
+
+For each profile, builds a file-backed SQLite database and runs --readers
+threads (product lookups plus a cart read) alongside --writers threads
+(cart item upserts, one commit each) for --seconds. Reports operations per
+second and how many operations failed, e.g. with "database is locked".
+
+    python -m benchmarks.db_engine --profiles default,sqlite --readers 8 --writers 4
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+
+def _run(profile: str, readers: int, writers: int, seconds: float) -> dict:
+    from server.app import create_app
+    from server.models import db, User, Product, Cart, CartItem
+    from server.enums import CartStatus
+
+    path = tempfile.mktemp(suffix=".db")
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}",
+        "PRICE_TABLE_PATH": f"{path}.prices",
+        "DB_ENGINE_PROFILE": profile,
+        "PASSWORD_HASH_WORKERS": 0,
+    })
+    with app.app_context():
+        db.create_all()
+        db.session.add_all(Product(name=f"Dessert {i}", price_cents=1000 + i, allergens_csv="") for i in range(500))
+        users = [User(email=f"u{i}@example.com", password_hash="x") for i in range(writers)]
+        db.session.add_all(users)
+        db.session.flush()
+        db.session.add_all(Cart(user_id=u.id, status=CartStatus.draft) for u in users)
+        db.session.commit()
+        cart_ids = [c.id for c in Cart.query.all()]
+
+    stop = threading.Event()
+    counts = {"reads": 0, "writes": 0, "errors": 0}
+    lock = threading.Lock()
+
+    def bump(key):
+        with lock:
+            counts[key] += 1
+
+    def reader():
+        rnd = random.Random()
+        with app.app_context():
+            while not stop.is_set():
+                try:
+                    db.session.get(Product, rnd.randint(1, 500))
+                    db.session.get(Cart, rnd.choice(cart_ids)).items
+                    db.session.rollback()
+                    bump("reads")
+                except Exception:
+                    db.session.rollback()
+                    bump("errors")
+                finally:
+                    db.session.expunge_all()
+
+    def writer(cart_id):
+        rnd = random.Random(cart_id)
+        with app.app_context():
+            while not stop.is_set():
+                try:
+                    pid = rnd.randint(1, 500)
+                    item = CartItem.query.filter_by(cart_id=cart_id, product_id=pid).first()
+                    if item:
+                        item.qty += 1
+                    else:
+                        db.session.add(CartItem(cart_id=cart_id, product_id=pid, qty=1))
+                    db.session.commit()
+                    bump("writes")
+                except Exception:
+                    db.session.rollback()
+                    bump("errors")
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    threads += [threading.Thread(target=writer, args=(cart_ids[i],)) for i in range(writers)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    with app.app_context():
+        db.engine.dispose()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    return {k: v / elapsed if k != "errors" else v for k, v in counts.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profiles", default="default,sqlite")
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args()
+
+    print(f"{'profile':<10} {'reads/s':>9} {'writes/s':>9} {'errors':>7}")
+    for profile in args.profiles.split(","):
+        r = _run(profile, args.readers, args.writers, args.seconds)
+        print(f"{profile:<10} {r['reads']:>9.1f} {r['writes']:>9.1f} {r['errors']:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,353 @@
+"""
+Endpoint benchmark suite with a stored baseline.
+
+Builds a deterministic dataset (see benchmarks/dataset.py), then drives every
+blueprint's hot endpoints with --clients concurrent clients, either in-process
+through Flask's test client, over real HTTP against a threaded local server, or
+both. Spoonacular calls go to a local stub (benchmarks/spoonacular_stub.py).
+For each scenario it reports throughput, p50/p95/p99 latency and SQL queries
+per request, which it reads from the Server-Timing header.
+
+    python -m benchmarks.endpoints --scale small --driver both
+    python -m benchmarks.endpoints --save-baseline benchmarks/baseline.json
+    python -m benchmarks.endpoints --baseline benchmarks/baseline.json --max-regression 0.25
+
+With --baseline, the run exits with status 1 when, for any scenario:
+  - p95 grows by more than --max-regression (and by at least --min-delta-ms),
+  - throughput drops by more than --max-regression, or
+  - the average number of queries per request grows by more than --query-slack.
+
+Building the medium/large presets takes a while; pass --db PATH to keep the
+database (plus a PATH.json sidecar) and reuse it on later runs.
+"""
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import logging
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+from datetime import timedelta
+
+from .dataset import PRESETS, build
+from .spoonacular_stub import StubServer
+
+_QUERIES_RE = re.compile(r'desc="(\d+) queries"')
+
+
+def _percentile(values, pct):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    k = min(len(values) - 1, max(0, round(pct / 100 * (len(values) - 1))))
+    return values[k]
+
+
+# ---------- drivers ----------
+
+class InProcessDriver:
+    name = "inproc"
+
+    def __init__(self, app):
+        self.app = app
+
+    def client(self):
+        c = self.app.test_client()
+
+        def call(method, path, body=None, headers=None):
+            r = c.open(path, method=method, json=body, headers=headers)
+            return r.status_code, r.headers.get("Server-Timing", "")
+        return call
+
+    def close(self):
+        pass
+
+
+class HttpDriver:
+    name = "http"
+
+    def __init__(self, app):
+        from werkzeug.serving import make_server
+        self._server = make_server("127.0.0.1", 0, app, threaded=True)
+        self.base = f"http://127.0.0.1:{self._server.server_port}"
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def client(self):
+        import requests
+        session = requests.Session()
+
+        def call(method, path, body=None, headers=None):
+            r = session.request(method, self.base + path, json=body, headers=headers)
+            return r.status_code, r.headers.get("Server-Timing", "")
+        return call
+
+    def close(self):
+        self._server.shutdown()
+
+
+# ---------- scenarios ----------
+# Each scenario returns the requests for one iteration; only the last one is timed.
+
+def _customer(ctx, idx):
+    return {"Authorization": f"Bearer {ctx['tokens'][idx % len(ctx['tokens'])]}"}
+
+
+def _admin(ctx, idx):
+    return {"Authorization": f"Bearer {ctx['admin_token']}"}
+
+
+def products_list(ctx, idx, rnd):
+    return [("GET", "/products/", None, None)]
+
+
+def product_detail(ctx, idx, rnd):
+    return [("GET", f"/products/{rnd.choice(ctx['active_product_ids'])}", None, None)]
+
+
+def spoonacular_search(ctx, idx, rnd):
+    return [("GET", "/products/spoonacular?q=cake&number=20", None, None)]
+
+
+def spoonacular_detail(ctx, idx, rnd):
+    return [("GET", f"/products/spoonacular/{rnd.randint(700000, 700100)}", None, None)]
+
+
+def cart_get(ctx, idx, rnd):
+    return [("GET", "/cart/", None, _customer(ctx, idx))]
+
+
+def cart_add(ctx, idx, rnd):
+    body = {"product_id": rnd.choice(ctx["active_product_ids"]), "qty": rnd.randint(1, 3)}
+    return [("POST", "/cart/items", body, _customer(ctx, idx))]
+
+
+def checkout(ctx, idx, rnd):
+    headers = _customer(ctx, idx)
+    day = ctx["first_free_date"] + timedelta(days=next(ctx["date_seq"]))
+    return [
+        ("POST", "/cart/items", {"product_id": rnd.choice(ctx["active_product_ids"]), "qty": 2}, headers),
+        ("POST", "/checkout/", {"fulfillment_date": day.isoformat(), "fulfillment_method": "pickup"}, headers),
+    ]
+
+
+def orders_list(ctx, idx, rnd):
+    return [("GET", "/orders/", None, _customer(ctx, idx))]
+
+
+def orders_list_admin(ctx, idx, rnd):
+    return [("GET", f"/orders/?per_page=50&page={rnd.randint(1, 20)}", None, _admin(ctx, idx))]
+
+
+def order_detail(ctx, idx, rnd):
+    return [("GET", f"/orders/{rnd.choice(ctx['order_ids'])}", None, _admin(ctx, idx))]
+
+
+def admin_status(ctx, idx, rnd):
+    status = rnd.choice(["complete", "placed"])
+    return [("PATCH", f"/admin/orders/{rnd.choice(ctx['order_ids'])}/status", {"status": status}, _admin(ctx, idx))]
+
+
+def admin_stats(ctx, idx, rnd):
+    return [("GET", "/admin/stats?from=2024-01-01&to=2026-01-31", None, _admin(ctx, idx))]
+
+
+SCENARIOS = {f.__name__: f for f in (
+    products_list, product_detail, spoonacular_search, spoonacular_detail, cart_get, cart_add, checkout,
+    orders_list, orders_list_admin, order_detail, admin_status, admin_stats,
+)}
+
+
+# ---------- runner ----------
+
+def run_scenario(driver, scenario, ctx, clients: int, total: int, warmup: int) -> dict:
+    warm = driver.client()
+    for i in range(warmup):
+        for method, path, body, headers in scenario(ctx, 0, random.Random(i)):
+            warm(method, path, body, headers)
+
+    remaining = itertools.count()
+    latencies, queries = [], []
+    errors = [0]
+    lock = threading.Lock()
+
+    def worker(idx):
+        call = driver.client()
+        rnd = random.Random(1000 + idx)
+        lat, qs, errs = [], [], 0
+        while next(remaining) < total:
+            *setup, (method, path, body, headers) = scenario(ctx, idx, rnd)
+            for s in setup:
+                call(*s)
+            start = time.perf_counter()
+            status, timing = call(method, path, body, headers)
+            lat.append(time.perf_counter() - start)
+            m = _QUERIES_RE.search(timing)
+            if m:
+                qs.append(int(m.group(1)))
+            if status >= 400:
+                errs += 1
+        with lock:
+            latencies.extend(lat)
+            queries.extend(qs)
+            errors[0] += errs
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(clients)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    return {
+        "n": len(latencies),
+        "rps": len(latencies) / elapsed,
+        "p50_ms": _percentile(latencies, 50) * 1000,
+        "p95_ms": _percentile(latencies, 95) * 1000,
+        "p99_ms": _percentile(latencies, 99) * 1000,
+        "queries": sum(queries) / len(queries) if queries else None,
+        "errors": errors[0],
+    }
+
+
+def compare(results: dict, baseline: dict, max_regression: float, min_delta_ms: float, query_slack: float) -> list[str]:
+    problems = []
+    for key, r in results.items():
+        b = baseline.get(key)
+        if not b:
+            continue
+        if r["p95_ms"] > b["p95_ms"] * (1 + max_regression) and r["p95_ms"] - b["p95_ms"] >= min_delta_ms:
+            problems.append(f"{key}: p95 {b['p95_ms']:.1f}ms -> {r['p95_ms']:.1f}ms")
+        if r["rps"] < b["rps"] * (1 - max_regression):
+            problems.append(f"{key}: throughput {b['rps']:.0f}/s -> {r['rps']:.0f}/s")
+        if r["queries"] is not None and b.get("queries") is not None and r["queries"] > b["queries"] + query_slack:
+            problems.append(f"{key}: queries/request {b['queries']:.2f} -> {r['queries']:.2f}")
+    return problems
+
+
+# ---------- setup ----------
+
+def _prepare(db_path: str, sizes: dict, seed: int, clients: int):
+    from server.app import create_app
+    from sqlalchemy import func
+    from server.models import db, Order, User
+    from server import identity
+
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{db_path}",
+        "PRICE_TABLE_PATH": f"{db_path}.prices",
+        "DB_ENGINE_PROFILE": "sqlite",
+        "PASSWORD_HASH_WORKERS": 0,
+        "RATELIMIT_ENABLED": False,
+        "SQL_INSTRUMENTATION": True,
+        "SLOW_REQUEST_MS": 0,
+        "SLOW_QUERY_MS": 0,
+    })
+    sidecar = db_path + ".json"
+    with app.app_context():
+        if os.path.exists(sidecar):
+            with open(sidecar) as f:
+                ids = json.load(f)
+        else:
+            db.create_all()
+            print(f"building dataset {sizes} ...", file=sys.stderr)
+            started = time.perf_counter()
+            ids = build(db, seed=seed, **sizes)
+            with open(sidecar, "w") as f:
+                json.dump(ids, f)
+            print(f"built in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+        users = [db.session.get(User, uid) for uid in ids["cart_user_ids"][:max(clients, 1)]]
+        ctx = {
+            "active_product_ids": ids["active_product_ids"],
+            "order_ids": ids["order_ids"],
+            "tokens": [identity.issue_access_token(u) for u in users],
+            "admin_token": identity.issue_access_token(db.session.get(User, ids["admin_id"])),
+            # checkouts book fresh days, past anything earlier runs on this file have booked
+            "first_free_date": db.session.query(func.max(Order.fulfillment_date)).scalar() + timedelta(days=1),
+            "date_seq": itertools.count(),
+        }
+    return app, ctx
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=sorted(PRESETS), default="small")
+    parser.add_argument("--products", type=int, help="override the preset's product count")
+    parser.add_argument("--orders", type=int, help="override the preset's order count")
+    parser.add_argument("--users", type=int, help="override the preset's user count")
+    parser.add_argument("--carts", type=int, help="override the preset's cart count")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--db", help="SQLite file to build into / reuse (default: a temp file)")
+    parser.add_argument("--driver", choices=["inproc", "http", "both"], default="both")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma-separated subset")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=400, help="timed requests per scenario")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--stub-latency-ms", type=float, default=50.0)
+    parser.add_argument("--baseline", help="compare against this baseline JSON")
+    parser.add_argument("--save-baseline", help="write this run's results as a baseline JSON")
+    parser.add_argument("--max-regression", type=float, default=0.25)
+    parser.add_argument("--min-delta-ms", type=float, default=2.0)
+    parser.add_argument("--query-slack", type=float, default=0.5,
+                        help="allowed growth in average queries/request (carts grow during a run)")
+    args = parser.parse_args()
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    sizes = dict(PRESETS[args.scale])
+    for key in sizes:
+        if getattr(args, key) is not None:
+            sizes[key] = getattr(args, key)
+    scenarios = [SCENARIOS[name] for name in args.scenarios.split(",")]
+
+    with StubServer(args.stub_latency_ms) as stub:
+        # products.py reads these at import time
+        os.environ["SPOONACULAR_BASE_URL"] = stub.base_url
+        os.environ.setdefault("SPOONACULAR_API_KEY", "bench")
+
+        db_path = args.db or tempfile.mktemp(suffix=".db")
+        app, ctx = _prepare(db_path, sizes, args.seed, args.clients)
+
+        drivers = ["inproc", "http"] if args.driver == "both" else [args.driver]
+        results = {}
+        print(f"{'driver/scenario':<28} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'queries':>8} {'errors':>7}")
+        for name in drivers:
+            driver = InProcessDriver(app) if name == "inproc" else HttpDriver(app)
+            try:
+                for scenario in scenarios:
+                    key = f"{driver.name}/{scenario.__name__}"
+                    r = results[key] = run_scenario(driver, scenario, ctx, args.clients, args.requests, args.warmup)
+                    q = f"{r['queries']:.1f}" if r["queries"] is not None else "-"
+                    print(f"{key:<28} {r['rps']:>8.1f} {r['p50_ms']:>7.1f}ms {r['p95_ms']:>7.1f}ms "
+                          f"{r['p99_ms']:>7.1f}ms {q:>8} {r['errors']:>7}")
+            finally:
+                driver.close()
+
+    meta = {"scale": args.scale, "sizes": sizes, "clients": args.clients, "requests": args.requests}
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump({"meta": meta, "results": results}, f, indent=2, sort_keys=True)
+        print(f"baseline written to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("meta", {}).get("sizes") != sizes:
+            print("warning: baseline was recorded with a different dataset size", file=sys.stderr)
+        problems = compare(results, baseline["results"], args.max_regression, args.min_delta_ms, args.query_slack)
+        if problems:
+            print("\nREGRESSIONS:")
+            for p in problems:
+                print(f"  {p}")
+            sys.exit(1)
+        print("\nno regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
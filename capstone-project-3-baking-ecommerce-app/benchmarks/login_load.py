@@ -0,0 +1,134 @@
+"""
+Login burst vs. everything else.
+
+Starts the app on a local threaded HTTP server, hammers /auth/login from
+--logins concurrent clients, and meanwhile probes GET /products/ from one
+client. Runs once with hashing inline on the request threads
+(PASSWORD_HASH_WORKERS=0) and once with the process pool, then prints
+login throughput and probe latency for each.
+
+    python -m benchmarks.login_load --logins 16 --seconds 10
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+import requests
+from werkzeug.serving import make_server
+
+
+def _percentile(values, pct):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    k = min(len(values) - 1, max(0, round(pct / 100 * (len(values) - 1))))
+    return values[k]
+
+
+def _build_app(workers: int):
+    from server.app import create_app
+    from server.models import db, User, Product
+
+    db_path = tempfile.mktemp(suffix=".db")
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{db_path}",
+        "PRICE_TABLE_PATH": f"{db_path}.prices",
+        "PASSWORD_HASH_WORKERS": workers,
+        "PASSWORD_HASH_MAX_PENDING": 256,
+    })
+    with app.app_context():
+        db.create_all()
+        for i in range(50):
+            db.session.add(Product(name=f"Dessert {i}", price_cents=1000 + 100 * (i % 7), allergens_csv="gluten"))
+        user = User(email="bench@example.com")
+        user.set_password("bench-password")
+        db.session.add(user)
+        db.session.commit()
+    return app
+
+
+def _run(workers: int, logins: int, seconds: float) -> dict:
+    app = _build_app(workers)
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    base = f"http://127.0.0.1:{server.server_port}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    stop = threading.Event()
+    login_ok = [0]
+    login_busy = [0]
+    lock = threading.Lock()
+
+    def login_client():
+        s = requests.Session()
+        while not stop.is_set():
+            r = s.post(f"{base}/auth/login", json={"email": "bench@example.com", "password": "bench-password"})
+            with lock:
+                if r.status_code == 200:
+                    login_ok[0] += 1
+                elif r.status_code == 503:
+                    login_busy[0] += 1
+
+    def probe(samples, until):
+        s = requests.Session()
+        while not until():
+            t0 = time.perf_counter()
+            s.get(f"{base}/products/")
+            samples.append((time.perf_counter() - t0) * 1000)
+            time.sleep(0.01)
+
+    idle = []
+    t_end = time.monotonic() + min(2.0, seconds)
+    probe(idle, lambda: time.monotonic() > t_end)
+
+    loaded = []
+    threads = [threading.Thread(target=login_client) for _ in range(logins)]
+    probe_thread = threading.Thread(target=probe, args=(loaded, stop.is_set))
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    probe_thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads + [probe_thread]:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    server.shutdown()
+    app.extensions["hashing"].shutdown()
+    return {
+        "logins_per_s": login_ok[0] / elapsed,
+        "logins_503": login_busy[0],
+        "idle_p50": statistics.median(idle) if idle else float("nan"),
+        "loaded_p50": statistics.median(loaded) if loaded else float("nan"),
+        "loaded_p95": _percentile(loaded, 95),
+        "loaded_p99": _percentile(loaded, 99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=16, help="concurrent login clients")
+    parser.add_argument("--seconds", type=float, default=10.0, help="duration of each run")
+    parser.add_argument("--pool-workers", type=int, default=os.cpu_count() or 2)
+    args = parser.parse_args()
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+
+    rows = [
+        ("inline", _run(0, args.logins, args.seconds)),
+        (f"pool x{args.pool_workers}", _run(args.pool_workers, args.logins, args.seconds)),
+    ]
+
+    print(f"{'mode':<12} {'login/s':>8} {'503s':>6} {'idle p50':>9} {'p50':>8} {'p95':>8} {'p99':>8}   (GET /products/ ms)")
+    for name, r in rows:
+        print(f"{name:<12} {r['logins_per_s']:>8.1f} {r['logins_503']:>6} {r['idle_p50']:>9.1f} "
+              f"{r['loaded_p50']:>8.1f} {r['loaded_p95']:>8.1f} {r['loaded_p99']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
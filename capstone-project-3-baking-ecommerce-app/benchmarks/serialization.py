@@ -0,0 +1,82 @@
+"""
+Serializer microbenchmark: models' to_dict() + jsonify vs. server.serializers.
+
+Builds detached Order objects (each with 3 items and their products) and
+times producing the response body for 1, 100 and 10k orders, and the same
+for bare products.
+
+    python -m benchmarks.serialization
+"""
+from __future__ import annotations
+
+import argparse
+import timeit
+from datetime import date, datetime, time
+
+from flask import jsonify
+
+
+def _products(n: int):
+    from server.models import Product
+    return [
+        Product(id=i, name=f"Dessert {i}", description="Rich and fudgy", price_cents=1250 + 100 * (i % 7),
+                image_url=f"/images/{i}.jpeg", allergens_csv="dairy,eggs,gluten", is_active=True)
+        for i in range(1, n + 1)
+    ]
+
+
+def _orders(n: int, catalog):
+    from server.models import Order, OrderItem
+    from server.enums import OrderStatus, FulfillmentMethod
+    orders = []
+    for i in range(1, n + 1):
+        items = [
+            OrderItem(id=i * 10 + k, order_id=i, product_id=p.id, qty=k + 1, price_snapshot_cents=p.price_cents, product=p)
+            for k, p in enumerate(catalog[(i + j) % len(catalog)] for j in range(3))
+        ]
+        orders.append(Order(
+            id=i, user_id=i % 50, total_cents=sum(oi.qty * oi.price_snapshot_cents for oi in items),
+            fulfillment_date=date(2026, 1, 1), requested_time=time(9, 30),
+            fulfillment_method=FulfillmentMethod.pickup, status=OrderStatus.placed,
+            created_at=datetime(2026, 1, 1, 8, 0, 0, 123456), items=items,
+        ))
+    return orders
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1,100,10000")
+    args = parser.parse_args()
+
+    from server.app import create_app
+    from server import serializers
+
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite://"})
+    catalog = _products(200)
+    candidates = [
+        ("to_dict + jsonify", lambda enc, objs: jsonify([enc["to_dict"](o) for o in objs]).get_data()),
+        ("serializers (stdlib)", lambda enc, objs: serializers.stdlib_dumps([enc["fast"](o) for o in objs])),
+    ]
+    if serializers.orjson is not None:
+        candidates.append(("serializers (orjson)", lambda enc, objs: serializers.dumps([enc["fast"](o) for o in objs])))
+
+    kinds = {
+        "order": {"to_dict": lambda o: o.to_dict(), "fast": serializers.order},
+        "product": {"to_dict": lambda p: p.to_dict(), "fast": serializers.product},
+    }
+
+    print(f"{'kind':<8} {'n':>6}  " + "  ".join(f"{name:>22}" for name, _ in candidates) + "   (ms per response)")
+    with app.test_request_context():
+        for kind, enc in kinds.items():
+            for n in (int(s) for s in args.sizes.split(",")):
+                objs = _orders(n, catalog) if kind == "order" else _products(n)
+                timings = []
+                for _, fn in candidates:
+                    number = max(1, 20000 // n)
+                    best = min(timeit.repeat(lambda: fn(enc, objs), number=number, repeat=5)) / number
+                    timings.append(best * 1000)
+                print(f"{kind:<8} {n:>6}  " + "  ".join(f"{t:>22.3f}" for t in timings))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Local stand-in for the Spoonacular recipes API.
+
+Serves canned `complexSearch` and `<id>/information` responses after an
+optional artificial delay, so the Spoonacular routes can be benchmarked without
+network access or API quota. Point the app at it with
+SPOONACULAR_BASE_URL=http://127.0.0.1:<port>/recipes/.
+
+    python -m benchmarks.spoonacular_stub --port 8099 --latency-ms 80
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import threading
+import time
+
+from werkzeug.serving import make_server
+from werkzeug.wrappers import Request, Response
+
+_INFO_RE = re.compile(r"^/recipes/(\d+)/information$")
+
+
+def make_app(latency_ms: float = 0.0):
+    delay = latency_ms / 1000
+
+    @Request.application
+    def app(request: Request) -> Response:
+        if delay:
+            time.sleep(delay)
+        if request.path == "/recipes/complexSearch":
+            number = min(int(request.args.get("number", 10)), 100)
+            results = [{"id": 700000 + i, "title": f"{request.args.get('query', 'dessert')} {i}",
+                        "image": f"https://img.test/{700000 + i}.jpg"} for i in range(number)]
+            return Response(json.dumps({"results": results, "totalResults": number}), mimetype="application/json")
+        m = _INFO_RE.match(request.path)
+        if m:
+            rid = int(m.group(1))
+            return Response(json.dumps({
+                "id": rid, "title": f"Stub Recipe {rid}", "image": f"https://img.test/{rid}.jpg",
+                "summary": "A stubbed dessert.", "instructions": "Bake.",
+                "glutenFree": rid % 2 == 0, "dairyFree": rid % 3 == 0, "vegan": False, "vegetarian": True,
+            }), mimetype="application/json")
+        return Response(json.dumps({"status": "failure"}), status=404, mimetype="application/json")
+
+    return app
+
+
+class StubServer:
+    """Runs the stub on a background thread; use as a context manager."""
+
+    def __init__(self, latency_ms: float = 0.0, port: int = 0):
+        self._server = make_server("127.0.0.1", port, make_app(latency_ms), threaded=True)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}/recipes/"
+
+    def __enter__(self) -> "StubServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+    server = make_server("127.0.0.1", args.port, make_app(args.latency_ms), threaded=True)
+    print(f"Spoonacular stub on http://127.0.0.1:{args.port}/recipes/")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
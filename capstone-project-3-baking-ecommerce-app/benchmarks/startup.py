@@ -0,0 +1,99 @@
+"""
+Worker startup cost.
+
+In fresh interpreters, measures how long it takes to import server.app, to
+build the app with create_app(), and to answer the first request. The first
+request goes to GET /health, then GET /products/. It also measures a
+preloaded worker: the app is built once, the process forks, and only the
+child's first request is timed, as with gunicorn's preload_app.
+
+    python -m benchmarks.startup --runs 7
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+_CHILD = r"""
+import json, os, sys, time
+t0 = time.perf_counter()
+from server.app import create_app
+t1 = time.perf_counter()
+app = create_app()
+t2 = time.perf_counter()
+from server.models import db
+with app.app_context():
+    db.create_all()
+t3 = time.perf_counter()
+
+def first_requests():
+    client = app.test_client()
+    start = time.perf_counter()
+    client.get("/health")
+    health = time.perf_counter()
+    client.get("/products/")
+    return health - start, time.perf_counter() - health
+
+result = {"import": t1 - t0, "create_app": t2 - t1, "modules": len(sys.modules),
+          "requests_imported": "requests" in sys.modules, "alembic_imported": "alembic" in sys.modules}
+if os.environ.get("BENCH_PRELOAD") == "1":
+    r, w = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(r)
+        h, p = first_requests()
+        os.write(w, json.dumps([h, p]).encode())
+        os._exit(0)
+    os.close(w)
+    os.waitpid(pid, 0)
+    h, p = json.loads(os.read(r, 4096))
+else:
+    h, p = first_requests()
+result.update(first_health=h, first_products=p)
+print(json.dumps(result))
+"""
+
+
+def _run_once(preload: bool, migrations: bool) -> dict:
+    env = dict(os.environ)
+    env.update({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tempfile.mktemp(suffix='.db')}",
+        "DB_MIGRATIONS": "1" if migrations else "0",
+        "BENCH_PRELOAD": "1" if preload else "0",
+        "PYTHONWARNINGS": "ignore",
+    })
+    out = subprocess.run([sys.executable, "-c", _CHILD], env=env, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    modes = [
+        ("cold, with Flask-Migrate", False, True),
+        ("cold, web worker", False, False),
+        ("preloaded worker", True, False),
+    ]
+    print(f"{'mode':<26} {'import':>9} {'create':>9} {'1st /health':>12} {'1st /products':>14} {'to first resp':>14}")
+    for label, preload, migrations in modes:
+        runs = [_run_once(preload, migrations) for _ in range(args.runs)]
+        med = {k: statistics.median(r[k] for r in runs) * 1000
+               for k in ("import", "create_app", "first_health", "first_products")}
+        # a preloaded worker has already paid for import + create_app in the master
+        to_first = med["first_health"] if preload else med["import"] + med["create_app"] + med["first_health"]
+        print(f"{label:<26} {med['import']:>7.1f}ms {med['create_app']:>7.1f}ms {med['first_health']:>10.1f}ms "
+              f"{med['first_products']:>12.1f}ms {to_first:>12.1f}ms")
+    last = runs[-1]
+    print(f"\nmodules loaded: {last['modules']}, requests imported: {last['requests_imported']}, "
+          f"alembic imported (web worker): {last['alembic_imported']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+gunicorn settings for `gunicorn server.wsgi:app` (picked up from the project root).
+
+The app is built once in the master (preload_app) and forked, so workers
+start warm and share the imported code pages. Anything that holds OS
+resources is created lazily per process or dropped after the fork:
+  - the password-hashing pool and rate-limit SQLite connections notice the
+    new pid on their own;
+  - database connection pools are disposed in post_fork below.
+
+Threads (gthread) keep the admin order stream (SSE) from tying up a whole
+worker per dashboard. Each open stream still holds one of the threads, so the
+app caps them at SSE_MAX_STREAMS per worker; keep that below GUNICORN_THREADS.
+"""
+import glob
+import multiprocessing
+import os
+
+bind = os.getenv("BIND", "127.0.0.1:5555")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() + 1))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", 8))
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") == "1"
+timeout = 60
+
+# web workers don't need Flask-Migrate (and the time alembic takes to import)
+os.environ.setdefault("DB_MIGRATIONS", "0")
+
+
+def on_starting(server):
+    # per-worker metrics files from a previous run would be double counted
+    directory = os.getenv("METRICS_MULTIPROC_DIR")
+    if directory:
+        for path in glob.glob(os.path.join(directory, "metrics-*.json")):
+            os.remove(path)
+
+
+def post_fork(server, worker):
+    # never share pooled DB connections inherited from the master
+    from server.wsgi import app
+    from server.models import db
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
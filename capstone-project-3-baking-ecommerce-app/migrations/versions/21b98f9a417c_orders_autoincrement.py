@@ -0,0 +1,50 @@
+"""orders autoincrement
+
+Revision ID: 21b98f9a417c
+Revises: 7e1f483db3d6
+Create Date: 2026-10-19 14:02:18.402771
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '21b98f9a417c'
+down_revision = '7e1f483db3d6'
+branch_labels = None
+depends_on = None
+
+# live table -> its archive; archived ids must stay out of reach of new rows
+TABLES = {'orders': 'orders_archive', 'order_items': 'order_items_archive'}
+
+
+def _is_sqlite():
+    # Postgres sequences never hand out an id twice; only SQLite reuses a deleted max rowid
+    return op.get_bind().dialect.name == 'sqlite'
+
+
+def upgrade():
+    if not _is_sqlite():
+        return
+    for table, archive in TABLES.items():
+        with op.batch_alter_table(table, recreate='always', table_kwargs={'sqlite_autoincrement': True}):
+            pass
+        # start the counter past every id already used, including ones only left in the archive
+        op.execute(
+            f"INSERT INTO sqlite_sequence (name, seq) SELECT '{table}', 0 "
+            f"WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = '{table}')"
+        )
+        op.execute(
+            f"UPDATE sqlite_sequence SET seq = MAX(seq, "
+            f"COALESCE((SELECT MAX(id) FROM {table}), 0), COALESCE((SELECT MAX(id) FROM {archive}), 0)) "
+            f"WHERE name = '{table}'"
+        )
+
+
+def downgrade():
+    if not _is_sqlite():
+        return
+    for table in TABLES:
+        with op.batch_alter_table(table, recreate='always', table_kwargs={'sqlite_autoincrement': False}):
+            pass
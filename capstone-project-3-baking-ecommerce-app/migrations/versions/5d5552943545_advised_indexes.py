@@ -0,0 +1,38 @@
+"""advised indexes
+
+Revision ID: 5d5552943545
+Revises: e81b3f9a6c05
+Create Date: 2026-10-19 12:57:46.241282
+
+Proposed by `flask db-advise`:
+  ix_orders_created_at: full scan, temp sort
+  ix_orders_status_created_at: full scan, temp sort
+  ix_products_name_image_url: partial index
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d5552943545'
+down_revision = 'e81b3f9a6c05'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.create_index('ix_orders_created_at', ['created_at'], unique=False)
+        batch_op.create_index('ix_orders_status_created_at', ['status', 'created_at'], unique=False)
+
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.create_index('ix_products_name_image_url', ['name', 'image_url'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.drop_index('ix_orders_created_at')
+        batch_op.drop_index('ix_orders_status_created_at')
+
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.drop_index('ix_products_name_image_url')
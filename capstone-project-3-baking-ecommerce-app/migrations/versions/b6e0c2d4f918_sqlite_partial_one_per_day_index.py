@@ -0,0 +1,39 @@
+"""sqlite partial one-per-day index
+
+Revision ID: b6e0c2d4f918
+Revises: 3f3aca041c0f
+Create Date: 2026-10-19 15:41:07.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6e0c2d4f918'
+down_revision = '3f3aca041c0f'
+branch_labels = None
+depends_on = None
+
+ACTIVE = sa.text("status IN ('placed','complete')")
+
+
+def _is_sqlite():
+    # Postgres has been partial since the initial schema; SQLite counted canceled orders too
+    return op.get_bind().dialect.name == 'sqlite'
+
+
+def upgrade():
+    if not _is_sqlite():
+        return
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.drop_index('uq_orders_one_per_day_active')
+        batch_op.create_index('uq_orders_one_per_day_active', ['fulfillment_date'], unique=True, sqlite_where=ACTIVE)
+
+
+def downgrade():
+    if not _is_sqlite():
+        return
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.drop_index('uq_orders_one_per_day_active', sqlite_where=ACTIVE)
+        batch_op.create_index('uq_orders_one_per_day_active', ['fulfillment_date'], unique=True)
@@ -0,0 +1,59 @@
+"""money as integer cents
+
+Revision ID: e81b3f9a6c05
+Revises: c47a0e5d2b18
+Create Date: 2026-10-19 15:20:53.402871
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e81b3f9a6c05'
+down_revision = 'c47a0e5d2b18'
+branch_labels = None
+depends_on = None
+
+
+# (table, old Numeric column, new cents column, check constraint or None)
+MONEY_COLUMNS = [
+    ('products', 'price', 'price_cents', 'check_price_non_negative'),
+    ('orders', 'total', 'total_cents', 'ck_orders_total_nonneg'),
+    ('order_items', 'price_snapshot', 'price_snapshot_cents', 'ck_orderitem_price_nonneg'),
+    ('daily_sales', 'revenue', 'revenue_cents', None),
+    ('daily_product_sales', 'revenue', 'revenue_cents', None),
+]
+
+
+def upgrade():
+    for table, old, new, check in MONEY_COLUMNS:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column(new, sa.Integer(), server_default='0', nullable=False))
+
+        op.execute(f"UPDATE {table} SET {new} = CAST(ROUND({old} * 100) AS INTEGER)")
+
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            if check:
+                batch_op.drop_constraint(check, type_='check')
+            batch_op.drop_column(old)
+            batch_op.alter_column(new, server_default=None)
+            if check:
+                batch_op.create_check_constraint(check, f"{new} >= 0")
+
+
+def downgrade():
+    for table, old, new, check in reversed(MONEY_COLUMNS):
+        precision = 10 if check else 12
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column(old, sa.Numeric(precision=precision, scale=2), server_default='0', nullable=False))
+
+        op.execute(f"UPDATE {table} SET {old} = {new} / 100.0")
+
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            if check:
+                batch_op.drop_constraint(check, type_='check')
+            batch_op.drop_column(new)
+            batch_op.alter_column(old, server_default=None)
+            if check:
+                batch_op.create_check_constraint(check, f"{old} >= 0")
@@ -1,14 +1,21 @@
-from flask import Blueprint, jsonify, request, abort
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from .models import db, Order, OrderStatus, User
+import time
+
+from flask import Blueprint, Response, current_app, request, abort
+from flask_jwt_extended import get_jwt, jwt_required
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
+from .models import db, Order, OrderItem, OrderStatus
+from .identity import is_admin
 from .enums import UserRole
+from . import identity, rollups, events, tokens
+from . import serializers
+from .serializers import json_response
 
 admin_orders_bp = Blueprint("admin_orders", __name__)
 
-def _is_admin(user_id: int) -> bool:
-    user = User.query.get(user_id)
-    return bool(user and user.role == UserRole.admin)
-
+BULK_MAX_IDS = 500
 
 @admin_orders_bp.patch("/<int:order_id>/status")
 @jwt_required()
@@ -17,8 +24,7 @@ def update_order_status(order_id: int):
     Admin-only: update an order’s status.
     Body: { "status": "complete" | "canceled" }
     """
-    user_id = int(get_jwt_identity())
-    if not _is_admin(user_id):
+    if not is_admin():
         abort(403, description="Admin access required")
 
     order = Order.query.get(order_id)
@@ -27,9 +33,242 @@ def update_order_status(order_id: int):
 
     new_status = (request.get_json() or {}).get("status")
     if new_status not in [s.value for s in OrderStatus]:
-        return jsonify({"error": "Invalid status"}), 400
+        return json_response({"error": "Invalid status"}), 400
 
+    old_status = order.status
     order.status = OrderStatus(new_status)
+    rollups.apply_status_change(order, old_status, order.status)
+    events.record_order_event(events.ORDER_STATUS, order.id, {
+        "id": order.id,
+        "status": order.status.value,
+        "previous_status": old_status.value,
+    })
     db.session.commit()
 
-    return jsonify(order.to_dict()), 200
+    return json_response(serializers.order(order)), 200
+
+
+@admin_orders_bp.patch("/status")
+@jwt_required()
+def bulk_update_order_status():
+    """
+    Admin-only: update many orders' status in one transaction.
+    Body: { "ids": [1, 2, 3], "status": "complete" | "canceled" | "placed", "summary": true }
+      - summary (optional, default false): return per-order summaries instead of full orders
+    Returns: { "status": ..., "updated": <n changed>, "results": [ {"id": 1, "ok": true, ...}, ... ] }
+    """
+    if not is_admin():
+        abort(403, description="Admin access required")
+
+    data = request.get_json() or {}
+    new_status = data.get("status")
+    if new_status not in [s.value for s in OrderStatus]:
+        return json_response({"error": "Invalid status"}), 400
+    new_status = OrderStatus(new_status)
+
+    ids = data.get("ids")
+    if not isinstance(ids, list) or not ids or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+        return json_response({"error": "ids must be a non-empty list of order ids"}), 400
+    if len(ids) > BULK_MAX_IDS:
+        return json_response({"error": f"At most {BULK_MAX_IDS} ids per request"}), 400
+    ids = list(dict.fromkeys(ids))
+    summary_only = bool(data.get("summary", False))
+
+    current = {
+        oid: (status, created_at)
+        for oid, status, created_at in db.session.query(Order.id, Order.status, Order.created_at)
+        .filter(Order.id.in_(ids))
+    }
+
+    # one UPDATE per previous status, guarded on it so a concurrent change can't skew the rollups
+    by_old_status: dict[OrderStatus, list[int]] = {}
+    for oid, (status, _) in current.items():
+        if status != new_status:
+            by_old_status.setdefault(status, []).append(oid)
+
+    # only rows the guard actually matched are changed; one moved by a concurrent request is left alone
+    returning = db.session.get_bind().dialect.update_returning
+    changed = []
+    try:
+        for old_status, group in by_old_status.items():
+            stmt = (
+                update(Order)
+                .where(Order.id.in_(group), Order.status == old_status)
+                .values(status=new_status)
+                .execution_options(synchronize_session=False)
+            )
+            if returning:
+                changed.extend(db.session.execute(stmt.returning(Order.id)).scalars())
+            else:
+                db.session.execute(stmt)
+                changed.extend(db.session.execute(
+                    select(Order.id).where(Order.id.in_(group), Order.status == new_status)
+                ).scalars())
+        rollups.apply_bulk_status_change(
+            (oid, current[oid][1], current[oid][0], new_status) for oid in changed
+        )
+        for oid in changed:
+            events.record_order_event(events.ORDER_STATUS, oid, {
+                "id": oid,
+                "status": new_status.value,
+                "previous_status": current[oid][0].value,
+            })
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return json_response({"error": "Status change conflicts with another active order on the same date"}), 409
+
+    changed_set = set(changed)
+    full = {}
+    if not summary_only and current:
+        orders = (
+            Order.query
+            .options(joinedload(Order.items).joinedload(OrderItem.product))
+            .filter(Order.id.in_(list(current)))
+            .all()
+        )
+        full = {o.id: serializers.order(o) for o in orders}
+
+    results = []
+    for oid in ids:
+        if oid not in current:
+            results.append({"id": oid, "ok": False, "error": "Order not found"})
+            continue
+        entry = {
+            "id": oid,
+            "ok": True,
+            "changed": oid in changed_set,
+            "previous_status": current[oid][0].value,
+            "status": new_status.value,
+        }
+        if not summary_only:
+            entry["order"] = full.get(oid)
+        results.append(entry)
+
+    return json_response({
+        "status": new_status.value,
+        "updated": len(changed),
+        "results": results,
+    }), 200
+
+
+def _ticket_serializer() -> URLSafeTimedSerializer:
+    # its own salt: a stream ticket can't be replayed as anything else signed with the JWT secret
+    return URLSafeTimedSerializer(current_app.config["JWT_SECRET_KEY"], salt="admin-order-stream")
+
+
+def _stream_authorized(claims: dict) -> bool:
+    """The access token behind a stream is unrevoked and its user is still an admin at the same token version."""
+    if tokens.is_revoked(claims):
+        return False
+    user = identity.load_user(int(claims["sub"]))
+    return (user is not None and user.role == UserRole.admin
+            and claims.get("tv", user.token_version) == user.token_version)
+
+
+@admin_orders_bp.post("/stream-ticket")
+@jwt_required()
+def issue_stream_ticket():
+    """
+    Admin-only: a short-lived ticket for GET /stream?ticket=<ticket>.
+    EventSource can't set headers, and an access token in the URL would end up in logs and
+    history; the ticket opens the order stream and nothing else, for SSE_TICKET_SECONDS.
+    Returns: { "ticket": "...", "expires_in": <seconds> }
+    """
+    if not is_admin():
+        abort(403, description="Admin access required")
+
+    # the stream keeps the access token's identity, so it still ends when that token expires or is revoked
+    claims = get_jwt()
+    ticket = _ticket_serializer().dumps({k: claims[k] for k in ("sub", "jti", "tv", "exp") if k in claims})
+    return json_response({"ticket": ticket, "expires_in": current_app.config["SSE_TICKET_SECONDS"]}), 200
+
+
+@admin_orders_bp.get("/stream")
+def stream_order_events():
+    """
+    Admin-only: Server-Sent Events feed of new orders and status changes.
+    Auth: ?ticket=<ticket> from POST /stream-ticket (expired or invalid tickets get a 401).
+    Resume: the browser sends Last-Event-ID on reconnect (or pass ?last_event_id=).
+    Events: "order.created" (order summary), "order.status" ({id, status, previous_status}),
+            "reset" (too far behind to replay, or the last event was pruned - refetch the list).
+    The stream ends when the access token behind the ticket expires, and within a heartbeat of
+    it being revoked or the admin being demoted; the client gets a new ticket and reconnects.
+    Each stream holds a worker thread, so past SSE_MAX_STREAMS per process it answers 503.
+    """
+    cfg = current_app.config
+    try:
+        claims = _ticket_serializer().loads(request.args.get("ticket", ""), max_age=cfg["SSE_TICKET_SECONDS"])
+    except BadSignature:  # includes SignatureExpired
+        return json_response({"error": "Invalid or expired stream ticket"}), 401
+    if claims.get("exp", float("inf")) <= time.time():
+        return json_response({"error": "Token has expired"}), 401
+    if not _stream_authorized(claims):
+        abort(403, description="Admin access required")
+
+    last_id_raw = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    try:
+        last_id = int(last_id_raw) if last_id_raw else None
+    except ValueError:
+        last_id = None
+
+    heartbeat = cfg["SSE_HEARTBEAT_SECONDS"]
+    replay_limit = cfg["SSE_REPLAY_LIMIT"]
+
+    # subscribe before reading the backlog so nothing committed in between is missed
+    sub = events.broker.subscribe(cfg["SSE_SUBSCRIBER_BUFFER"], limit=cfg["SSE_MAX_STREAMS"])
+    if sub is None:
+        return json_response({"error": "Too many open order streams, try again shortly"}), 503, {
+            "Retry-After": str(max(1, cfg["SSE_RETRY_MS"] // 1000)),
+        }
+    backlog = (
+        events.events_since(last_id, replay_limit + 1, cfg["SSE_REPLAY_OVERLAP_SECONDS"])
+        if last_id is not None else []
+    )
+    db.session.remove()  # don't hold a connection for the life of the stream
+
+    app = current_app._get_current_object()
+    expires_at = time.monotonic() + (claims["exp"] - time.time() if "exp" in claims else float("inf"))
+
+    def still_authorized() -> bool:
+        # runs outside the request: same checks as at connect, against the current blocklist and role
+        with app.app_context():
+            return _stream_authorized(claims)
+
+    def generate():
+        # ids commit out of order, so remember what was sent instead of a high-water mark
+        sent = events.SentIds(replay_limit + cfg["SSE_SUBSCRIBER_BUFFER"])
+        yield f"retry: {cfg['SSE_RETRY_MS']}\n\n"
+        if backlog is None or len(backlog) > replay_limit:
+            yield "event: reset\ndata: {}\n\n"
+        else:
+            for ev in backlog:
+                yield ev.encode()
+                sent.add(ev.id)
+        next_check = time.monotonic() + heartbeat
+        while True:
+            now = time.monotonic()
+            if now >= expires_at:
+                return
+            if now >= next_check:
+                if not still_authorized():
+                    return
+                next_check = now + heartbeat
+            ev = sub.get(timeout=max(0.0, min(next_check, expires_at) - now))
+            if ev is None:
+                if sub.overflowed:
+                    return  # client reconnects with Last-Event-ID and replays from the table
+                yield ": keepalive\n\n"
+                continue
+            if ev.id in sent:
+                continue
+            yield ev.encode()
+            sent.add(ev.id)
+
+    response = Response(generate(), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+    })
+    # on close rather than in the generator: a client gone before the first chunk never starts it
+    response.call_on_close(lambda: events.broker.unsubscribe(sub))
+    return response
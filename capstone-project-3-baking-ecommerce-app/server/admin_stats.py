@@ -0,0 +1,88 @@
+from datetime import datetime, date, timedelta
+from flask import Blueprint, request, abort
+from flask_jwt_extended import jwt_required
+from sqlalchemy import func
+from .models import db, DailySales, DailyProductSales, Product
+from .identity import is_admin
+from .serializers import json_response
+from .money import to_dollars
+
+admin_stats_bp = Blueprint("admin_stats", __name__)
+
+DEFAULT_RANGE_DAYS = 30
+
+
+def _parse_day(s: str | None, default: date) -> date:
+    if not s:
+        return default
+    return datetime.strptime(s, "%Y-%m-%d").date()
+
+
+@admin_stats_bp.get("/")
+@jwt_required()
+def get_stats():
+    """
+    Admin-only: sales dashboard numbers, read from the daily rollup tables only.
+    Query params (optional):
+      - from: YYYY-MM-DD (default 30 days before `to`)
+      - to: YYYY-MM-DD (default today, UTC)
+      - top: number of top products to return (default 10, max 100)
+    """
+    if not is_admin():
+        abort(403, description="Admin access required")
+
+    try:
+        end = _parse_day(request.args.get("to"), datetime.utcnow().date())
+        start = _parse_day(request.args.get("from"), end - timedelta(days=DEFAULT_RANGE_DAYS - 1))
+    except ValueError:
+        return json_response({"error": "from/to must be YYYY-MM-DD"}), 400
+    if start > end:
+        return json_response({"error": "from must be on or before to"}), 400
+
+    top = min(max(int(request.args.get("top", 10)), 1), 100)
+
+    days = (
+        DailySales.query
+        .filter(DailySales.day >= start, DailySales.day <= end)
+        .order_by(DailySales.day)
+        .all()
+    )
+
+    revenue = func.sum(DailyProductSales.revenue_cents)
+    top_rows = (
+        db.session.query(
+            DailyProductSales.product_id,
+            func.sum(DailyProductSales.order_count),
+            func.sum(DailyProductSales.units),
+            revenue,
+        )
+        .filter(DailyProductSales.day >= start, DailyProductSales.day <= end)
+        .group_by(DailyProductSales.product_id)
+        .having(func.sum(DailyProductSales.order_count) > 0)
+        .order_by(revenue.desc())
+        .limit(top)
+        .all()
+    )
+    names = dict(
+        db.session.query(Product.id, Product.name)
+        .filter(Product.id.in_([r[0] for r in top_rows]))
+        .all()
+    ) if top_rows else {}
+
+    return json_response({
+        "from": start.isoformat(),
+        "to": end.isoformat(),
+        "totals": {
+            "order_count": sum(d.order_count for d in days),
+            "units": sum(d.units for d in days),
+            "revenue": to_dollars(sum(d.revenue_cents for d in days)),
+        },
+        "days": [d.to_dict() for d in days if d.order_count],
+        "top_products": [{
+            "product_id": product_id,
+            "name": names.get(product_id),
+            "order_count": int(order_count or 0),
+            "units": int(units or 0),
+            "revenue": to_dollars(rev or 0),
+        } for product_id, order_count, units, rev in top_rows],
+    }), 200
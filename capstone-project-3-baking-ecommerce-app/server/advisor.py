@@ -0,0 +1,453 @@
+"""
+`flask db-advise`: query plans and missing indexes for the app's real queries.
+
+    flask --app server.wsgi db-advise                          # scratch SQLite, print findings + migration
+    flask --app server.wsgi db-advise --orders 50000 --write   # also write migrations/versions/<rev>_advised_indexes.py
+    flask --app server.wsgi db-advise --database postgresql://.../scratch
+
+Seeds a scratch database (see seed.py; it is dropped and recreated, so never
+point --database at real data). It then sends a fixed workload covering
+every blueprint through the test client and captures each distinct statement
+with its parameters from engine events. Every captured statement is explained:
+EXPLAIN QUERY PLAN on SQLite, EXPLAIN ANALYZE on Postgres (plain EXPLAIN
+for writes).
+
+These plan steps are flagged:
+  - full table scans (SQLite "SCAN t", Postgres "Seq Scan on t");
+  - sorts the planner has to do itself (SQLite "USE TEMP B-TREE", a
+    Postgres "Sort" node);
+  - index lookups that use only some of the equality filters.
+
+For flagged ORM statements, an index is proposed from the WHERE clause and
+ORDER BY. Equality columns come first, then the sort or range column. A
+proposal is dropped if an existing index (or a longer proposal) already starts
+with the same columns. The proposals are rendered as an Alembic migration on
+top of the current head. Add the matching `Index(...)` to models.py, too.
+"""
+from __future__ import annotations
+
+import os
+import re
+import tempfile
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+
+import click
+from flask import current_app
+from sqlalchemy import event as sa_event, func, inspect as sa_inspect, select
+from sqlalchemy.sql import operators, visitors
+from sqlalchemy.sql.elements import BinaryExpression, UnaryExpression
+from sqlalchemy.sql.schema import Column
+
+_SKIP = ("PRAGMA", "SAVEPOINT", "RELEASE", "ROLLBACK", "BEGIN", "COMMIT", "EXPLAIN", "SELECT 1")
+_EQ_OPS = (operators.eq, operators.in_op, operators.is_)
+_RANGE_OPS = (operators.lt, operators.le, operators.gt, operators.ge, operators.between_op)
+
+_SQLITE_SCAN = re.compile(r"^SCAN (\w+)$")
+_SQLITE_INDEX = re.compile(r"^SEARCH (\w+) USING (?:COVERING )?INDEX (\w+) \(([^)]*)\)")
+_SQLITE_TEMP = re.compile(r"USE TEMP B-TREE FOR (ORDER BY|GROUP BY|DISTINCT|RIGHT PART OF ORDER BY)")
+_PG_SEQ = re.compile(r"Seq Scan on (\w+)")
+_PG_SORT = re.compile(r"(?:->\s+|^)(?:Incremental )?Sort\s+\(")
+_ACTIONABLE = ("full scan", "temp sort", "partial index")
+
+
+@dataclass
+class Captured:
+    statement: str
+    parameters: object
+    compiled: object  # the SQLAlchemy construct, when the statement came from one
+    labels: list = field(default_factory=list)
+
+
+@dataclass
+class Finding:
+    kind: str  # "full scan", "temp sort", "partial index"
+    table: str
+    detail: str
+
+
+@dataclass
+class Proposal:
+    table: str
+    columns: tuple
+    reasons: list = field(default_factory=list)
+
+    @property
+    def name(self) -> str:
+        return f"ix_{self.table}_{'_'.join(self.columns)}"
+
+
+# ---------- capture ----------
+
+class QueryCapture:
+    """Collects distinct statements run on `engine` while active, tagged with the current workload label."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.label = None
+        self.queries: dict[str, Captured] = {}
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if executemany or statement.lstrip().upper().startswith(_SKIP):
+            return
+        key = " ".join(statement.split())
+        cap = self.queries.get(key)
+        if cap is None:
+            compiled = getattr(context, "compiled", None)
+            cap = self.queries[key] = Captured(statement, parameters, getattr(compiled, "statement", None))
+        if self.label and self.label not in cap.labels:
+            cap.labels.append(self.label)
+
+    def __enter__(self):
+        sa_event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        sa_event.remove(self.engine, "before_cursor_execute", self._on_execute)
+
+
+# ---------- workload ----------
+
+def _workload(product_ids: list, order_ids: list, free_day: date):
+    """(label, method, path, json body, who) for every blueprint's hot paths; who is None/'customer'/'admin'."""
+    pid, oid = product_ids[len(product_ids) // 2], order_ids[len(order_ids) // 2]
+    return [
+        ("auth.login", "POST", "/auth/login", {"email": "customer2@example.com", "password": "password"}, None),
+        ("auth.me", "GET", "/auth/me", None, "customer"),
+        ("products.list", "GET", "/products/", None, None),
+        ("products.detail", "GET", f"/products/{pid}", None, None),
+        ("cart.get", "GET", "/cart/", None, "customer"),
+        ("cart.add", "POST", "/cart/items", {"product_id": pid, "qty": 2}, "customer"),
+        ("cart.remove", "DELETE", f"/cart/items/{pid}", None, "customer"),
+        ("cart.add", "POST", "/cart/items", {"product_id": pid, "qty": 1}, "customer"),
+        ("checkout", "POST", "/checkout/", {"fulfillment_date": free_day.isoformat(), "fulfillment_method": "pickup"},
+         "customer"),
+        ("orders.list", "GET", "/orders/", None, "customer"),
+        ("orders.list_admin", "GET", "/orders/?per_page=50&page=3", None, "admin"),
+        ("orders.list_admin_status", "GET", "/orders/?status=placed&per_page=50", None, "admin"),
+        ("orders.detail", "GET", f"/orders/{oid}", None, "admin"),
+        ("admin_orders.status", "PATCH", f"/admin/orders/{oid}/status", {"status": "canceled"}, "admin"),
+        ("admin_orders.bulk_status", "PATCH", "/admin/orders/status",
+         {"ids": order_ids[:20], "status": "complete", "summary": True}, "admin"),
+        ("admin_stats", "GET", "/admin/stats/?from=2024-01-01&to=2026-01-31", None, "admin"),
+    ]
+
+
+def _ingest_dedup(app, capture):
+    # the ingest route's lookup, without calling Spoonacular
+    from . import spoonacular
+    capture.label = "products.ingest_spoonacular"
+    with app.test_request_context():
+        spoonacular.ingest(990001, {"title": "Advisor Tart", "image": "https://img.test/990001.jpg"}, {})
+
+
+def run_workload(app, capture, echo=click.echo) -> None:
+    from .models import db, Order, Product, User
+    from .enums import UserRole
+    from . import identity
+
+    with app.app_context():
+        admin = db.session.execute(select(User).where(User.role == UserRole.admin).limit(1)).scalar_one()
+        customer = db.session.execute(select(User).where(User.email == "customer2@example.com")).scalar_one()
+        tokens = {"admin": identity.issue_access_token(admin), "customer": identity.issue_access_token(customer)}
+        product_ids = list(db.session.execute(select(Product.id).where(Product.is_active).order_by(Product.id)).scalars())
+        order_ids = list(db.session.execute(select(Order.id).order_by(Order.id)).scalars())
+        free_day = (db.session.execute(select(func.max(Order.fulfillment_date))).scalar() or date.today()) + timedelta(days=1)
+
+    client = app.test_client()
+    with capture:
+        for label, method, path, body, who in _workload(product_ids, order_ids, free_day):
+            capture.label = label
+            headers = {"Authorization": f"Bearer {tokens[who]}"} if who else {}
+            resp = client.open(path, method=method, json=body, headers=headers)
+            if resp.status_code >= 400:
+                echo(f"  warning: {label} {method} {path} -> {resp.status_code}")
+        _ingest_dedup(app, capture)
+
+
+# ---------- plans ----------
+
+def explain(conn, cap: Captured) -> list[str]:
+    """The plan for one captured statement, one string per step."""
+    if conn.dialect.name == "sqlite":
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {cap.statement}", cap.parameters).fetchall()
+        return [row[-1] for row in rows]
+    if conn.dialect.name == "postgresql":
+        is_read = cap.statement.lstrip().upper().startswith(("SELECT", "WITH"))
+        prefix = "EXPLAIN (ANALYZE, BUFFERS)" if is_read else "EXPLAIN"
+        return [row[0] for row in conn.exec_driver_sql(f"{prefix} {cap.statement}", cap.parameters)]
+    raise click.ClickException(f"don't know how to explain on {conn.dialect.name}")
+
+
+def _filter_columns(construct) -> dict[str, tuple[list, list, list]]:
+    """table -> (equality columns, range columns, order-by columns) across every SELECT/UPDATE/DELETE in it."""
+    found: dict[str, tuple[list, list, list]] = {}
+
+    def add(col, slot):
+        if isinstance(col, Column) and col.table is not None and col.name not in found.setdefault(
+                col.table.name, ([], [], []))[slot]:
+            found[col.table.name][slot].append(col.name)
+
+    for node in visitors.iterate(construct):
+        where = getattr(node, "whereclause", None)
+        if where is not None:
+            for expr in visitors.iterate(where):
+                if isinstance(expr, BinaryExpression):
+                    if expr.operator in _EQ_OPS:
+                        add(expr.left, 0)
+                    elif expr.operator in _RANGE_OPS:
+                        add(expr.left, 1)
+        order = []
+        for clause in getattr(node, "_order_by_clauses", ()):
+            while isinstance(clause, UnaryExpression):
+                clause = clause.element
+            order.append(clause)
+        # only an ORDER BY made of plain columns of one table can be served by an index
+        if order and all(isinstance(c, Column) for c in order) and len({c.table.name for c in order}) == 1:
+            for col in order:
+                add(col, 2)
+    return found
+
+
+def analyse(cap: Captured, plan: list[str], dialect: str, tables: set,
+            unique_indexes: frozenset = frozenset()) -> tuple[list[Finding], list[Proposal]]:
+    """Flag the plan's expensive steps on real tables and propose an index for each flagged table."""
+    columns = _filter_columns(cap.compiled) if cap.compiled is not None else {}
+    # a sort an index can remove: ORDER BY on plain columns of a single table
+    sorted_by = [t for t, (_, _, order) in columns.items() if order]
+    sort_table = sorted_by[0] if len(sorted_by) == 1 else "-"
+
+    findings: list[Finding] = []
+    for step in plan:
+        text_ = step.strip()
+        if dialect == "sqlite":
+            m = _SQLITE_SCAN.match(text_)
+            if m and m.group(1) in tables:
+                findings.append(Finding("full scan", m.group(1), text_))
+            m = _SQLITE_INDEX.match(text_)
+            # a unique index finds at most one row, so the remaining filters cost nothing
+            if m and m.group(1) in tables and m.group(2) not in unique_indexes:
+                used = {re.split(r"[=<>]", c)[0].strip() for c in m.group(3).split(" AND ")}
+                if set(columns.get(m.group(1), ([], [], []))[0]) - used:
+                    findings.append(Finding("partial index", m.group(1), text_))
+            m = _SQLITE_TEMP.search(text_)
+            if m:
+                kind = "temp sort" if m.group(1).endswith("ORDER BY") else f"temp sort ({m.group(1)})"
+                findings.append(Finding(kind, sort_table, text_))
+        else:
+            m = _PG_SEQ.search(text_)
+            if m and m.group(1) in tables:
+                findings.append(Finding("full scan", m.group(1), text_))
+            if _PG_SORT.search(text_):
+                findings.append(Finding("temp sort", sort_table, text_))
+
+    proposals = []
+    for table in dict.fromkeys(f.table for f in findings if f.kind in _ACTIONABLE and f.table in tables):
+        eq, rng, order = columns.get(table, ([], [], []))
+        cols = tuple(dict.fromkeys(eq + (order or rng[:1])))
+        if cols:
+            kinds = [f.kind for f in findings if f.table == table]
+            proposals.append(Proposal(table, cols, list(dict.fromkeys(kinds))))
+    return findings, proposals
+
+
+def _existing_indexes(engine) -> tuple[dict[str, list[tuple]], frozenset]:
+    """table -> column tuples of its indexes, unique constraints and primary key; plus the unique index names."""
+    insp = sa_inspect(engine)
+    out, unique = {}, set()
+    for table in insp.get_table_names():
+        indexes = insp.get_indexes(table)
+        unique.update(i["name"] for i in indexes if i["unique"])
+        cols = [tuple(i["column_names"]) for i in indexes]
+        cols += [tuple(u["column_names"]) for u in insp.get_unique_constraints(table)]
+        pk = insp.get_pk_constraint(table).get("constrained_columns")
+        if pk:
+            cols.append(tuple(pk))
+        out[table] = cols
+    return out, frozenset(unique)
+
+
+def consolidate(proposals: list[Proposal], existing: dict[str, list[tuple]]) -> list[Proposal]:
+    """Merge duplicates; drop proposals already served by an existing index or a longer proposal."""
+    merged: dict[tuple, Proposal] = {}
+    for p in proposals:
+        key = (p.table, p.columns)
+        if key in merged:
+            merged[key].reasons = list(dict.fromkeys(merged[key].reasons + p.reasons))
+        else:
+            merged[key] = Proposal(p.table, p.columns, list(p.reasons))
+
+    def covered(p: Proposal, indexes) -> bool:
+        return any(ix[:len(p.columns)] == p.columns for ix in indexes)
+
+    kept = []
+    for p in merged.values():
+        longer = [q.columns for q in merged.values() if q.table == p.table and len(q.columns) > len(p.columns)]
+        if not covered(p, existing.get(p.table, [])) and not covered(p, longer):
+            kept.append(p)
+    return sorted(kept, key=lambda p: (p.table, p.columns))
+
+
+# ---------- migration ----------
+
+_MIGRATION = """\
+\"\"\"advised indexes
+
+Revision ID: {revision}
+Revises: {down_revision}
+Create Date: {created}
+
+Proposed by `flask db-advise`:
+{reasons}
+\"\"\"
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '{revision}'
+down_revision = {down_revision!r}
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+{upgrade}
+
+
+def downgrade():
+{downgrade}
+"""
+
+
+def render_migration(proposals: list[Proposal], down_revision: str | None, revision: str | None = None) -> tuple[str, str]:
+    revision = revision or uuid.uuid4().hex[-12:]
+    by_table: dict[str, list[Proposal]] = {}
+    for p in proposals:
+        by_table.setdefault(p.table, []).append(p)
+
+    up, down = [], []
+    for table, items in by_table.items():
+        up.append(f"    with op.batch_alter_table('{table}', schema=None) as batch_op:")
+        up += [f"        batch_op.create_index('{p.name}', {list(p.columns)!r}, unique=False)" for p in items]
+        up.append("")
+        down.append(f"    with op.batch_alter_table('{table}', schema=None) as batch_op:")
+        down += [f"        batch_op.drop_index('{p.name}')" for p in items]
+        down.append("")
+    reasons = "\n".join(f"  {p.name}: {', '.join(p.reasons)}" for p in proposals)
+    source = _MIGRATION.format(
+        revision=revision, down_revision=down_revision, created=datetime.now(), reasons=reasons,
+        upgrade="\n".join(up).rstrip() or "    pass", downgrade="\n".join(down).rstrip() or "    pass",
+    )
+    return revision, source
+
+
+def _migrations_dir() -> str:
+    migrate = current_app.extensions.get("migrate")
+    return migrate.directory if migrate is not None else "migrations"
+
+
+def _current_head(directory: str) -> str | None:
+    from alembic.config import Config as AlembicConfig
+    from alembic.script import ScriptDirectory
+    cfg = AlembicConfig()
+    cfg.set_main_option("script_location", directory)
+    return ScriptDirectory.from_config(cfg).get_current_head()
+
+
+# ---------- command ----------
+
+def _explain_workload(uri: str, price_table_path: str, seed_args: dict, verbose: bool) -> tuple[list, dict]:
+    """Seed `uri`, run the workload against it and explain every statement. Returns (proposals, existing indexes)."""
+    from .app import create_app
+    from .models import db
+    from .seed import generate
+
+    scratch = create_app({
+        "SQLALCHEMY_DATABASE_URI": uri,
+        "SQLALCHEMY_REPLICA_URI": None,
+        "DB_MIGRATIONS": False,
+        "RATELIMIT_ENABLED": False,
+        "PASSWORD_HASH_WORKERS": 0,
+        "SLOW_REQUEST_MS": 0,
+        "SLOW_QUERY_MS": 0,
+        "PRICE_TABLE_PATH": price_table_path,
+    })
+    with scratch.app_context():
+        click.echo(f"seeding {uri} ...")
+        generate(**seed_args)
+        engine = db.engine
+        # SQLite's planner ignores row counts until ANALYZE has run; Postgres autovacuum may not have yet either
+        with engine.begin() as conn:
+            conn.exec_driver_sql("ANALYZE")
+        existing, unique_indexes = _existing_indexes(engine)
+
+    capture = QueryCapture(engine)
+    run_workload(scratch, capture)
+    click.echo(f"captured {len(capture.queries)} distinct statements\n")
+
+    proposals = []
+    with scratch.app_context(), engine.connect() as conn:
+        for cap in capture.queries.values():
+            trans = conn.begin()
+            try:
+                plan = explain(conn, cap)
+            finally:
+                trans.rollback()
+            findings, props = analyse(cap, plan, engine.dialect.name, set(existing), unique_indexes)
+            proposals += props
+            if findings or verbose:
+                click.echo(f"[{', '.join(cap.labels) or '-'}] {' '.join(cap.statement.split())[:300]}")
+                for step in plan if verbose else [f.detail for f in findings]:
+                    click.echo(f"    {step}")
+                for f in findings:
+                    click.echo(f"  ! {f.kind}" + (f" on {f.table}" if f.table != "-" else ""))
+                click.echo("")
+
+    with scratch.app_context():
+        db.engine.dispose()  # close the scratch file before its directory goes
+    return proposals, existing
+
+
+@click.command("db-advise")
+@click.option("--database", help="scratch database URI; it is reset and seeded (default: a temp SQLite file)")
+@click.option("--users", default=2000, show_default=True)
+@click.option("--products", default=2000, show_default=True)
+@click.option("--orders", default=20000, show_default=True)
+@click.option("--carts", default=500, show_default=True)
+@click.option("--seed", "seed_", default=1, show_default=True)
+@click.option("--verbose", "-v", is_flag=True, help="print every statement and its plan")
+@click.option("--write", is_flag=True, help="write the migration into the migrations directory")
+def db_advise_command(database, users, products, orders, carts, seed_, verbose, write):
+    """Explain the app's queries against seeded data and propose missing indexes."""
+    # the scratch SQLite file (and its -wal/-shm), plus the scratch app's price table, live in here
+    scratch_dir = tempfile.TemporaryDirectory(prefix="db-advise-")
+    try:
+        proposals, existing = _explain_workload(
+            database or f"sqlite:///{os.path.join(scratch_dir.name, 'scratch.db')}",
+            os.path.join(scratch_dir.name, "prices"),
+            dict(users=users, products=products, orders=orders, carts=carts, seed=seed_),
+            verbose,
+        )
+    finally:
+        scratch_dir.cleanup()
+
+    proposals = consolidate(proposals, existing)
+    if not proposals:
+        click.echo("no missing indexes found")
+        return
+
+    click.echo("proposed indexes:")
+    for p in proposals:
+        click.echo(f"  {p.name} on {p.table}({', '.join(p.columns)})  [{', '.join(p.reasons)}]")
+
+    directory = _migrations_dir()
+    revision, source = render_migration(proposals, _current_head(directory))
+    if write:
+        path = os.path.join(directory, "versions", f"{revision}_advised_indexes.py")
+        with open(path, "w") as f:
+            f.write(source)
+        click.echo(f"\nwrote {path}; add the matching Index(...) entries to models.py")
+    else:
+        click.echo("\n" + source)
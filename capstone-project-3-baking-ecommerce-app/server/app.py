@@ -1,7 +1,11 @@
 from flask import Flask
-from flask_migrate import Migrate
 from flask_cors import CORS
 from .models import db
+from . import hashing, engine, routing, profiling, advisor, pricetable, tokens, events, identity
+from .ratelimit import limiter
+from .instrumentation import instrumentation
+from .compression import compression
+from .metrics import metrics
 from .config import Config
 from .auth import auth_bp, jwt  
 from .products import products_bp
@@ -9,18 +13,47 @@ from .cart import cart_bp
 from .checkout import checkout_bp
 from .orders import orders_bp
 from .admin_orders import admin_orders_bp
+from .admin_stats import admin_stats_bp
+from .rollups import rollups_cli
+from .archive import archive_cli
+from .seed import seed_command
 
 
-def create_app():
+def create_app(overrides=None):
     app = Flask(__name__)
     app.url_map.strict_slashes = False 
     app.config.from_object(Config)
+    if overrides:
+        app.config.update(overrides)
 
+    engine.configure(app)
+    routing.init_app(app)
     db.init_app(app)
-    Migrate(app, db)
-    CORS(app, supports_credentials=True)
+    engine.install(app, db)
+    if app.config["DB_MIGRATIONS"]:
+        # alembic is slow to import and only the `flask db` commands need it
+        from flask_migrate import Migrate
+        Migrate(app, db)
+    CORS(
+        app,
+        resources={r"/*": {"origins": app.config["CORS_ORIGINS"]}},
+        supports_credentials=True,
+        allow_headers=["Content-Type", "Authorization", "Last-Event-ID", "X-Profile"],
+        expose_headers=["Server-Timing", "Retry-After", "X-Profile-Id"],
+        methods=["GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS"],
+    )
 
     jwt.init_app(app)
+    identity.init_app(app)
+    tokens.init_app(app)
+    hashing.init_app(app)
+    pricetable.init_app(app)
+    limiter.init_app(app)
+    # after_request hooks run in reverse: compress last, after the other hooks have set their headers
+    compression.init_app(app)
+    instrumentation.init_app(app)
+    metrics.init_app(app)
+    profiling.init_app(app)
 
     app.register_blueprint(auth_bp, url_prefix="/auth")
     app.register_blueprint(products_bp, url_prefix="/products")
@@ -28,19 +61,29 @@ def create_app():
     app.register_blueprint(checkout_bp, url_prefix="/checkout", strict_slashes=False)
     app.register_blueprint(orders_bp, url_prefix="/orders")
     app.register_blueprint(admin_orders_bp, url_prefix="/admin/orders")
+    app.register_blueprint(admin_stats_bp, url_prefix="/admin/stats")
+
+    app.cli.add_command(rollups_cli)
+    app.cli.add_command(archive_cli)
+    app.cli.add_command(events.events_cli)
+    app.cli.add_command(pricetable.prices_cli)
+    app.cli.add_command(tokens.tokens_cli)
+    app.cli.add_command(seed_command)
+    app.cli.add_command(profiling.profile_cli)
+    app.cli.add_command(advisor.db_advise_command)
 
     @app.get("/health")
     def health():
-        return {"ok": True}
+        """Readiness: every configured database answers a trivial query."""
+        checks = {}
+        for bind, eng in db.engines.items():
+            try:
+                with eng.connect() as conn:
+                    conn.exec_driver_sql("SELECT 1")
+                checks[bind or "default"] = "ok"
+            except Exception as e:
+                checks[bind or "default"] = f"error: {type(e).__name__}"
+        ok = all(v == "ok" for v in checks.values())
+        return {"ok": ok, "db": checks}, 200 if ok else 503
 
     return app
-
-app = create_app()
-
-CORS(
-    app,
-    resources={r"/*": {"origins": ["http://localhost:5173", "http://127.0.0.1:5173"]}},
-    supports_credentials=True,  # ok even if you don't use cookies
-    allow_headers=["Content-Type", "Authorization"],
-    methods=["GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS"],
-)
\ No newline at end of file
@@ -0,0 +1,151 @@
+"""
+Hot/cold storage for order history.
+
+`orders` / `order_items` only hold orders that can still change or be
+booked against. An order in a terminal status (complete or canceled) whose
+fulfillment date is more than ARCHIVE_AFTER_DAYS in the past gets moved,
+with its ids, into `orders_archive` / `order_items_archive`:
+
+    flask --app server.wsgi archive orders                  # everything eligible, in batches
+    flask --app server.wsgi archive orders --max-batches 10 --older-than-days 730
+    flask --app server.wsgi archive stats
+
+Each batch of ARCHIVE_BATCH_SIZE orders is copied and deleted in its own
+transaction, so the hot tables are never locked for long. Run it from cron.
+
+Reads fall back to the archive. GET /orders/<id> checks the archive when the
+id is not in the live table. GET /orders pages through the live orders first,
+then through the archived ones (newest first within each). Rollups already
+count archived orders, and `flask rollups rebuild` reads both tables. Archived
+orders are read-only: the admin status endpoints only see live orders.
+
+Archived ids are never handed out again: Postgres sequences don't go back,
+and orders/order_items use AUTOINCREMENT on SQLite, which would otherwise
+reuse the max rowid once it is deleted. If an id does show up in both
+tables, the batch stops with ArchiveConflict instead of overwriting.
+"""
+from __future__ import annotations
+
+import time
+from datetime import date, datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import delete, func, insert, literal, select
+
+from .models import db, ArchivedOrder, ArchivedOrderItem, Order, OrderItem, OrderStatus
+
+TERMINAL_STATUSES = (OrderStatus.complete, OrderStatus.canceled)
+
+
+class ArchiveConflict(Exception):
+    """Ids about to be archived are already in the archive (an id was handed out twice)."""
+
+    def __init__(self, table: str, ids: list[int]):
+        self.table, self.ids = table, ids
+        shown = ", ".join(map(str, ids[:20])) + (" ..." if len(ids) > 20 else "")
+        super().__init__(f"{table} already holds id(s) {shown}; refusing to archive over them")
+
+
+def cutoff_for(days: int, today: date | None = None) -> date:
+    return (today or datetime.utcnow().date()) - timedelta(days=days)
+
+
+def _copy(source, target, where, now: datetime) -> None:
+    cols = [c.name for c in source.__table__.columns]
+    extra = ["archived_at"] if "archived_at" in target.__table__.columns else []
+    values = [source.__table__.c[c] for c in cols] + [literal(now) for _ in extra]
+    db.session.execute(insert(target).from_select(cols + extra, select(*values).where(where)))
+
+
+def archive_batch(cutoff: date, batch_size: int) -> int:
+    """Move up to `batch_size` eligible orders (fulfillment before `cutoff`) into the archive. Caller commits."""
+    ids_q = (
+        select(Order.id)
+        .where(Order.status.in_(TERMINAL_STATUSES), Order.fulfillment_date < cutoff)
+        .order_by(Order.id)
+        .limit(batch_size)
+    )
+    if db.session.get_bind().dialect.name == "postgresql":
+        # don't wait on (or archive from under) an admin who is editing one of these right now
+        ids_q = ids_q.with_for_update(skip_locked=True)
+    ids = list(db.session.execute(ids_q).scalars())
+    if not ids:
+        return 0
+
+    # a reused id would fail the copy with a bare IntegrityError on every run; name the rows instead
+    for archived, clash in (
+        (ArchivedOrder, select(ArchivedOrder.id).where(ArchivedOrder.id.in_(ids))),
+        (ArchivedOrderItem, select(ArchivedOrderItem.id).join(OrderItem, OrderItem.id == ArchivedOrderItem.id)
+                            .where(OrderItem.order_id.in_(ids))),
+    ):
+        taken = list(db.session.execute(clash).scalars())
+        if taken:
+            raise ArchiveConflict(archived.__tablename__, sorted(taken))
+
+    now = datetime.utcnow()
+    _copy(Order, ArchivedOrder, Order.id.in_(ids), now)
+    _copy(OrderItem, ArchivedOrderItem, OrderItem.order_id.in_(ids), now)
+    db.session.execute(delete(OrderItem).where(OrderItem.order_id.in_(ids)))
+    db.session.execute(delete(Order).where(Order.id.in_(ids)))
+    return len(ids)
+
+
+def archive_orders(cutoff: date, batch_size: int, max_batches: int | None = None, pause: float = 0.0,
+                   echo=lambda msg: None) -> int:
+    """Archive in committed batches until nothing is eligible (or `max_batches`). Returns orders moved."""
+    total = batches = 0
+    while max_batches is None or batches < max_batches:
+        try:
+            moved = archive_batch(cutoff, batch_size)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        if not moved:
+            break
+        total += moved
+        batches += 1
+        echo(f"  batch {batches}: {moved} orders ({total} so far)")
+        if pause:
+            time.sleep(pause)
+    return total
+
+
+# ---------- CLI ----------
+
+archive_cli = AppGroup("archive", help="Move old order history out of the hot tables.")
+
+
+@archive_cli.command("orders")
+@click.option("--older-than-days", type=int, default=None, help="Defaults to ARCHIVE_AFTER_DAYS.")
+@click.option("--batch-size", type=int, default=None, help="Defaults to ARCHIVE_BATCH_SIZE.")
+@click.option("--max-batches", type=int, default=None, help="Stop after this many batches.")
+def archive_orders_command(older_than_days, batch_size, max_batches):
+    """Archive complete/canceled orders fulfilled before the cutoff."""
+    cfg = current_app.config
+    cutoff = cutoff_for(cfg["ARCHIVE_AFTER_DAYS"] if older_than_days is None else older_than_days)
+    click.echo(f"Archiving complete/canceled orders fulfilled before {cutoff} ...")
+    started = time.perf_counter()
+    try:
+        moved = archive_orders(
+            cutoff, batch_size or cfg["ARCHIVE_BATCH_SIZE"], max_batches, cfg["ARCHIVE_BATCH_PAUSE"], echo=click.echo,
+        )
+    except ArchiveConflict as e:
+        raise click.ClickException(str(e))
+    click.echo(f"Archived {moved} order(s) in {time.perf_counter() - started:.1f}s.")
+
+
+@archive_cli.command("stats")
+def archive_stats_command():
+    """Row counts of the live and archive tables, and how much is eligible now."""
+    cutoff = cutoff_for(current_app.config["ARCHIVE_AFTER_DAYS"])
+    eligible = db.session.execute(
+        select(func.count()).select_from(Order)
+        .where(Order.status.in_(TERMINAL_STATUSES), Order.fulfillment_date < cutoff)
+    ).scalar()
+    for model in (Order, OrderItem, ArchivedOrder, ArchivedOrderItem):
+        count = db.session.execute(select(func.count()).select_from(model)).scalar()
+        click.echo(f"{model.__tablename__:<20} {count:>10}")
+    click.echo(f"eligible before {cutoff}: {eligible}")
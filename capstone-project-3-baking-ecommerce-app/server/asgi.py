@@ -0,0 +1,239 @@
+"""
+ASGI entry point with non-blocking Spoonacular routes.
+
+    uvicorn server.asgi:app --port 5555
+
+The three Spoonacular proxy routes are served natively on the event loop
+with an async HTTP client (httpx). A slow upstream then costs a coroutine
+instead of a worker thread. Every other request goes to the regular Flask app
+through a WSGI adapter (a2wsgi) backed by ASGI_WSGI_THREADS threads, so the
+sync blueprints are unchanged.
+
+On the async path:
+  - at most SPOONACULAR_MAX_CONCURRENCY upstream calls run at once. A request
+    that can't get a slot within SPOONACULAR_QUEUE_TIMEOUT seconds gets a 503;
+  - if the client disconnects, its upstream call is cancelled;
+  - the rate limits, Spoonacular metrics and response bodies are the same as
+    on the sync routes. Errors come back as JSON ({"error": ...}).
+
+Needs the optional packages httpx, a2wsgi and an ASGI server such as uvicorn.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import re
+import time
+from pathlib import Path
+from urllib.parse import parse_qs
+
+from dotenv import load_dotenv
+
+_here = Path(__file__).resolve().parent
+load_dotenv(_here / ".env")
+load_dotenv(_here.parent / ".env")
+
+import httpx  # noqa: E402
+from a2wsgi import WSGIMiddleware  # noqa: E402
+
+from .app import create_app  # noqa: E402
+from . import serializers, spoonacular  # noqa: E402
+from .metrics import http_latency, http_requests, track_upstream, upstream_failures  # noqa: E402
+
+_ROUTES = [
+    ("GET", re.compile(r"^/products/spoonacular/?$"), "products.list_spoonacular_desserts"),
+    ("GET", re.compile(r"^/products/spoonacular/(\d+)/?$"), "products.get_spoonacular_dessert"),
+    ("POST", re.compile(r"^/products/ingest/spoonacular/(\d+)/?$"), "products.ingest_spoonacular"),
+]
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str, headers: dict | None = None):
+        self.status, self.message, self.headers = status, message, headers or {}
+
+
+class ClientGone(Exception):
+    """The client disconnected before we answered."""
+
+
+class SpoonacularRoutes:
+    """Routes Spoonacular requests to async handlers and everything else to the WSGI app."""
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        cfg = flask_app.config
+        self.wsgi = WSGIMiddleware(flask_app, workers=cfg["ASGI_WSGI_THREADS"])
+        self.max_concurrency = cfg["SPOONACULAR_MAX_CONCURRENCY"]
+        self.queue_timeout = cfg["SPOONACULAR_QUEUE_TIMEOUT"]
+        self.upstream_timeout = cfg["SPOONACULAR_TIMEOUT"]
+        self.cors_origins = set(cfg["CORS_ORIGINS"])
+        self._slots: asyncio.Semaphore | None = None
+        self._client: httpx.AsyncClient | None = None
+
+    # ---- ASGI plumbing ----
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self._lifespan(receive, send)
+        if scope["type"] == "http":
+            for method, pattern, endpoint in _ROUTES:
+                m = pattern.match(scope["path"])
+                if m and scope["method"] == method:
+                    return await self._handle(scope, receive, send, endpoint, m.groups())
+        return await self.wsgi(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self._client is not None:
+                    await self._client.aclose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def _ensure_started(self) -> None:
+        # created on first use so they bind to the server's running loop
+        if self._client is None:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+            self._client = httpx.AsyncClient(
+                base_url=spoonacular.BASE_URL,
+                timeout=self.upstream_timeout,
+                limits=httpx.Limits(max_connections=self.max_concurrency),
+            )
+
+    async def _handle(self, scope, receive, send, endpoint, args):
+        start = time.perf_counter()
+        status = 500
+        headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope["headers"]}
+        try:
+            body = await _read_body(receive)
+            status, payload = await _until_disconnect(receive, self._dispatch(scope, headers, endpoint, args, body))
+            await self._send_json(send, status, payload, headers)
+        except HTTPError as e:
+            status = e.status
+            await self._send_json(send, e.status, {"error": e.message}, headers, e.headers)
+        except ClientGone:
+            status = 499  # nginx's "client closed request"; nothing is sent
+        finally:
+            http_latency.observe(time.perf_counter() - start, "products", endpoint, scope["method"])
+            http_requests.inc("products", endpoint, scope["method"], str(status))
+
+    async def _send_json(self, send, status, payload, req_headers, extra=None):
+        body = serializers.dumps(payload)
+        out = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+        origin = req_headers.get("origin")
+        if origin in self.cors_origins:
+            out += [(b"access-control-allow-origin", origin.encode()), (b"access-control-allow-credentials", b"true"),
+                    (b"vary", b"Origin")]
+        out += [(k.lower().encode(), str(v).encode()) for k, v in (extra or {}).items()]
+        await send({"type": "http.response.start", "status": status, "headers": out})
+        await send({"type": "http.response.body", "body": body})
+
+    # ---- handlers ----
+
+    async def _dispatch(self, scope, headers, endpoint, args, body):
+        await self._rate_limit(scope, headers, endpoint)
+        if not spoonacular.SPOONACULAR_KEY:
+            raise HTTPError(500, "Missing SPOONACULAR_API_KEY")
+
+        if endpoint == "products.list_spoonacular_desserts":
+            query = parse_qs(scope.get("query_string", b"").decode())
+            try:
+                number = int(query.get("number", ["20"])[0])
+            except ValueError:
+                raise HTTPError(400, "number must be an integer")
+            data = await self._get(*spoonacular.search_request(query.get("q", ["dessert"])[0], number))
+            return 200, spoonacular.desserts(data)
+
+        recipe_id = int(args[0])
+        data = await self._get(*spoonacular.info_request(recipe_id))
+        if endpoint == "products.get_spoonacular_dessert":
+            return 200, spoonacular.dessert_detail(data)
+
+        try:
+            payload = json.loads(body) if body else {}
+        except ValueError:
+            payload = {}
+        return await asyncio.to_thread(self._ingest, recipe_id, data, payload if isinstance(payload, dict) else {})
+
+    def _ingest(self, recipe_id, data, payload):
+        from .models import db
+        with self.flask_app.app_context():
+            try:
+                product, created = spoonacular.ingest(recipe_id, data, payload)
+                return (201 if created else 200), {"product_id": product.id, "product": serializers.product(product)}
+            finally:
+                db.session.remove()
+
+    async def _get(self, operation, path, params, error):
+        self._ensure_started()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            upstream_failures.inc("spoonacular", operation, "saturated")
+            raise HTTPError(503, "Spoonacular is busy, please retry", {"Retry-After": "1"})
+        try:
+            with track_upstream("spoonacular", operation):
+                resp = await self._client.get(path, params={**params, "apiKey": spoonacular.SPOONACULAR_KEY})
+        except httpx.HTTPError:
+            raise HTTPError(502, spoonacular.SEARCH_ERROR)
+        finally:
+            self._slots.release()
+        if resp.status_code != 200:
+            upstream_failures.inc("spoonacular", operation, f"http_{resp.status_code}")
+            raise HTTPError(502, error)
+        return resp.json()
+
+    async def _rate_limit(self, scope, headers, endpoint):
+        from .ratelimit import limiter
+        if not self.flask_app.extensions["ratelimit"].enabled:
+            return
+        client = scope.get("client") or ("", 0)
+
+        def check():
+            with self.flask_app.app_context():
+                return limiter.wait_for(endpoint, "products", client[0], headers.get("authorization", ""))
+
+        wait = await asyncio.to_thread(check)
+        if wait > 0:
+            raise HTTPError(429, "Too many requests, slow down", {"Retry-After": str(max(1, math.ceil(wait)))})
+
+
+async def _read_body(receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            raise ClientGone()
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            return b"".join(chunks)
+
+
+async def _until_disconnect(receive, coro):
+    """Run `coro`, cancelling it if the client goes away first."""
+    work = asyncio.ensure_future(coro)
+    watcher = asyncio.ensure_future(_wait_disconnect(receive))
+    try:
+        done, _ = await asyncio.wait({work, watcher}, return_when=asyncio.FIRST_COMPLETED)
+        if work in done:
+            return work.result()
+        work.cancel()
+        raise ClientGone()
+    finally:
+        watcher.cancel()
+
+
+async def _wait_disconnect(receive):
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+def build(flask_app=None):
+    return SpoonacularRoutes(flask_app or create_app())
+
+
+app = build()
@@ -1,12 +1,25 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import (JWTManager, create_access_token, jwt_required, get_jwt_identity)
+from flask import Blueprint, request
+from flask_jwt_extended import JWTManager, jwt_required
 from .models import db, User
-from datetime import timedelta
+from . import identity, tokens
+from . import serializers
+from .serializers import json_response
+from .routing import pin_user, read_only
 
 auth_bp = Blueprint("auth", __name__)
 jwt = JWTManager()
 
 
+@jwt.user_lookup_loader
+def _load_user(_jwt_header, jwt_data):
+    return identity.load_user(int(jwt_data["sub"]))
+
+
+@jwt.token_in_blocklist_loader
+def _token_revoked(_jwt_header, jwt_data):
+    return tokens.is_revoked(jwt_data)
+
+
 @auth_bp.post("/signup")
 def signup():
     data = request.get_json() or {}
@@ -14,18 +27,20 @@ def signup():
     password = data.get("password") or ""
 
     if not email or not password:
-        return jsonify({"error": "Email and password are required."}), 400
+        return json_response({"error": "Email and password are required."}), 400
     
     if User.query.filter_by(email=email).first():
-        return jsonify({"error": "Email already registered"}), 409
+        return json_response({"error": "Email already registered"}), 409
     
     user = User(email=email)
     user.set_password(password)
     db.session.add(user)
+    db.session.flush()
+    pair = tokens.issue(user)
     db.session.commit()
+    pin_user(user.id)
 
-    token = create_access_token(identity=str(user.id), expires_delta=timedelta(days=7))
-    return jsonify({"user": user.to_dict(), "token": token}), 201
+    return json_response({"user": serializers.user(user), **pair}), 201
 
 
 @auth_bp.post("/login")
@@ -36,17 +51,45 @@ def login():
 
     user = User.query.filter_by(email=email).first()
     if not user or not user.check_password(password):
-        return jsonify({"error": "invalid email or password"}), 401
-    
-    token = create_access_token(identity=str(user.id), expires_delta=timedelta(days=7))
-    return jsonify({"user": user.to_dict(), "token": token}), 200
+        return json_response({"error": "invalid email or password"}), 401
+
+    # transparently move old hashes to the current PASSWORD_HASH_METHOD
+    if user.password_needs_rehash():
+        user.set_password(password)
+    pair = tokens.issue(user)
+    db.session.commit()
+    pin_user(user.id)
+
+    return json_response({"user": serializers.user(user), **pair}), 200
+
+
+@auth_bp.post("/refresh")
+def refresh():
+    """Trade a refresh token for a new access/refresh pair; the old refresh token stops working."""
+    data = request.get_json(silent=True) or {}
+    raw = data.get("refresh_token")
+    pair = tokens.rotate(raw) if isinstance(raw, str) and raw else None
+    if pair is None:
+        return json_response({"error": "invalid or expired refresh token"}), 401
+    return json_response(pair), 200
+
+
+@auth_bp.post("/logout")
+def logout():
+    """Revoke this session's refresh token and the access tokens issued with it. Always 204."""
+    data = request.get_json(silent=True) or {}
+    raw = data.get("refresh_token")
+    if isinstance(raw, str) and raw:
+        tokens.revoke_refresh_token(raw)
+        db.session.commit()
+    return "", 204
 
 
 @auth_bp.get("/me")
 @jwt_required()
+@read_only
 def me():
-    user_id = int(get_jwt_identity())
-    user = User.query.get(user_id)
+    user = identity.get_current_user()
     if not user:
-        return jsonify({"error": "User not found"}), 404
-    return jsonify(user.to_dict()), 200
\ No newline at end of file
+        return json_response({"error": "User not found"}), 404
+    return json_response(serializers.user(user)), 200
\ No newline at end of file
@@ -1,13 +1,21 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from .models import db, Cart, CartItem, Product, CartStatus
+from sqlalchemy.orm import joinedload
+from .models import db, Cart, CartItem, CartStatus
+from . import pricetable, serializers
+from .serializers import json_response
 
 
 cart_bp = Blueprint("cart", __name__)
 
 
 def _get_or_create_draft_cart(user_id: int) -> Cart:
-    cart = Cart.query.filter_by(user_id=user_id, status=CartStatus.draft).first()
+    cart = (
+        Cart.query
+        .options(joinedload(Cart.items).joinedload(CartItem.product))
+        .filter_by(user_id=user_id, status=CartStatus.draft)
+        .first()
+    )
     if not cart:
         cart = Cart(user_id=user_id, status=CartStatus.draft)
         db.session.add(cart)
@@ -20,7 +28,7 @@ def _get_or_create_draft_cart(user_id: int) -> Cart:
 def get_cart():
     user_id = int(get_jwt_identity())
     cart = _get_or_create_draft_cart(user_id)
-    return jsonify(cart.to_dict()), 200
+    return json_response(serializers.cart(cart)), 200
 
 
 @cart_bp.post("/items")
@@ -37,11 +45,11 @@ def add_or_update_item():
     qty = int(data.get("qty", 1))
 
     if not product_id:
-        return jsonify({"error": "product_id is required"}), 400
+        return json_response({"error": "product_id is required"}), 400
 
-    product = Product.query.get(product_id)
-    if not product or not product.is_active:
-        return jsonify({"error": "product not found or inactive"}), 404
+    price = pricetable.lookup(product_id)
+    if price is None or not price[1]:
+        return json_response({"error": "product not found or inactive"}), 404
 
     cart = _get_or_create_draft_cart(user_id)
     item = next((i for i in cart.items if i.product_id == product_id), None)
@@ -50,7 +58,7 @@ def add_or_update_item():
         if item:
             db.session.delete(item)
             db.session.commit()
-        return jsonify(cart.to_dict()), 200
+        return json_response(serializers.cart(cart)), 200
 
     if item:
         item.qty = qty
@@ -61,7 +69,7 @@ def add_or_update_item():
     db.session.commit()
     # refresh totals/relationships
     db.session.refresh(cart)
-    return jsonify(cart.to_dict()), 200
+    return json_response(serializers.cart(cart)), 200
 
 
 @cart_bp.delete("/items/<int:product_id>")
@@ -71,7 +79,7 @@ def remove_item(product_id: int):
     cart = _get_or_create_draft_cart(user_id)
     item = next((i for i in cart.items if i.product_id == product_id), None)
     if not item:
-        return jsonify({"error": "item not in cart"}), 404
+        return json_response({"error": "item not in cart"}), 404
     db.session.delete(item)
     db.session.commit()
-    return jsonify(cart.to_dict()), 200
+    return json_response(serializers.cart(cart)), 200
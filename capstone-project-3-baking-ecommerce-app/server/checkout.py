@@ -1,10 +1,13 @@
 from __future__ import annotations
 
 from datetime import datetime, date, time
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from sqlalchemy import and_
-from .models import (db, Cart, CartItem, CartStatus, Order, OrderItem, OrderStatus, FulfillmentMethod, Product)
+from .models import (db, Cart, CartItem, CartStatus, Order, OrderItem, OrderStatus, FulfillmentMethod)
+from . import rollups, events, pricetable
+from . import serializers
+from .serializers import json_response
 
 checkout_bp = Blueprint("checkout", __name__)
 
@@ -58,38 +61,45 @@ def checkout():
 
     fd_str = payload.get("fulfillment_date")
     if not fd_str:
-        return jsonify({"error": "fulfillment_date is required (YYYY-MM-DD)"}), 400
+        return json_response({"error": "fulfillment_date is required (YYYY-MM-DD)"}), 400
 
     try:
         fdate = _parse_date(fd_str)
     except ValueError:
-        return jsonify({"error": "fulfillment_date must be YYYY-MM-DD"}), 400
+        return json_response({"error": "fulfillment_date must be YYYY-MM-DD"}), 400
 
     try:
         rtime = _parse_time(payload.get("requested_time"))
     except ValueError:
-        return jsonify({"error": "requested_time must be HH:MM (24h)"}), 400
+        return json_response({"error": "requested_time must be HH:MM (24h)"}), 400
 
     try:
         method = FulfillmentMethod(payload.get("fulfillment_method", "pickup"))
     except ValueError:
-        return jsonify({"error": "fulfillment_method must be 'pickup' or 'delivery'"}), 400
+        return json_response({"error": "fulfillment_method must be 'pickup' or 'delivery'"}), 400
 
 
 
     if method == FulfillmentMethod.delivery:
         ok, msg = _validate_delivery_payload(payload)
         if not ok:
-            return jsonify({"error": msg}), 400
+            return json_response({"error": msg}), 400
 
     # --- ensure a draft cart with items ---
     cart = _get_draft_cart(user_id)
     if not cart or not cart.items:
-        return jsonify({"error": "Your cart is empty"}), 400
+        return json_response({"error": "Your cart is empty"}), 400
 
     # --- enforce one active order per day ---
     if _active_order_exists_for(fdate):
-        return jsonify({"error": "That date is already booked"}), 409
+        return json_response({"error": "That date is already booked"}), 409
+
+    # --- current price/active flag for every line, from the shared price table ---
+    prices = pricetable.lookup_many(ci.product_id for ci in cart.items)
+    for ci in cart.items:
+        price = prices.get(ci.product_id)
+        if price is None or not price[1]:
+            return json_response({"error": f"Product {ci.product_id} not found or inactive"}), 400
 
     # --- create order + order items with price_snapshot ---
     order = Order(
@@ -112,22 +122,23 @@ def checkout():
     db.session.flush()  
 
 
-    total = 0
+    total_cents = 0
+    lines = []
     for ci in cart.items:
-        product: Product = Product.query.get(ci.product_id)
-        if not product or not product.is_active:
-            return jsonify({"error": f"Product {ci.product_id} not found or inactive"}), 400
-
+        price_cents = prices[ci.product_id][0]
         oi = OrderItem(
             order_id=order.id,
             product_id=ci.product_id,
             qty=ci.qty,
-            price_snapshot=product.price,  
+            price_snapshot_cents=price_cents,
         )
-        total += ci.qty * float(product.price)
+        total_cents += ci.qty * price_cents
+        lines.append((ci.product_id, ci.qty, price_cents))
         db.session.add(oi)
 
-    order.total = total
+    order.total_cents = total_cents
+    rollups.apply_order(order.created_at.date(), lines)
+    events.record_order_event(events.ORDER_CREATED, order.id, events.order_summary(order))
 
     # mark cart checked_out
     cart.status = CartStatus.checked_out
@@ -138,4 +149,4 @@ def checkout():
     db.session.add(new_cart)
     db.session.commit()
 
-    return jsonify(order.to_dict()), 201
+    return json_response(serializers.order(order)), 201
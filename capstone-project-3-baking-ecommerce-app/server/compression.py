@@ -0,0 +1,194 @@
+"""
+Response compression.
+
+Responses are compressed in an `after_request` hook. The encoding follows
+the client's Accept-Encoding: brotli when the optional `brotli` package is
+installed and the client accepts it, otherwise gzip. A response is left
+alone when:
+  - its body is smaller than COMPRESS_MIN_SIZE,
+  - it is a text/event-stream (the SSE feed must reach the client event by
+    event, unbuffered),
+  - it is already encoded, or it is a partial or passthrough response.
+
+Other streamed (generator) responses are compressed chunk by chunk, and each
+chunk is flushed, so the client still receives data as it is produced.
+
+Views marked `@cache_compressed` return the same bytes to every caller.
+Their compressed bodies are kept in a per-process, per-app LRU keyed by the
+hash of the uncompressed body, up to COMPRESS_CACHE_BYTES. A repeat request still
+builds its JSON, but hashing it costs far less than compressing it again:
+
+    @products_bp.get("/")
+    @read_only
+    @cache_compressed
+    def list_local_products(): ...
+"""
+from __future__ import annotations
+
+import gzip
+import hashlib
+import threading
+import zlib
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, g, request
+
+try:
+    import brotli
+except ImportError:  # optional; gzip only
+    brotli = None
+
+_CACHEABLE_KEY = "_compress_cacheable"
+
+
+def cache_compressed(fn):
+    """Mark a view whose output is shared by all callers, so its compressed body is worth keeping."""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        setattr(g, _CACHEABLE_KEY, True)
+        return fn(*args, **kwargs)
+    return wrapper
+
+
+class CompressedCache:
+    """LRU of (body digest, encoding) -> compressed bytes, bounded by total size."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._items: OrderedDict[tuple, bytes] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, key: tuple) -> bytes | None:
+        with self._lock:
+            value = self._items.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: tuple, value: bytes) -> None:
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._size -= len(old)
+            self._items[key] = value
+            self._size += len(value)
+            while self._size > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self._size -= len(evicted)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class AppCompression:
+    """One app's compression settings and compressed-body cache, kept in app.extensions["compression"]."""
+
+    def __init__(self, cfg):
+        self.enabled = cfg["COMPRESS_ENABLED"]
+        self.min_size = cfg["COMPRESS_MIN_SIZE"]
+        self.gzip_level = cfg["COMPRESS_GZIP_LEVEL"]
+        self.br_quality = cfg["COMPRESS_BR_QUALITY"]
+        self.mimetypes = frozenset(cfg["COMPRESS_MIMETYPES"])
+        self.encodings = ["br", "gzip"] if brotli is not None else ["gzip"]
+        self.cache = CompressedCache(cfg["COMPRESS_CACHE_BYTES"])
+
+    # ---- encoders ----
+
+    def compress(self, data: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(data, quality=self.br_quality)
+        return gzip.compress(data, compresslevel=self.gzip_level, mtime=0)
+
+    def stream(self, chunks, encoding: str, charset: str):
+        if encoding == "br":
+            comp = brotli.Compressor(quality=self.br_quality)
+            step, finish = (lambda b: comp.process(b) + comp.flush()), comp.finish
+        else:
+            comp = zlib.compressobj(self.gzip_level, zlib.DEFLATED, 31)  # 31 = gzip container
+            step, finish = (lambda b: comp.compress(b) + comp.flush(zlib.Z_SYNC_FLUSH)), comp.flush
+        try:
+            for chunk in chunks:
+                out = step(chunk.encode(charset) if isinstance(chunk, str) else chunk)
+                if out:
+                    yield out
+            yield finish()
+        finally:
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                close()
+
+    def wanted(self, response) -> bool:
+        return (
+            200 <= response.status_code < 300
+            and response.status_code not in (204, 206)
+            and response.mimetype in self.mimetypes
+            and "Content-Encoding" not in response.headers
+            and "Content-Range" not in response.headers
+            and not response.direct_passthrough
+        )
+
+
+class Compression:
+    """
+    The Flask extension. It holds no state of its own: each app's settings and cache
+    live in its extensions, so a second app in the process can't change the first one's.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app) -> None:
+        cfg = app.config
+        cfg.setdefault("COMPRESS_ENABLED", True)
+        cfg.setdefault("COMPRESS_MIN_SIZE", 1024)
+        cfg.setdefault("COMPRESS_GZIP_LEVEL", 6)
+        cfg.setdefault("COMPRESS_BR_QUALITY", 5)
+        cfg.setdefault("COMPRESS_MIMETYPES", ["application/json", "text/html", "text/plain", "text/css",
+                                              "application/javascript", "image/svg+xml"])
+        cfg.setdefault("COMPRESS_CACHE_BYTES", 32 * 1024 * 1024)
+        state = AppCompression(cfg)
+        app.extensions["compression"] = state
+        if state.enabled:
+            app.after_request(self._compress)
+
+    def _compress(self, response):
+        state = current_app.extensions["compression"]
+        if response.mimetype == "text/event-stream" or not state.wanted(response):
+            return response
+        response.vary.add("Accept-Encoding")
+        encoding = request.accept_encodings.best_match(state.encodings)
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            response.response = state.stream(response.response, encoding, "utf-8")
+            response.headers.pop("Content-Length", None)
+            response.headers["Content-Encoding"] = encoding
+            return response
+
+        data = response.get_data()
+        if len(data) < state.min_size:
+            return response
+        if g.get(_CACHEABLE_KEY):
+            key = (hashlib.blake2b(data, digest_size=16).digest(), encoding)
+            body = state.cache.get(key)
+            if body is None:
+                body = state.compress(data, encoding)
+                state.cache.put(key, body)
+        else:
+            body = state.compress(data, encoding)
+        response.set_data(body)
+        response.headers["Content-Encoding"] = encoding
+        return response
+
+
+compression = Compression()
@@ -1,10 +1,154 @@
 import os
-from dotenv import load_dotenv
 
-load_dotenv()
+# Values are read from the environment when this module is imported. server/wsgi.py
+# loads the .env files first; so does the flask CLI for the project's .env.
+
+# Named database engine profiles. DB_ENGINE_PROFILE picks one explicitly; otherwise
+# it follows the database URL. "pragmas" are applied to every new SQLite connection.
+ENGINE_PROFILES = {
+    "sqlite": {
+        "options": {"connect_args": {"timeout": 30}},
+        "pragmas": {
+            "journal_mode": "WAL",          # readers no longer block on a cart commit
+            "synchronous": "NORMAL",        # safe with WAL; fsync at checkpoints only
+            "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000)),
+            "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", 256 * 1024 * 1024)),
+            "cache_size": -int(os.getenv("SQLITE_CACHE_KIB", 64 * 1024)),  # negative = KiB
+            "temp_store": "MEMORY",
+        },
+    },
+    "postgres": {
+        "options": {
+            "pool_size": int(os.getenv("DB_POOL_SIZE", 10)),
+            "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", 10)),
+            "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", 10)),
+            "pool_pre_ping": True,
+            "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", 1800)),
+        },
+    },
+    # SQLAlchemy defaults, e.g. for comparing against in benchmarks
+    "default": {"options": {}},
+}
+
+
+def engine_profile_for(uri: str) -> str:
+    explicit = os.getenv("DB_ENGINE_PROFILE")
+    if explicit:
+        return explicit
+    if uri.startswith("sqlite"):
+        return "sqlite"
+    if uri.startswith(("postgres", "postgresql")):
+        return "postgres"
+    return "default"
+
 
 class Config:
     SQLALCHEMY_DATABASE_URI = os.getenv("SQLALCHEMY_DATABASE_URI", "sqlite:///app.db")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # SQLALCHEMY_ENGINE_OPTIONS / SQLITE_PRAGMAS are filled from the profile in create_app()
+    DB_ENGINE_PROFILE = None
+    # optional read replica for @read_only views (see routing.py); writers stay on the primary this long
+    SQLALCHEMY_REPLICA_URI = os.getenv("SQLALCHEMY_REPLICA_URI")
+    REPLICA_PIN_SECONDS = float(os.getenv("REPLICA_PIN_SECONDS", 5))
+    # set up Flask-Migrate (needed by `flask db ...`); gunicorn.conf.py turns it off for web workers
+    DB_MIGRATIONS = os.getenv("DB_MIGRATIONS", "1") == "1"
     SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret")
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "dev-jwt")
+    CORS_ORIGINS = os.getenv("CORS_ORIGINS", "http://localhost:5173,http://127.0.0.1:5173").split(",")
+
+    # per-process cache behind the JWT user lookup (see identity.py)
+    IDENTITY_CACHE_TTL = float(os.getenv("IDENTITY_CACHE_TTL", 30))
+    IDENTITY_CACHE_SIZE = int(os.getenv("IDENTITY_CACHE_SIZE", 10000))
+
+    # access/refresh token lifetimes and the per-process revocation filter (see tokens.py)
+    ACCESS_TOKEN_TTL_MINUTES = float(os.getenv("ACCESS_TOKEN_TTL_MINUTES", 15))
+    REFRESH_TOKEN_TTL_DAYS = float(os.getenv("REFRESH_TOKEN_TTL_DAYS", 30))
+    TOKEN_BLOCKLIST_CAPACITY = int(os.getenv("TOKEN_BLOCKLIST_CAPACITY", 100000))
+    TOKEN_BLOCKLIST_ERROR_RATE = float(os.getenv("TOKEN_BLOCKLIST_ERROR_RATE", 0.001))
+    TOKEN_BLOCKLIST_SYNC = float(os.getenv("TOKEN_BLOCKLIST_SYNC", 5))
+    TOKEN_BLOCKLIST_REBUILD = float(os.getenv("TOKEN_BLOCKLIST_REBUILD", 900))
+
+    # password hashing (see hashing.py); changing the method rehashes users on their next login
+    PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+    PASSWORD_SALT_LENGTH = int(os.getenv("PASSWORD_SALT_LENGTH", 16))
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 2))
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", 32))
+    PASSWORD_HASH_TIMEOUT = float(os.getenv("PASSWORD_HASH_TIMEOUT", 10))
+    PASSWORD_HASH_MP_CONTEXT = os.getenv("PASSWORD_HASH_MP_CONTEXT", "spawn")
+
+    # rate limits (see ratelimit.py): endpoint or blueprint -> ["N/period", ...], per IP and per user
+    RATELIMIT_ENABLED = os.getenv("RATELIMIT_ENABLED", "1") == "1"
+    RATELIMIT_STORAGE_URI = os.getenv("RATELIMIT_STORAGE_URI", "memory://")
+    RATELIMIT_EVICT_INTERVAL = 60
+    RATELIMIT_RULES = {
+        "auth.login": ["10/minute", "100/hour"],
+        "auth.signup": ["5/minute"],
+        "auth.refresh": ["30/minute"],
+        "checkout": ["20/minute"],
+        "products.list_spoonacular_desserts": ["30/minute"],
+        "products.get_spoonacular_dessert": ["60/minute"],
+        "products.ingest_spoonacular": ["10/minute"],
+    }
+
+    # Spoonacular proxy; the concurrency cap and queue timeout apply to the async routes in asgi.py
+    SPOONACULAR_TIMEOUT = float(os.getenv("SPOONACULAR_TIMEOUT", 10))
+    SPOONACULAR_MAX_CONCURRENCY = int(os.getenv("SPOONACULAR_MAX_CONCURRENCY", 50))
+    SPOONACULAR_QUEUE_TIMEOUT = float(os.getenv("SPOONACULAR_QUEUE_TIMEOUT", 2))
+    # threads running the sync Flask views under ASGI (uvicorn server.asgi:app)
+    ASGI_WSGI_THREADS = int(os.getenv("ASGI_WSGI_THREADS", 10))
+
+    # response compression (see compression.py); brotli is used when the package is installed
+    COMPRESS_ENABLED = os.getenv("COMPRESS_ENABLED", "1") == "1"
+    COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", 1024))
+    COMPRESS_GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", 6))
+    COMPRESS_BR_QUALITY = int(os.getenv("COMPRESS_BR_QUALITY", 5))
+    COMPRESS_CACHE_BYTES = int(os.getenv("COMPRESS_CACHE_MB", 32)) * 1024 * 1024
+
+    # per-request SQL counts/timings (see instrumentation.py); 0 disables a slow log
+    SQL_INSTRUMENTATION = os.getenv("SQL_INSTRUMENTATION", "1") == "1"
+    SERVER_TIMING = os.getenv("SERVER_TIMING", "1") == "1"
+    SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", 500))
+    SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 100))
+
+    # GET /metrics (see metrics.py); set METRICS_MULTIPROC_DIR for pre-fork servers.
+    # Not routed unless METRICS_TOKEN (scrape with "Authorization: Bearer <token>") or
+    # METRICS_PUBLIC=1 (only where /metrics can't be reached from outside) is set.
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+    METRICS_PUBLIC = os.getenv("METRICS_PUBLIC", "0") == "1"
+    METRICS_MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR")
+    METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", 5))
+
+    # request profiler (see profiling.py); nothing is installed unless enabled
+    PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "0") == "1"
+    PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", 0))
+    PROFILING_SECRET = os.getenv("PROFILING_SECRET")  # signs X-Profile headers; unset = headers ignored
+    PROFILING_DIR = os.getenv("PROFILING_DIR", "profiles")
+    PROFILING_MAX_FILES = int(os.getenv("PROFILING_MAX_FILES", 200))
+    PROFILING_AGGREGATE_EVERY = int(os.getenv("PROFILING_AGGREGATE_EVERY", 20))
+
+    # shared price/active table for cart and checkout (see pricetable.py): PRICE_TABLE_PATH
+    # (default instance/prices) plus a hash of the database URI, so each database gets its own
+    PRICE_TABLE_ENABLED = os.getenv("PRICE_TABLE_ENABLED", "1") == "1"
+    PRICE_TABLE_PATH = os.getenv("PRICE_TABLE_PATH")
+
+    # order archival (see archive.py): terminal orders fulfilled this long ago leave the hot tables
+    ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", 365))
+    ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", 500))
+    ARCHIVE_BATCH_PAUSE = float(os.getenv("ARCHIVE_BATCH_PAUSE", 0.05))  # seconds between batches
+
+    # admin order feed (GET /admin/orders/stream)
+    SSE_SUBSCRIBER_BUFFER = int(os.getenv("SSE_SUBSCRIBER_BUFFER", 100))
+    SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", 15))
+    SSE_REPLAY_LIMIT = int(os.getenv("SSE_REPLAY_LIMIT", 500))
+    SSE_RETRY_MS = 3000
+    # EventSource can't send an Authorization header: POST /admin/orders/stream-ticket trades the
+    # access token for a ticket that only opens the stream, and only for this long
+    SSE_TICKET_SECONDS = int(os.getenv("SSE_TICKET_SECONDS", 30))
+    # each open stream holds a worker thread (gunicorn.conf.py: GUNICORN_THREADS); past this many
+    # per process the stream answers 503 so the other threads stay free for ordinary requests
+    SSE_MAX_STREAMS = int(os.getenv("SSE_MAX_STREAMS", 4))
+    # a resume also replays events created this long before the client's last one (ids commit out of order)
+    SSE_REPLAY_OVERLAP_SECONDS = float(os.getenv("SSE_REPLAY_OVERLAP_SECONDS", 30))
+    # `flask events prune` deletes order events older than this
+    ORDER_EVENTS_RETENTION_DAYS = int(os.getenv("ORDER_EVENTS_RETENTION_DAYS", 30))
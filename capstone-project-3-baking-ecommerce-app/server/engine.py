@@ -0,0 +1,48 @@
+"""
+Applies the database engine profile from config.ENGINE_PROFILES.
+
+`configure(app)` runs before `db.init_app` and fills SQLALCHEMY_ENGINE_OPTIONS
+(pool sizing and so on) unless they were set explicitly. `install(app)` runs
+after it and registers a connect hook that sets the profile's SQLite PRAGMAs
+on every new DBAPI connection.
+"""
+from sqlalchemy import event
+
+from .config import ENGINE_PROFILES, engine_profile_for
+
+
+def configure(app) -> None:
+    cfg = app.config
+    name = cfg.get("DB_ENGINE_PROFILE") or engine_profile_for(cfg["SQLALCHEMY_DATABASE_URI"])
+    if name not in ENGINE_PROFILES:
+        raise ValueError(f"Unknown DB_ENGINE_PROFILE {name!r}; expected one of {sorted(ENGINE_PROFILES)}")
+    profile = ENGINE_PROFILES[name]
+    cfg["DB_ENGINE_PROFILE"] = name
+    if not cfg.get("SQLALCHEMY_ENGINE_OPTIONS"):
+        cfg["SQLALCHEMY_ENGINE_OPTIONS"] = dict(profile["options"])
+    cfg.setdefault("SQLITE_PRAGMAS", dict(profile.get("pragmas", {})))
+
+
+def _pragma_hook(pragmas: dict):
+    statements = [f"PRAGMA {key}={value}" for key, value in pragmas.items()]
+
+    def on_connect(dbapi_conn, _record):
+        cursor = dbapi_conn.cursor()
+        try:
+            for stmt in statements:
+                cursor.execute(stmt)
+        finally:
+            cursor.close()
+
+    return on_connect
+
+
+def install(app, db) -> None:
+    pragmas = app.config.get("SQLITE_PRAGMAS")
+    if not pragmas:
+        return
+    with app.app_context():
+        engines = [db.engine, *(e for k, e in db.engines.items() if k is not None)]
+    for engine in engines:
+        if engine.dialect.name == "sqlite":
+            event.listen(engine, "connect", _pragma_hook(pragmas))
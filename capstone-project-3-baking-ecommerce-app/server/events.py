@@ -0,0 +1,222 @@
+"""
+Order change feed for the admin dashboard (Server-Sent Events).
+
+Write paths call `record_order_event()` inside their transaction. The event row
+gets its id (the SSE sequence number) on flush and is handed to the in-process
+`broker` only after the transaction commits, so subscribers never see changes
+that were rolled back. Live delivery is memory-only; the `order_events` table
+is read once per connection, and only when a client resumes with Last-Event-ID.
+
+Ids are assigned at flush, not at commit, so they don't arrive in id order: on
+Postgres a slow transaction can commit event 10 after event 11. A stream
+therefore remembers which ids it has sent rather than the highest one. A
+resume also replays events created up to SSE_REPLAY_OVERLAP_SECONDS before
+the client's last event, so the client may see an event twice; the dashboard
+just refetches on each event, so that is harmless. A resume from an event
+that no longer exists gets a "reset".
+
+Old events are deleted with `flask events prune` (ORDER_EVENTS_RETENTION_DAYS).
+
+The broker is per process: with several workers, a dashboard only receives
+live events committed by the worker it is connected to, and catches up on the
+rest the next time it reconnects.
+"""
+from __future__ import annotations
+
+import json
+import threading
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import delete, event as sa_event, or_, select
+from sqlalchemy.orm import Session
+
+from .models import db, Order, OrderEvent
+from .money import to_dollars
+
+ORDER_CREATED = "order.created"
+ORDER_STATUS = "order.status"
+
+_PENDING_KEY = "pending_order_events"
+
+
+@dataclass(frozen=True)
+class Event:
+    id: int
+    kind: str
+    data: str  # JSON text
+
+    def encode(self) -> str:
+        return f"id: {self.id}\nevent: {self.kind}\ndata: {self.data}\n\n"
+
+
+class Subscription:
+    """Bounded buffer for one connected client. Overflow drops the subscriber instead of blocking publishers."""
+
+    def __init__(self, maxsize: int):
+        self._buf: deque[Event] = deque()
+        self._maxsize = maxsize
+        self._cond = threading.Condition()
+        self.overflowed = False
+
+    def put(self, ev: Event) -> None:
+        with self._cond:
+            if self.overflowed:
+                return
+            if len(self._buf) >= self._maxsize:
+                # the client is too slow; it will reconnect and replay from Last-Event-ID
+                self.overflowed = True
+                self._buf.clear()
+            else:
+                self._buf.append(ev)
+            self._cond.notify()
+
+    def get(self, timeout: float) -> Optional[Event]:
+        """Next event, or None on timeout / overflow (check `overflowed`)."""
+        with self._cond:
+            if not self._buf and not self.overflowed:
+                self._cond.wait(timeout)
+            if self._buf:
+                return self._buf.popleft()
+            return None
+
+
+class SentIds:
+    """Ids already sent on one stream, forgetting the oldest beyond `maxsize`."""
+
+    def __init__(self, maxsize: int):
+        self._order: deque[int] = deque()
+        self._ids: set[int] = set()
+        self._maxsize = maxsize
+
+    def add(self, event_id: int) -> None:
+        if event_id in self._ids:
+            return
+        self._ids.add(event_id)
+        self._order.append(event_id)
+        if len(self._order) > self._maxsize:
+            self._ids.discard(self._order.popleft())
+
+    def __contains__(self, event_id: int) -> bool:
+        return event_id in self._ids
+
+
+class Broker:
+    """In-process fan-out of committed order events to SSE subscribers."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: set[Subscription] = set()
+
+    def subscribe(self, maxsize: int, limit: Optional[int] = None) -> Optional[Subscription]:
+        """A new subscription, or None when `limit` subscribers are already connected."""
+        sub = Subscription(maxsize)
+        with self._lock:
+            if limit is not None and len(self._subscribers) >= limit:
+                return None
+            self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def publish(self, ev: Event) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for sub in subscribers:
+            sub.put(ev)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+
+broker = Broker()
+
+
+def order_summary(order: Order) -> dict:
+    """Column-only view of an order (no item/product loads)."""
+    return {
+        "id": order.id,
+        "user_id": order.user_id,
+        "status": order.status.value,
+        "total": to_dollars(order.total_cents),
+        "fulfillment_date": order.fulfillment_date.isoformat(),
+        "requested_time": order._format_time(),
+        "fulfillment_method": order.fulfillment_method.value,
+        "created_at": order.created_at.isoformat() + "Z" if order.created_at else None,
+    }
+
+
+def record_order_event(kind: str, order_id: int, data: dict) -> None:
+    """Queue an event in the current transaction; it is published after commit."""
+    db.session.add(OrderEvent(kind=kind, order_id=order_id, payload=json.dumps(data)))
+
+
+def events_since(last_id: int, limit: int, overlap_seconds: float) -> Optional[list[Event]]:
+    """
+    Events to replay for a client whose last event was `last_id`: everything after it, plus anything
+    created within `overlap_seconds` before it (those may have committed after it). None when
+    `last_id` is unknown (pruned, or from another database): the client must refetch.
+    """
+    last_created = db.session.execute(select(OrderEvent.created_at).where(OrderEvent.id == last_id)).scalar()
+    if last_created is None:
+        return None
+    since = last_created - timedelta(seconds=overlap_seconds)
+    rows = (
+        OrderEvent.query
+        .filter(or_(OrderEvent.id > last_id, OrderEvent.created_at >= since))
+        .order_by(OrderEvent.id)
+        .limit(limit)
+        .all()
+    )
+    return [Event(r.id, r.kind, r.payload) for r in rows]
+
+
+def prune(older_than: datetime) -> int:
+    """Delete events created before `older_than`. Caller commits."""
+    return db.session.execute(delete(OrderEvent).where(OrderEvent.created_at < older_than)).rowcount
+
+
+# ---------- session hooks: publish only what was committed ----------
+
+@sa_event.listens_for(Session, "after_flush")
+def _collect_flushed_events(session, flush_context):
+    flushed = [obj for obj in session.new if isinstance(obj, OrderEvent)]
+    if flushed:
+        session.info.setdefault(_PENDING_KEY, []).extend(
+            Event(obj.id, obj.kind, obj.payload) for obj in flushed
+        )
+
+
+@sa_event.listens_for(Session, "after_commit")
+def _publish_committed_events(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    for ev in pending or ():
+        broker.publish(ev)
+
+
+@sa_event.listens_for(Session, "after_rollback")
+def _drop_rolled_back_events(session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+# ---------- CLI ----------
+
+events_cli = AppGroup("events", help="Order change feed.")
+
+
+@events_cli.command("prune")
+@click.option("--older-than-days", type=int, default=None, help="Defaults to ORDER_EVENTS_RETENTION_DAYS.")
+def prune_command(older_than_days):
+    """Delete order events older than the retention window."""
+    days = current_app.config["ORDER_EVENTS_RETENTION_DAYS"] if older_than_days is None else older_than_days
+    deleted = prune(datetime.utcnow() - timedelta(days=days))
+    db.session.commit()
+    click.echo(f"Deleted {deleted} order event(s) older than {days} day(s).")
@@ -0,0 +1,156 @@
+"""
+Password hashing off the request threads.
+
+werkzeug's hashes are deliberately slow. Running them in a small process pool
+keeps a burst of logins from holding the GIL that every other request thread
+in the worker needs. The number of hashes in flight or queued is capped; past
+the cap `HashingBusy` is raised and turned into a 503 so callers fail fast
+instead of piling up.
+
+PASSWORD_HASH_WORKERS = 0 hashes inline on the calling thread (handy for
+scripts and single-threaded tools).
+
+Settings and the pool belong to the app (a `Hasher` in app.extensions), so a
+second app in the process, such as `flask db-advise`'s scratch app, can't
+change how the serving app hashes.
+"""
+from __future__ import annotations
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from typing import Optional
+
+from flask import current_app
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, generate_password_hash, check_password_hash
+
+from .serializers import json_response
+
+# read from app.config (defaults in config.py) by init_app
+SETTINGS = (
+    "PASSWORD_HASH_METHOD",
+    "PASSWORD_SALT_LENGTH",
+    "PASSWORD_HASH_WORKERS",
+    "PASSWORD_HASH_MAX_PENDING",
+    "PASSWORD_HASH_TIMEOUT",
+    "PASSWORD_HASH_MP_CONTEXT",
+)
+
+
+class HashingBusy(Exception):
+    """Too many password hashes already queued."""
+
+
+def _generate(password: str, method: str, salt_length: int) -> str:
+    return generate_password_hash(password, method=method, salt_length=salt_length)
+
+
+def _check(pwhash: str, password: str) -> bool:
+    return check_password_hash(pwhash, password)
+
+
+def normalize_method(method: str) -> str:
+    """
+    `method` with werkzeug's defaults filled in, as it is stored in a hash: "scrypt" becomes
+    "scrypt:32768:8:1" and "pbkdf2" becomes "pbkdf2:sha256:<DEFAULT_PBKDF2_ITERATIONS>".
+    """
+    name, *args = method.split(":")
+    if name == "scrypt":
+        if not args:
+            args = [2**15, 8, 1]
+        if len(args) != 3:
+            raise ValueError("'scrypt' takes 3 arguments.")
+        n, r, p = map(int, args)
+        return f"scrypt:{n}:{r}:{p}"
+    if name == "pbkdf2":
+        if len(args) > 2:
+            raise ValueError("'pbkdf2' takes 2 arguments.")
+        hash_name = args[0] if args else "sha256"
+        iterations = int(args[1]) if len(args) == 2 else DEFAULT_PBKDF2_ITERATIONS
+        return f"pbkdf2:{hash_name}:{iterations}"
+    raise ValueError(f"Invalid hash method '{method}'.")
+
+
+class Hasher:
+    """One app's hashing settings and process pool."""
+
+    def __init__(self, settings: dict):
+        self.settings = settings
+        self.method = normalize_method(settings["PASSWORD_HASH_METHOD"])  # as werkzeug writes it into hashes
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_pid: Optional[int] = None
+        self._slots: Optional[threading.BoundedSemaphore] = None
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None and self._executor_pid == os.getpid():
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor, self._executor_pid, self._slots = None, None, None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # created lazily, and again after a fork, so pre-fork servers don't share the master's pool
+        if self._executor is None or self._executor_pid != os.getpid():
+            with self._lock:
+                if self._executor is None or self._executor_pid != os.getpid():
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.settings["PASSWORD_HASH_WORKERS"],
+                        mp_context=multiprocessing.get_context(self.settings["PASSWORD_HASH_MP_CONTEXT"]),
+                    )
+                    self._executor_pid = os.getpid()
+                    self._slots = threading.BoundedSemaphore(self.settings["PASSWORD_HASH_MAX_PENDING"])
+        return self._executor
+
+    def run(self, fn, *args):
+        if self.settings["PASSWORD_HASH_WORKERS"] <= 0:
+            return fn(*args)
+
+        executor = self._get_executor()
+        slots = self._slots
+        if not slots.acquire(blocking=False):
+            raise HashingBusy()
+        try:
+            future = executor.submit(fn, *args)
+        except Exception:
+            slots.release()
+            raise
+        future.add_done_callback(lambda _f: slots.release())
+        try:
+            return future.result(timeout=self.settings["PASSWORD_HASH_TIMEOUT"])
+        except FutureTimeout:
+            future.cancel()
+            raise HashingBusy()
+
+
+def init_app(app) -> None:
+    app.extensions["hashing"] = Hasher({k: app.config[k] for k in SETTINGS})
+
+    @app.errorhandler(HashingBusy)
+    def _hashing_busy(_e):
+        return json_response({"error": "Server busy, please retry"}), 503, {"Retry-After": "1"}
+
+
+def _hasher() -> Hasher:
+    return current_app.extensions["hashing"]
+
+
+def hash_password(password: str) -> str:
+    hasher = _hasher()
+    return hasher.run(_generate, password, hasher.settings["PASSWORD_HASH_METHOD"], hasher.settings["PASSWORD_SALT_LENGTH"])
+
+
+def verify_password(pwhash: str, password: str) -> bool:
+    return _hasher().run(_check, pwhash, password)
+
+
+def needs_rehash(pwhash: str) -> bool:
+    """True when `pwhash` was made with other parameters than PASSWORD_HASH_METHOD and PASSWORD_SALT_LENGTH."""
+    hasher = _hasher()
+    method, _, rest = pwhash.partition("$")
+    salt = rest.partition("$")[0]
+    try:
+        method = normalize_method(method)
+    except ValueError:
+        return True
+    return method != hasher.method or len(salt) != hasher.settings["PASSWORD_SALT_LENGTH"]
@@ -0,0 +1,176 @@
+"""
+Who is making this request, without a users-table query on the hot paths.
+
+Access tokens carry the user's role and token version (`role`, `tv` claims).
+`is_admin()` rejects customer tokens from the claim alone; for admin tokens it
+confirms the claim against a cached `UserSnapshot`, so a demotion takes effect
+as soon as the cache entry is dropped. Changing `User.role` bumps
+`token_version` and evicts the cached snapshot when the transaction commits.
+Access tokens live ACCESS_TOKEN_TTL_MINUTES; tokens.py issues them together
+with a refresh token and handles revocation.
+
+The cache belongs to the app (one per app, so apps on different databases
+never share users) and lives in each process; other workers pick a change up
+within IDENTITY_CACHE_TTL seconds.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+
+from flask import current_app, has_app_context
+from flask_jwt_extended import create_access_token, get_jwt, get_jwt_identity
+from flask_jwt_extended import get_current_user as _jwt_current_user
+from sqlalchemy import event as sa_event
+from sqlalchemy.orm import Session, attributes
+
+from .models import db, User
+from .enums import UserRole
+
+_INVALIDATE_KEY = "identity_invalidate"
+
+
+@dataclass(frozen=True)
+class UserSnapshot:
+    id: int
+    email: str
+    role: UserRole
+    token_version: int
+    created_at: datetime
+
+    @classmethod
+    def from_user(cls, user: User) -> "UserSnapshot":
+        return cls(user.id, user.email, user.role, user.token_version or 0, user.created_at)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "email": self.email,
+            "role": self.role.value,
+            "created_at": self.created_at.isoformat() + "Z",
+        }
+
+
+class TTLCache:
+    """Small thread-safe dict with per-entry expiry and a size cap (oldest insert evicted first)."""
+
+    def __init__(self, ttl: float, maxsize: int):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: dict = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires < time.monotonic():
+            with self._lock:
+                self._data.pop(key, None)
+            return None
+        return value
+
+    def set(self, key, value) -> None:
+        with self._lock:
+            if key not in self._data and len(self._data) >= self.maxsize:
+                self._data.pop(next(iter(self._data)), None)
+            self._data[key] = (time.monotonic() + self.ttl, value)
+
+    def pop(self, key) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+def init_app(app) -> None:
+    cfg = app.config
+    cfg.setdefault("IDENTITY_CACHE_TTL", 30)
+    cfg.setdefault("IDENTITY_CACHE_SIZE", 10000)
+    app.extensions["identity_cache"] = TTLCache(cfg["IDENTITY_CACHE_TTL"], cfg["IDENTITY_CACHE_SIZE"])
+
+
+def _cache() -> Optional[TTLCache]:
+    return current_app.extensions.get("identity_cache") if has_app_context() else None
+
+
+def invalidate(user_id: int) -> None:
+    cache = _cache()
+    if cache is not None:
+        cache.pop(user_id)
+
+
+def load_user(user_id: int) -> Optional[UserSnapshot]:
+    """Snapshot for `user_id` from the app's TTL cache, falling back to one users-table query."""
+    cache = current_app.extensions["identity_cache"]
+    snap = cache.get(user_id)
+    if snap is None:
+        user = db.session.get(User, user_id)
+        if not user:
+            return None
+        snap = UserSnapshot.from_user(user)
+        cache.set(user_id, snap)
+    return snap
+
+
+def access_token_ttl() -> timedelta:
+    return timedelta(minutes=current_app.config["ACCESS_TOKEN_TTL_MINUTES"])
+
+
+def issue_access_token(user: User, jti: Optional[str] = None) -> str:
+    """A bare access token; sessions get theirs from tokens.issue() so they can be refreshed and revoked."""
+    claims = {"role": user.role.value, "tv": user.token_version or 0}
+    if jti:
+        claims["jti"] = jti
+    return create_access_token(identity=str(user.id), additional_claims=claims, expires_delta=access_token_ttl())
+
+
+def current_user_id() -> int:
+    return int(get_jwt_identity())
+
+
+def get_current_user() -> Optional[UserSnapshot]:
+    """Request-scoped: flask_jwt_extended memoizes the user_lookup_loader result per request."""
+    return _jwt_current_user()
+
+
+def is_admin() -> bool:
+    claims = get_jwt()
+    role = claims.get("role")
+    if role is not None and role != UserRole.admin.value:
+        return False
+
+    user = get_current_user()
+    if not user or user.role != UserRole.admin:
+        return False
+    # tokens issued before role claims existed carry no version
+    return "tv" not in claims or claims["tv"] == user.token_version
+
+
+# ---------- role changes: bump token_version, evict after commit ----------
+
+@sa_event.listens_for(User.role, "set", active_history=True)
+def _on_role_change(target: User, value, oldvalue, initiator):
+    if oldvalue in (attributes.NO_VALUE, attributes.NEVER_SET) or value == oldvalue or target.id is None:
+        return
+    target.token_version = (target.token_version or 0) + 1
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault(_INVALIDATE_KEY, set()).add(target.id)
+
+
+@sa_event.listens_for(Session, "after_commit")
+def _invalidate_committed(session):
+    for user_id in session.info.pop(_INVALIDATE_KEY, ()):
+        invalidate(user_id)
+
+
+@sa_event.listens_for(Session, "after_rollback")
+def _drop_pending_invalidations(session):
+    session.info.pop(_INVALIDATE_KEY, None)
@@ -0,0 +1,147 @@
+"""
+Per-request SQL instrumentation.
+
+Every statement run through any engine (primary, replica, ...) is counted and
+timed against the current request. Responses get a `Server-Timing` header that
+browser dev tools show next to the request:
+
+    Server-Timing: db;dur=3.1;desc="7 queries", app;dur=12.4
+
+Requests slower than SLOW_REQUEST_MS and statements slower than SLOW_QUERY_MS
+are logged through `app.logger` at WARNING.
+
+In tests, `assert_max_queries` catches N+1 regressions:
+
+    with assert_max_queries(4):
+        client.get("/orders/", headers=auth)
+"""
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event as sa_event
+from sqlalchemy.engine import Engine
+
+_STATS_KEY = "_sql_stats"
+_local = threading.local()
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    seconds: float = 0.0
+    statements: list = field(default_factory=list)  # only filled while a capture is active
+
+    def add(self, statement: str, seconds: float, keep: bool) -> None:
+        self.count += 1
+        self.seconds += seconds
+        if keep:
+            self.statements.append(statement)
+
+
+def _captures() -> list:
+    caps = getattr(_local, "captures", None)
+    if caps is None:
+        caps = _local.captures = []
+    return caps
+
+
+@sa_event.listens_for(Engine, "before_cursor_execute")
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("_query_start", []).append(time.perf_counter())
+
+
+@sa_event.listens_for(Engine, "after_cursor_execute")
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("_query_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+
+    for cap in _captures():
+        cap.add(statement, elapsed, keep=True)
+
+    if not has_request_context():
+        return
+    stats = g.get(_STATS_KEY)
+    if stats is None:
+        return
+    stats.add(statement, elapsed, keep=False)
+    slow_ms = current_app.config["SLOW_QUERY_MS"]
+    if slow_ms and elapsed * 1000 >= slow_ms:
+        current_app.logger.warning(
+            "slow query %.1fms on %s %s: %s", elapsed * 1000, request.method, request.path, " ".join(statement.split())[:500],
+        )
+
+
+class SQLInstrumentation:
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app) -> None:
+        app.config.setdefault("SQL_INSTRUMENTATION", True)
+        app.config.setdefault("SERVER_TIMING", True)
+        app.config.setdefault("SLOW_REQUEST_MS", 500)
+        app.config.setdefault("SLOW_QUERY_MS", 100)
+        app.extensions["sql_instrumentation"] = self
+        if not app.config["SQL_INSTRUMENTATION"]:
+            return
+        app.before_request(self._start)
+        app.after_request(self._finish)
+
+    def _start(self):
+        g._request_start = time.perf_counter()
+        setattr(g, _STATS_KEY, QueryStats())
+
+    def _finish(self, response):
+        stats = g.get(_STATS_KEY)
+        if stats is None:
+            return response
+        total_ms = (time.perf_counter() - g._request_start) * 1000
+        db_ms = stats.seconds * 1000
+        cfg = current_app.config
+        if cfg["SERVER_TIMING"]:
+            response.headers.add(
+                "Server-Timing", f'db;dur={db_ms:.1f};desc="{stats.count} queries", app;dur={total_ms:.1f}'
+            )
+        if cfg["SLOW_REQUEST_MS"] and total_ms >= cfg["SLOW_REQUEST_MS"]:
+            current_app.logger.warning(
+                "slow request %.1fms (%d queries, %.1fms db): %s %s",
+                total_ms, stats.count, db_ms, request.method, request.full_path.rstrip("?"),
+            )
+        return response
+
+
+def request_stats() -> QueryStats | None:
+    """Stats for the current request so far (None outside a request or when disabled)."""
+    return g.get(_STATS_KEY) if has_request_context() else None
+
+
+@contextmanager
+def count_queries():
+    """Collect every statement run on this thread inside the block."""
+    stats = QueryStats()
+    caps = _captures()
+    caps.append(stats)
+    try:
+        yield stats
+    finally:
+        caps.remove(stats)
+
+
+@contextmanager
+def assert_max_queries(limit: int):
+    """Fail if the block runs more than `limit` statements (test client requests run on the same thread)."""
+    with count_queries() as stats:
+        yield stats
+    if stats.count > limit:
+        listing = "\n".join(f"  {i}. {' '.join(s.split())[:200]}" for i, s in enumerate(stats.statements, 1))
+        raise AssertionError(f"expected at most {limit} queries, ran {stats.count}:\n{listing}")
+
+
+instrumentation = SQLInstrumentation()
@@ -0,0 +1,313 @@
+"""
+Prometheus metrics at GET /metrics.
+
+Exposed series:
+  http_requests_total{blueprint,endpoint,method,status}
+  http_request_duration_seconds{blueprint,endpoint,method}      histogram
+  db_pool_checkout_seconds{bind}                                 histogram
+  upstream_request_duration_seconds{service,operation}           histogram
+  upstream_failures_total{service,operation,reason}
+  http_exceptions_total{blueprint,endpoint,exception}            unhandled errors
+
+Updates never take a lock: each thread writes into its own shard (a plain
+dict), and shards are only summed when /metrics is scraped.
+
+Pre-fork servers (gunicorn -w N): set METRICS_MULTIPROC_DIR to a directory
+shared by the workers. Each worker then flushes a snapshot there every
+METRICS_FLUSH_SECONDS, and /metrics merges every worker's file, so whichever
+worker answers the scrape reports the whole server. Clear the directory when
+the server (re)starts.
+
+The endpoint exposes traffic and error rates, so it isn't public by default.
+Set METRICS_TOKEN and scrape with `Authorization: Bearer <token>`
+(Prometheus: `authorization: {credentials: ...}`). METRICS_PUBLIC=1 serves it
+unauthenticated, for a deployment where /metrics is only reachable from an
+internal network. With neither set, metrics are still collected but
+/metrics is not routed.
+"""
+from __future__ import annotations
+
+import hmac
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Optional
+
+from flask import current_app, g, got_request_exception, request
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+POOL_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+COUNTER, HISTOGRAM = "counter", "histogram"
+
+
+class Registry:
+    def __init__(self):
+        self._meta: dict[str, tuple[str, str, tuple, Optional[tuple]]] = {}
+        self._shards: list[tuple[threading.Thread, dict]] = []
+        self._retired: dict = {}  # totals from threads that have exited
+        self._shards_lock = threading.Lock()  # only taken when a thread creates its shard
+        self._local = threading.local()
+
+    def counter(self, name: str, help_: str, labels: tuple) -> "Counter":
+        self._meta[name] = (COUNTER, help_, labels, None)
+        return Counter(self, name)
+
+    def histogram(self, name: str, help_: str, labels: tuple, buckets=LATENCY_BUCKETS) -> "Histogram":
+        self._meta[name] = (HISTOGRAM, help_, labels, tuple(buckets))
+        return Histogram(self, name, tuple(buckets))
+
+    def _shard(self) -> dict:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._shards_lock:
+                self._shards.append((threading.current_thread(), shard))
+        return shard
+
+    def snapshot(self) -> dict:
+        """{name: {label_values: value}} summed over threads; histogram values are [bucket counts..., sum, count]."""
+        with self._shards_lock:
+            # fold shards of finished threads (e.g. thread-per-request servers) into one dict
+            live = []
+            for thread, shard in self._shards:
+                if thread.is_alive():
+                    live.append((thread, shard))
+                else:
+                    for key, value in shard.items():
+                        _merge_value(self._retired, key, value)
+            self._shards = live
+            merged: dict = {}
+            for (name, labels), value in self._retired.items():
+                _merge_value(merged.setdefault(name, {}), labels, value)
+        for _thread, shard in live:
+            for (name, labels), value in list(shard.items()):
+                _merge_value(merged.setdefault(name, {}), labels, value)
+        return merged
+
+    def reset(self) -> None:
+        with self._shards_lock:
+            self._retired.clear()
+            for _thread, shard in self._shards:
+                shard.clear()
+
+
+def _merge_value(series: dict, labels: tuple, value) -> None:
+    current = series.get(labels)
+    if current is None:
+        series[labels] = list(value) if isinstance(value, list) else value
+    elif isinstance(value, list):
+        for i, v in enumerate(value):
+            current[i] += v
+    else:
+        series[labels] = current + value
+
+
+class Counter:
+    def __init__(self, registry: Registry, name: str):
+        self._registry, self.name = registry, name
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        shard = self._registry._shard()
+        key = (self.name, labels)
+        shard[key] = shard.get(key, 0) + amount
+
+
+class Histogram:
+    def __init__(self, registry: Registry, name: str, buckets: tuple):
+        self._registry, self.name, self.buckets = registry, name, buckets
+
+    def observe(self, value: float, *labels) -> None:
+        shard = self._registry._shard()
+        key = (self.name, labels)
+        cells = shard.get(key)
+        if cells is None:
+            cells = shard[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+        cells[bisect_left(self.buckets, value)] += 1  # last slot is +Inf
+        cells[-2] += value
+        cells[-1] += 1
+
+
+registry = Registry()
+
+http_requests = registry.counter(
+    "http_requests_total", "HTTP requests handled.", ("blueprint", "endpoint", "method", "status"))
+http_latency = registry.histogram(
+    "http_request_duration_seconds", "Time spent handling HTTP requests.", ("blueprint", "endpoint", "method"))
+db_pool_wait = registry.histogram(
+    "db_pool_checkout_seconds", "Time spent waiting for a database connection.", ("bind",), POOL_BUCKETS)
+upstream_latency = registry.histogram(
+    "upstream_request_duration_seconds", "Latency of calls to external APIs.", ("service", "operation"))
+http_exceptions = registry.counter(
+    "http_exceptions_total", "Unhandled exceptions raised by views.", ("blueprint", "endpoint", "exception"))
+upstream_failures = registry.counter(
+    "upstream_failures_total", "Failed calls to external APIs.", ("service", "operation", "reason"))
+
+
+@contextmanager
+def track_upstream(service: str, operation: str):
+    """Time an outbound call; exceptions count as failures (use `upstream_failures` for bad statuses)."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        upstream_failures.inc(service, operation, type(e).__name__)
+        raise
+    finally:
+        upstream_latency.observe(time.perf_counter() - start, service, operation)
+
+
+# ---------- exposition ----------
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _fmt(v) -> str:
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+def render(snapshot: dict, meta: dict) -> str:
+    lines = []
+    for name, (kind, help_, label_names, buckets) in meta.items():
+        lines.append(f"# HELP {name} {help_}")
+        lines.append(f"# TYPE {name} {kind}")
+        for values, value in sorted(snapshot.get(name, {}).items()):
+            if kind == COUNTER:
+                lines.append(f"{name}{_labels(label_names, values)} {_fmt(value)}")
+                continue
+            cumulative = 0
+            for le, count in zip(buckets + ("+Inf",), value[:-2]):
+                cumulative += count
+                le_label = f'le="{le}"'
+                lines.append(f"{name}_bucket{_labels(label_names, values, le_label)} {cumulative}")
+            lines.append(f"{name}_sum{_labels(label_names, values)} {_fmt(value[-2])}")
+            lines.append(f"{name}_count{_labels(label_names, values)} {value[-1]}")
+    return "\n".join(lines) + "\n"
+
+
+# ---------- multi-process mode ----------
+
+def _snapshot_path(directory: str) -> str:
+    return os.path.join(directory, f"metrics-{os.getpid()}.json")
+
+
+def flush(directory: str) -> None:
+    """Write this process's totals where the other workers can read them."""
+    data = {name: [[list(k), v] for k, v in series.items()] for name, series in registry.snapshot().items()}
+    path = _snapshot_path(directory)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def collect_dir(directory: str) -> dict:
+    flush(directory)
+    merged: dict = {}
+    for fname in os.listdir(directory):
+        if not (fname.startswith("metrics-") and fname.endswith(".json")):
+            continue
+        try:
+            with open(os.path.join(directory, fname)) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue  # a worker is mid-write or just went away
+        for name, series in data.items():
+            for labels, value in series:
+                _merge_value(merged.setdefault(name, {}), tuple(labels), value)
+    return merged
+
+
+# ---------- Flask wiring ----------
+
+class Metrics:
+    def __init__(self, app=None):
+        self._next_flush = 0.0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app) -> None:
+        app.config.setdefault("METRICS_ENABLED", True)
+        app.config.setdefault("METRICS_MULTIPROC_DIR", None)
+        app.config.setdefault("METRICS_FLUSH_SECONDS", 5.0)
+        app.config.setdefault("METRICS_TOKEN", None)
+        app.config.setdefault("METRICS_PUBLIC", False)
+        app.extensions["metrics"] = self
+        if not app.config["METRICS_ENABLED"]:
+            return
+        if app.config["METRICS_MULTIPROC_DIR"]:
+            os.makedirs(app.config["METRICS_MULTIPROC_DIR"], exist_ok=True)
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        got_request_exception.connect(self._exception, app)
+        if app.config["METRICS_TOKEN"] or app.config["METRICS_PUBLIC"]:
+            app.add_url_rule("/metrics", "metrics", self.metrics_view, methods=["GET"])
+
+        from .models import db
+        with app.app_context():
+            for bind, engine in db.engines.items():
+                instrument_engine(engine, bind or "default")
+
+    def _start(self):
+        g._metrics_start = time.perf_counter()
+
+    def _exception(self, sender, exception, **extra):
+        http_exceptions.inc(request.blueprint or "", request.endpoint or "<unmatched>", type(exception).__name__)
+
+    def _finish(self, response):
+        start = g.get("_metrics_start")
+        if start is None or request.endpoint == "metrics":
+            return response
+        endpoint = request.endpoint or "<unmatched>"
+        blueprint = request.blueprint or ""
+        http_latency.observe(time.perf_counter() - start, blueprint, endpoint, request.method)
+        http_requests.inc(blueprint, endpoint, request.method, str(response.status_code))
+
+        directory = current_app.config["METRICS_MULTIPROC_DIR"]
+        if directory and time.monotonic() >= self._next_flush:
+            self._next_flush = time.monotonic() + current_app.config["METRICS_FLUSH_SECONDS"]
+            flush(directory)
+        return response
+
+    def metrics_view(self):
+        token = current_app.config["METRICS_TOKEN"]
+        if token:
+            given = request.headers.get("Authorization", "")
+            if not hmac.compare_digest(given.encode(), f"Bearer {token}".encode()):
+                return current_app.response_class("unauthorized\n", status=401, mimetype="text/plain",
+                                                  headers={"WWW-Authenticate": "Bearer"})
+        directory = current_app.config["METRICS_MULTIPROC_DIR"]
+        snapshot = collect_dir(directory) if directory else registry.snapshot()
+        body = render(snapshot, registry._meta)
+        return current_app.response_class(body, mimetype="text/plain; version=0.0.4")
+
+
+def instrument_engine(engine, bind: str) -> None:
+    """Time connection checkouts from `engine`'s pool."""
+    if getattr(engine, "_metrics_bind", None) is not None:
+        return
+    raw_connection = engine.raw_connection
+
+    def timed_raw_connection():
+        start = time.perf_counter()
+        try:
+            return raw_connection()
+        finally:
+            db_pool_wait.observe(time.perf_counter() - start, bind)
+
+    engine.raw_connection = timed_raw_connection
+    engine._metrics_bind = bind
+
+
+metrics = Metrics()
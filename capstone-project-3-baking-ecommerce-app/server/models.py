@@ -4,13 +4,14 @@ from datetime import datetime, date, time
 from typing import List, Optional
 
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import (CheckConstraint, UniqueConstraint, Index, ForeignKey, Integer, String, Date, Time, DateTime, Numeric, Boolean, text)
+from sqlalchemy import (CheckConstraint, UniqueConstraint, Index, ForeignKey, Integer, String, Text, Date, Time, DateTime, Boolean, text)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from werkzeug.security import generate_password_hash, check_password_hash
-
+from . import hashing
+from .routing import RoutingSession
+from .money import to_dollars
 from .enums import UserRole, CartStatus, OrderStatus, FulfillmentMethod
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 
 def utcnow() -> datetime:
     return datetime.utcnow()
@@ -24,6 +25,8 @@ class User(db.Model):
     email: Mapped[str] = mapped_column(String(255), unique=True, index=True, nullable=False)
     password_hash: Mapped[str] = mapped_column(String(255), nullable=False)
     role: Mapped[UserRole] = mapped_column(db.Enum(UserRole), default=UserRole.customer, nullable=False)
+    # bumped whenever role changes; tokens carrying an older version stop authorizing admin routes
+    token_version: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=utcnow, nullable=False)
 
     carts: Mapped[List["Cart"]] = relationship(back_populates="user", cascade="all, delete-orphan")
@@ -31,10 +34,13 @@ class User(db.Model):
 
 
     def set_password(self, password: str) -> None:
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hashing.hash_password(password)
 
     def check_password(self, password: str) -> bool:
-        return check_password_hash(self.password_hash, password)
+        return hashing.verify_password(self.password_hash, password)
+
+    def password_needs_rehash(self) -> bool:
+        return hashing.needs_rehash(self.password_hash)
     
     def to_dict(self) -> dict:
         return {
@@ -49,13 +55,37 @@ class User(db.Model):
         return f"<User {self.id} {self.email} {self.role.value}>"
 
 
+class RefreshToken(db.Model):
+    """
+    One issued refresh token (stored as its SHA-256) and the access token issued with it.
+    Rotation marks a row replaced; revoking it also blocklists its access token (see tokens.py).
+    """
+    __tablename__ = "refresh_tokens"
+    __table_args__ = (
+        Index("ix_refresh_tokens_user_expires", "user_id", "expires_at"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    # every token rotated from one login shares a family; reusing a rotated token revokes the family
+    family_id: Mapped[str] = mapped_column(String(32), nullable=False, index=True)
+    token_hash: Mapped[str] = mapped_column(String(64), unique=True, nullable=False)
+    access_jti: Mapped[str] = mapped_column(String(36), unique=True, nullable=False)
+    # the blocklist only ever reads rows whose access token is still live
+    access_expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=utcnow, nullable=False)
+    replaced_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    revoked_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+
+
 class Product(db.Model):
     __tablename__ = "products"
 
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String(200), nullable=False, index=True)
     description: Mapped[Optional[str]] = mapped_column(String(2000))
-    price: Mapped[float] = mapped_column(Numeric(10, 2), nullable=False)
+    price_cents: Mapped[int] = mapped_column(Integer, nullable=False)
     image_url: Mapped[Optional[str]] = mapped_column(String(500))
 
     allergens_csv: Mapped[str] = mapped_column(String(500), default="", nullable=False)
@@ -66,8 +96,9 @@ class Product(db.Model):
     order_items: Mapped[List["OrderItem"]] = relationship(back_populates="product")
 
     __table_args__ = (
-        CheckConstraint("price >= 0", name="check_price_non_negative"),
-        Index("ix_products_active_name", "is_active", "name")
+        CheckConstraint("price_cents >= 0", name="check_price_non_negative"),
+        Index("ix_products_active_name", "is_active", "name"),
+        Index("ix_products_name_image_url", "name", "image_url"),  # Spoonacular ingest dedup
     )
 
 
@@ -84,14 +115,14 @@ class Product(db.Model):
             "id": self.id,
             "name": self.name,
             "description": self.description,
-            "price": float(self.price),
+            "price": to_dollars(self.price_cents),
             "image_url": self.image_url,
             "allergens": self.allergens,
             "is_active": self.is_active,
         }
     
     def __repr__(self) -> str:
-        return f"<Product {self.id} {self.name}${self.price}>"
+        return f"<Product {self.id} {self.name}${to_dollars(self.price_cents):.2f}>"
 
 
 
@@ -110,8 +141,8 @@ class Cart(db.Model):
     __table_args__ = (Index("ix_carts_user_status", "user_id", "status"),)
 
     @property
-    def total(self) -> float:
-        return float(sum((ci.qty or 0) * float(ci.product.price) for ci in self.items))
+    def total_cents(self) -> int:
+        return sum(ci.line_total_cents for ci in self.items)
     
     def to_dict(self) -> dict:
         return {
@@ -119,7 +150,7 @@ class Cart(db.Model):
             "user_id": self.user_id,
             "status": self.status.value,
             "items": [ci.to_dict() for ci in self.items],
-            "total": self.total,
+            "total": to_dollars(self.total_cents),
             "updated_at": self.updated_at.isoformat() + "Z",
         }
 
@@ -141,6 +172,10 @@ class CartItem(db.Model):
         CheckConstraint("qty > 0", name="ck_cartitem_qty_pos"),
     )
 
+    @property
+    def line_total_cents(self) -> int:
+        return (self.qty or 0) * self.product.price_cents if self.product else 0
+
     def to_dict(self) -> dict:
         return {
             "id": self.id,
@@ -148,7 +183,7 @@ class CartItem(db.Model):
             "product_id": self.product_id,
             "qty": self.qty,
             "product": self.product.to_dict() if self.product else None,
-            "line_total": float(self.qty * float(self.product.price)) if self.product else 0.0,
+            "line_total": to_dollars(self.line_total_cents),
         }
 
 
@@ -157,9 +192,9 @@ class Order(db.Model):
 
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="SET NULL"), index=True)
-    total: Mapped[float] = mapped_column(Numeric(10, 2), nullable= False, default=0)
+    total_cents: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
 
-    fulfillment_date: Mapped[date] = mapped_column(Date, nullable=False, index=True)
+    fulfillment_date: Mapped[date] = mapped_column(Date, nullable=False)
 
     requested_time: Mapped[Optional[time]] = mapped_column(Time, nullable=True)
 
@@ -179,18 +214,26 @@ class Order(db.Model):
     items: Mapped[List["OrderItem"]] = relationship(back_populates="order", cascade="all, delete-orphan", lazy="joined")
 
     __table_args__ = (
-        CheckConstraint("total >= 0", name="ck_orders_total_nonneg"),
+        CheckConstraint("total_cents >= 0", name="ck_orders_total_nonneg"),
         Index("ix_orders_user_created", "user_id", "created_at"),
+        # admin order list, newest first, optionally filtered by status
+        Index("ix_orders_created_at", "created_at"),
+        Index("ix_orders_status_created_at", "status", "created_at"),
+        # checkout's "is this day taken" lookup; the partial unique index below can't serve it with bound statuses
+        Index("ix_orders_fulfillment_date_status", "fulfillment_date", "status"),
         Index(
             "uq_orders_one_per_day_active",
             "fulfillment_date",
             unique=True,
-            postgresql_where=text("status IN ('placed','complete')")
+            postgresql_where=text("status IN ('placed','complete')"),
+            sqlite_where=text("status IN ('placed','complete')"),
         ),
+        # archived ids must never be handed out again; without this SQLite reuses the max rowid once deleted
+        {"sqlite_autoincrement": True},
     )
 
     def recalculate_total(self) -> None:
-        self.total = sum((oi.qty or 0) * (oi.price_snapshot or 0) for oi in self.items)
+        self.total_cents = sum(oi.line_total_cents for oi in self.items)
 
     def _format_time(self) -> Optional[str]:
         return self.requested_time.isoformat(timespec="minutes") if self.requested_time else None
@@ -203,7 +246,7 @@ class Order(db.Model):
             "requested_time": self._format_time(),
             "fulfillment_method": self.fulfillment_method.value,
             "status": self.status.value,
-            "total": float(self.total),
+            "total": to_dollars(self.total_cents),
             "items": [oi.to_dict() for oi in self.items],
             "created_at": self.created_at.isoformat() + "Z",
             "delivery": {
@@ -224,19 +267,20 @@ class OrderItem(db.Model):
     order_id: Mapped[int] = mapped_column(ForeignKey("orders.id", ondelete="CASCADE"), nullable=False, index=True)
     product_id: Mapped[int] = mapped_column(ForeignKey("products.id"), nullable=False, index=True)
     qty: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
-    price_snapshot: Mapped[float] = mapped_column(Numeric(10, 2), nullable=False)
+    price_snapshot_cents: Mapped[int] = mapped_column(Integer, nullable=False)
 
     order: Mapped["Order"] = relationship(back_populates="items")
     product: Mapped["Product"] = relationship(back_populates="order_items")
 
     __table_args__ = (
         CheckConstraint("qty > 0", name="ck_orderitem_qty_pos"),
-        CheckConstraint("price_snapshot >= 0", name="ck_orderitem_price_nonneg"),
+        CheckConstraint("price_snapshot_cents >= 0", name="ck_orderitem_price_nonneg"),
+        {"sqlite_autoincrement": True},
     )
 
     @property
-    def line_total(self) -> float:
-        return float(self.qty * float(self.price_snapshot))
+    def line_total_cents(self) -> int:
+        return (self.qty or 0) * self.price_snapshot_cents
 
     def to_dict(self) -> dict:
         return {
@@ -244,8 +288,94 @@ class OrderItem(db.Model):
             "order_id": self.order_id,
             "product_id": self.product_id,
             "qty": self.qty,
-            "price_snapshot": float(self.price_snapshot),
-            "line_total": self.line_total,
+            "price_snapshot": to_dollars(self.price_snapshot_cents),
+            "line_total": to_dollars(self.line_total_cents),
             "product": self.product.to_dict() if self.product else None,
         }
 
+
+class ArchivedOrder(db.Model):
+    """
+    An order moved out of `orders` by `flask archive orders` (see archive.py). Same columns and ids,
+    so serializers and URLs work unchanged; archived orders are read-only.
+    """
+    __tablename__ = "orders_archive"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    user_id: Mapped[Optional[int]] = mapped_column(ForeignKey("users.id", ondelete="SET NULL"))
+    total_cents: Mapped[int] = mapped_column(Integer, nullable=False)
+    fulfillment_date: Mapped[date] = mapped_column(Date, nullable=False)
+    requested_time: Mapped[Optional[time]] = mapped_column(Time, nullable=True)
+    fulfillment_method: Mapped[FulfillmentMethod] = mapped_column(db.Enum(FulfillmentMethod), nullable=False)
+    delivery_name: Mapped[Optional[str]] = mapped_column(String(200))
+    delivery_line1: Mapped[Optional[str]] = mapped_column(String(200))
+    delivery_line2: Mapped[Optional[str]] = mapped_column(String(200))
+    delivery_city: Mapped[Optional[str]] = mapped_column(String(100))
+    delivery_state: Mapped[Optional[str]] = mapped_column(String(50))
+    delivery_zip: Mapped[Optional[str]] = mapped_column(String(20))
+    status: Mapped[OrderStatus] = mapped_column(db.Enum(OrderStatus), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    archived_at: Mapped[datetime] = mapped_column(DateTime, default=utcnow, nullable=False)
+
+    items: Mapped[List["ArchivedOrderItem"]] = relationship(lazy="joined")
+
+    __table_args__ = (
+        Index("ix_orders_archive_user_created", "user_id", "created_at"),
+        Index("ix_orders_archive_status_created", "status", "created_at"),
+        Index("ix_orders_archive_created_at", "created_at"),
+    )
+
+
+class ArchivedOrderItem(db.Model):
+    __tablename__ = "order_items_archive"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    order_id: Mapped[int] = mapped_column(ForeignKey("orders_archive.id", ondelete="CASCADE"), nullable=False, index=True)
+    product_id: Mapped[int] = mapped_column(ForeignKey("products.id"), nullable=False)
+    qty: Mapped[int] = mapped_column(Integer, nullable=False)
+    price_snapshot_cents: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    product: Mapped["Product"] = relationship()
+
+
+class DailySales(db.Model):
+    """One row per calendar day (order created_at, UTC) of non-canceled orders."""
+    __tablename__ = "daily_sales"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    order_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    units: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    revenue_cents: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    def to_dict(self) -> dict:
+        return {
+            "date": self.day.isoformat(),
+            "order_count": self.order_count,
+            "units": self.units,
+            "revenue": to_dollars(self.revenue_cents),
+        }
+
+
+class DailyProductSales(db.Model):
+    """Per-product slice of DailySales."""
+    __tablename__ = "daily_product_sales"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    product_id: Mapped[int] = mapped_column(ForeignKey("products.id"), primary_key=True)
+    order_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    units: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    revenue_cents: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    __table_args__ = (Index("ix_daily_product_sales_product_day", "product_id", "day"),)
+
+
+class OrderEvent(db.Model):
+    """Append-only log of order changes; the id is the SSE event id used for Last-Event-ID resume."""
+    __tablename__ = "order_events"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    kind: Mapped[str] = mapped_column(String(32), nullable=False)
+    order_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
+    payload: Mapped[str] = mapped_column(Text, nullable=False)
+    # resume overlap and retention pruning both filter on it
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=utcnow, nullable=False, index=True)
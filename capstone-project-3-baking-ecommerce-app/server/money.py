@@ -0,0 +1,17 @@
+"""
+Money is stored and summed as integer cents; dollars exist only at the edges
+(request bodies in, JSON out).
+"""
+from decimal import Decimal, ROUND_HALF_UP
+
+_CENT = Decimal("0.01")
+
+
+def to_cents(amount) -> int:
+    """Dollars (int, float, str or Decimal) -> cents, rounded half-up."""
+    return int(Decimal(str(amount)).quantize(_CENT, rounding=ROUND_HALF_UP) * 100)
+
+
+def to_dollars(cents: int) -> float:
+    """Cents -> dollars for JSON; shortest float repr, e.g. 1999 -> 19.99."""
+    return cents / 100
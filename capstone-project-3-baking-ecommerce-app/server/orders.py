@@ -1,68 +1,93 @@
-from flask import Blueprint, request, jsonify, abort
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from .models import db, Order, OrderStatus, User
-from .enums import UserRole
+from flask import Blueprint, request, abort
+from flask_jwt_extended import jwt_required
+from sqlalchemy.orm import joinedload
+from .models import db, ArchivedOrder, ArchivedOrderItem, Order, OrderItem, OrderStatus
+from .archive import TERMINAL_STATUSES
+from .identity import current_user_id, is_admin as current_user_is_admin
+from . import serializers
+from .serializers import json_response
+from .routing import read_only
 
 orders_bp = Blueprint("orders", __name__)
 
-def _is_admin(user_id: int) -> bool:
-    user = User.query.get(user_id)
-    return bool(user and user.role == UserRole.admin)
-
 @orders_bp.get("/")
 @jwt_required()
+@read_only
 def list_orders():
     """
     List orders for the current user (admin can see everyone’s).
+    Live orders come first, then archived ones (see archive.py); newest first within each.
+    The archive is only read once a page runs past the live orders, so `total` counts
+    live orders; keep paging until a page comes back short for the archived ones.
     Query params (optional):
       - status: placed|complete|canceled
       - page: int (default 1)
       - per_page: int (default 10, max 50)
+      - include_archived: 1 to add `archived_total` (counts the archive)
     """
-    user_id = int(get_jwt_identity())
-    is_admin = _is_admin(user_id)
+    user_id = current_user_id()
+    is_admin = current_user_is_admin()
 
     status_param = request.args.get("status")
     page = max(int(request.args.get("page", 1)), 1)
     per_page = min(max(int(request.args.get("per_page", 10)), 1), 50)
+    include_archived = request.args.get("include_archived") in ("1", "true")
 
-    q = Order.query
-    if not is_admin:
-        q = q.filter(Order.user_id == user_id)
-
+    status = None
     if status_param:
         try:
             status = OrderStatus(status_param)
         except ValueError:
-            return jsonify({"error": "invalid status"}), 400
-        q = q.filter(Order.status == status)
+            return json_response({"error": "invalid status"}), 400
+
+    def scoped(model, item_model):
+        # every line's product is serialized; load them with the page instead of one query each
+        q = model.query.options(joinedload(model.items).joinedload(item_model.product))
+        if not is_admin:
+            q = q.filter(model.user_id == user_id)
+        if status:
+            q = q.filter(model.status == status)
+        return q
+
+    paged = scoped(Order, OrderItem).order_by(Order.created_at.desc()).paginate(page=page, per_page=per_page, error_out=False)
+    items = list(paged.items)
+    body = {"page": page, "per_page": per_page, "total": paged.total}
 
-    q = q.order_by(Order.created_at.desc())
+    # placed orders are never archived, so only a terminal or unfiltered listing reaches the archive
+    if status is None or status in TERMINAL_STATUSES:
+        archived = scoped(ArchivedOrder, ArchivedOrderItem)
+        if len(items) < per_page:
+            # the page runs past the live orders: continue into the archive
+            offset = max((page - 1) * per_page - paged.total, 0)
+            items += (
+                archived.order_by(ArchivedOrder.created_at.desc())
+                .offset(offset).limit(per_page - len(items)).all()
+            )
+        if include_archived:
+            body["archived_total"] = archived.order_by(None).count()
+    elif include_archived:
+        body["archived_total"] = 0
 
-    paged = q.paginate(page=page, per_page=per_page, error_out=False)
-    return jsonify({
-        "page": page,
-        "per_page": per_page,
-        "total": paged.total,
-        "items": [o.to_dict() for o in paged.items],
-    }), 200
+    body["items"] = [serializers.order(o) for o in items]
+    return json_response(body), 200
 
 
 @orders_bp.get("/<int:order_id>")
 @jwt_required()
+@read_only
 def get_order(order_id: int):
     """
     Get a single order. Non-admin users can only access their own orders.
     Admins can read any order.
     """
-    user_id = int(get_jwt_identity())
-    is_admin = _is_admin(user_id)
+    user_id = current_user_id()
+    is_admin = current_user_is_admin()
 
-    order = Order.query.get(order_id)
+    order = Order.query.get(order_id) or ArchivedOrder.query.get(order_id)
     if not order:
         abort(404, description="Order not found")
 
     if not is_admin and order.user_id != user_id:
         abort(403, description="Forbidden")
 
-    return jsonify(order.to_dict()), 200
+    return json_response(serializers.order(order)), 200
@@ -0,0 +1,368 @@
+"""
+Shared price/active table for cart and checkout.
+
+Each product id maps to one little-endian int64 in a memory-mapped file:
+-1 for "no such product", otherwise `price_cents << 1 | is_active`. The OS
+page cache holds one copy, and every pre-fork worker maps it, so pricing a
+cart or validating a checkout reads memory instead of loading a Product row
+per line.
+
+    header  b"PRICES01" | generation u64 | slots u64
+    slots   int64 * slots, indexed by product id
+
+Rebuilds are atomic. Under an flock on a small sidecar file (PATH.gen), the
+products are read, the whole table is written to a temp file, fsynced and
+renamed over the old one, and the sidecar's generation counter is bumped.
+Reading inside the lock means a higher generation is always a newer
+snapshot, however concurrent rebuilds interleave. Readers compare the
+sidecar generation with the one they mapped on every lookup (one memory
+read) and remap when it has moved. A superseded mapping is never closed
+explicitly; it goes away once no thread is still reading it. A rebuild
+runs:
+  - at the end of `flask seed`;
+  - on first use if the file doesn't exist yet;
+  - from `flask prices rebuild`.
+
+A commit that added, changed or deleted Products only rereads those rows and
+rewrites their slots in place, under the same lock; every mapping sees the
+new values at once. Only a product id past the end of the table (a new
+product) costs a full rebuild.
+
+The table lives at PRICE_TABLE_PATH (default instance/prices) plus a hash of
+the database URI, so an app on another database (`flask db-advise`'s scratch
+copy, the benchmarks, tests) never overwrites the serving app's table.
+
+Without fcntl (Windows) the sidecar lock is a no-op; rebuilds in one process
+are still serialized, but several worker processes could publish out of
+order, so run a single process there.
+
+Writes that bypass the ORM (hand-written SQL, another app) aren't seen.
+`flask prices check` compares the table with the database and exits 1 on any
+difference. Lookups for ids past the end of the table fall back to a single
+DB query, so a product another worker has just created is never rejected.
+"""
+from __future__ import annotations
+
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import threading
+from array import array
+from contextlib import contextmanager
+from typing import Callable, Iterable, Iterator, Optional
+
+import click
+from flask import current_app, has_app_context
+from flask.cli import AppGroup
+from sqlalchemy import event as sa_event, select
+from sqlalchemy.orm import Session
+
+from .models import db, Product
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+_MAGIC = b"PRICES01"
+_HEADER = struct.Struct("<8sQQ")
+_GEN = struct.Struct("<Q")
+_DIRTY_KEY = "_prices_dirty"
+
+
+def _encode(price_cents: int, is_active: bool) -> int:
+    return price_cents << 1 | bool(is_active)
+
+
+def _flock(fd: int) -> None:
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+
+
+def _read_generation(fd: int) -> int:
+    os.lseek(fd, 0, os.SEEK_SET)
+    data = os.read(fd, _GEN.size)
+    return _GEN.unpack(data)[0] if len(data) == _GEN.size else 0
+
+
+class PriceTable:
+    """One app's table: its path, and this process's current mapping of it."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.gen_path = path + ".gen"
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._gen_map: Optional[mmap.mmap] = None
+        # (mapping, generation, slots), replaced as a whole so readers never mix two generations
+        self._state: Optional[tuple[mmap.mmap, int, int]] = None
+
+    # ---- writing ----
+
+    @contextmanager
+    def _locked(self) -> Iterator[int]:
+        """The sidecar's fd, held under the writers' lock; closing it releases the flock."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._write_lock:
+            fd = os.open(self.gen_path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                _flock(fd)
+                yield fd
+            finally:
+                os.close(fd)
+
+    def rebuild(self, read_rows: Callable[[], Iterable[tuple[int, int, bool]]]) -> int:
+        """
+        Publish a new table built from `read_rows()` ((id, price_cents, is_active) tuples). Returns the
+        generation. The rows are read under the lock, so generations are published in snapshot order.
+        """
+        with self._locked() as fd:
+            rows = list(read_rows())
+            slots = array("q", [-1]) * (max((r[0] for r in rows), default=0) + 1)
+            for id_, price_cents, is_active in rows:
+                slots[id_] = _encode(price_cents, is_active)
+            if sys.byteorder != "little":
+                slots.byteswap()
+
+            generation = _read_generation(fd) + 1
+
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(_HEADER.pack(_MAGIC, generation, len(slots)))
+                f.write(slots.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+            os.lseek(fd, 0, os.SEEK_SET)
+            os.write(fd, _GEN.pack(generation))
+            os.fsync(fd)
+        return generation
+
+    def update(self, read_rows: Callable[[list], Iterable[tuple[int, int, bool]]], ids: Iterable[int]) -> Optional[int]:
+        """
+        Rewrite only the slots of `ids`, in place, from `read_rows(ids)`; an id it doesn't return is
+        marked missing. Returns the generation, or None when the table needs a rebuild instead
+        (it doesn't exist yet, or an id is past its end).
+        """
+        ids = sorted(set(ids))
+        if not ids:
+            return self.generation()
+        with self._locked() as fd:
+            if not os.path.exists(self.path):
+                return None
+            with open(self.path, "r+b") as f:
+                magic, generation, slots = _HEADER.unpack(f.read(_HEADER.size))
+                if magic != _MAGIC or ids[-1] >= slots or generation != _read_generation(fd):
+                    return None
+                values = dict.fromkeys(ids, -1)
+                for id_, price_cents, is_active in read_rows(ids):
+                    values[id_] = _encode(price_cents, is_active)
+                for id_, value in values.items():
+                    f.seek(_HEADER.size + id_ * 8)
+                    f.write(struct.pack("<q", value))
+                f.flush()
+                os.fsync(f.fileno())
+        return generation
+
+    # ---- reading ----
+
+    def _published_generation(self) -> int:
+        if self._gen_map is None:
+            with open(self.gen_path, "rb") as f:
+                self._gen_map = mmap.mmap(f.fileno(), _GEN.size, access=mmap.ACCESS_READ)
+        return _GEN.unpack_from(self._gen_map, 0)[0]
+
+    def _remap(self) -> tuple[mmap.mmap, int, int]:
+        with open(self.path, "rb") as f:
+            new = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, generation, slots = _HEADER.unpack_from(new, 0)
+        if magic != _MAGIC or len(new) < _HEADER.size + slots * 8:
+            new.close()
+            raise ValueError(f"{self.path} is not a price table")
+        # the old mapping isn't closed: another thread may still be reading it; it's freed with its last reference
+        self._state = (new, generation, slots)
+        return self._state
+
+    def _current(self) -> tuple[mmap.mmap, int, int]:
+        state = self._state
+        if state is None or self._published_generation() != state[1]:
+            with self._lock:
+                state = self._state
+                if state is None or self._published_generation() != state[1]:
+                    state = self._remap()
+        return state
+
+    def available(self) -> bool:
+        return os.path.exists(self.gen_path) and os.path.exists(self.path)
+
+    def generation(self) -> int:
+        return self._state[1] if self._state is not None else 0
+
+    def get(self, product_id: int) -> Optional[tuple[int, bool]]:
+        """(price_cents, is_active) from the mapped table; None when the id isn't in it."""
+        mapping, _generation, slots = self._current()
+        if not 0 <= product_id < slots:
+            return None
+        value = struct.unpack_from("<q", mapping, _HEADER.size + product_id * 8)[0]
+        if value < 0:
+            return None
+        return value >> 1, bool(value & 1)
+
+    def entries(self) -> dict[int, tuple[int, bool]]:
+        mapping, _generation, slots = self._current()
+        values = array("q", mapping[_HEADER.size:_HEADER.size + slots * 8])
+        if sys.byteorder != "little":
+            values.byteswap()
+        return {i: (v >> 1, bool(v & 1)) for i, v in enumerate(values) if v >= 0}
+
+
+# ---------- app integration ----------
+
+def _table() -> Optional[PriceTable]:
+    return current_app.extensions.get("price_table") if has_app_context() else None
+
+
+def _as_int(value) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _db_rows(ids: Optional[list] = None, session=None) -> list[tuple[int, int, bool]]:
+    stmt = select(Product.id, Product.price_cents, Product.is_active)
+    if ids is not None:
+        stmt = stmt.where(Product.id.in_(ids))
+    if session is not None:
+        return [tuple(r) for r in session.execute(stmt)]
+    # rebuilds run right after a commit, outside any session transaction; read the primary directly
+    with db.engine.connect() as conn:
+        return [tuple(r) for r in conn.execute(stmt)]
+
+
+def rebuild() -> Optional[int]:
+    """Rebuild this app's table from the database (no-op when disabled). Returns the new generation."""
+    table = _table()
+    if table is None:
+        return None
+    return table.rebuild(_db_rows)
+
+
+def update(product_ids: Iterable[int]) -> Optional[int]:
+    """Reread just these products into this app's table, rebuilding it only when it must grow."""
+    table = _table()
+    if table is None:
+        return None
+    generation = table.update(_db_rows, product_ids)
+    return rebuild() if generation is None else generation
+
+
+def lookup_many(product_ids: Iterable) -> dict[int, tuple[int, bool]]:
+    """
+    product id -> (price_cents, is_active) for every id that exists. Served from the shared
+    table; ids it doesn't know (or every id, when it is disabled) cost one query together.
+    """
+    ids = {pid for pid in map(_as_int, product_ids) if pid is not None}
+    found: dict[int, tuple[int, bool]] = {}
+    table = _table()
+    if table is not None:
+        if not table.available():
+            rebuild()
+        for pid in ids:
+            hit = table.get(pid)
+            if hit is not None:
+                found[pid] = hit
+    missing = [pid for pid in ids if pid not in found]
+    if missing:
+        # through the session, so a product created earlier in this transaction is seen
+        found.update({id_: (price, bool(active)) for id_, price, active in _db_rows(missing, db.session)})
+    return found
+
+
+def lookup(product_id) -> Optional[tuple[int, bool]]:
+    return lookup_many([product_id]).get(_as_int(product_id))
+
+
+@sa_event.listens_for(Session, "after_flush")
+def _note_product_changes(session, flush_context):
+    # ids are assigned by now, new products included
+    changed = {obj.id for obj in (*session.new, *session.dirty, *session.deleted) if isinstance(obj, Product)}
+    if changed:
+        session.info.setdefault(_DIRTY_KEY, set()).update(changed)
+
+
+@sa_event.listens_for(Session, "after_commit")
+def _update_after_commit(session):
+    changed = session.info.pop(_DIRTY_KEY, None)
+    if changed and _table() is not None:
+        try:
+            update(changed)
+        except Exception:
+            # the commit stands; lookups keep serving the previous values until the next rebuild
+            current_app.logger.exception("price table update failed")
+
+
+@sa_event.listens_for(Session, "after_rollback")
+def _drop_pending_rebuild(session):
+    session.info.pop(_DIRTY_KEY, None)
+
+
+def table_path(app) -> str:
+    # keyed by database even when PRICE_TABLE_PATH is set: an app on a scratch or benchmark database
+    # must never overwrite the table the serving app prices carts from
+    uri = app.config["SQLALCHEMY_DATABASE_URI"]
+    base = app.config["PRICE_TABLE_PATH"] or os.path.join(app.instance_path, "prices")
+    return f"{base}-{hashlib.sha1(uri.encode()).hexdigest()[:12]}.bin"
+
+
+def init_app(app) -> None:
+    app.config.setdefault("PRICE_TABLE_ENABLED", True)
+    app.config.setdefault("PRICE_TABLE_PATH", None)
+    if app.config["PRICE_TABLE_ENABLED"]:
+        app.extensions["price_table"] = PriceTable(table_path(app))
+
+
+# ---------- CLI ----------
+
+prices_cli = AppGroup("prices", help="Shared product price table.")
+
+
+@prices_cli.command("rebuild")
+def rebuild_command():
+    """Rebuild the price table from the products table."""
+    generation = rebuild()
+    if generation is None:
+        raise click.ClickException("PRICE_TABLE_ENABLED is off")
+    click.echo(f"Price table {_table().path} at generation {generation}.")
+
+
+@prices_cli.command("check")
+@click.option("--fix", is_flag=True, help="Rebuild the table if it differs.")
+def check_command(fix):
+    """Compare the price table with the products table; exit 1 on any difference."""
+    table = _table()
+    if table is None:
+        raise click.ClickException("PRICE_TABLE_ENABLED is off")
+    if not table.available():
+        raise click.ClickException(f"{table.path} doesn't exist yet; run `flask prices rebuild`")
+
+    cached = table.entries()
+    actual = {id_: (price, bool(active)) for id_, price, active in _db_rows()}
+    problems = []
+    for id_ in sorted(actual.keys() | cached.keys()):
+        if id_ not in cached:
+            problems.append(f"product {id_}: missing from the table")
+        elif id_ not in actual:
+            problems.append(f"product {id_}: in the table but not in the database")
+        elif cached[id_] != actual[id_]:
+            problems.append(f"product {id_}: table has {cached[id_]}, database has {actual[id_]}")
+
+    click.echo(f"generation {table.generation()}: {len(actual)} products, {len(problems)} difference(s)")
+    for line in problems[:50]:
+        click.echo(f"  {line}")
+    if problems:
+        if fix:
+            click.echo(f"Rebuilt at generation {rebuild()}.")
+        sys.exit(1)
@@ -0,0 +1,207 @@
+"""
+Opt-in cProfile hook for live requests.
+
+Off by default, and when PROFILING_ENABLED is false nothing is installed at
+all. When it is on, a WSGI middleware profiles:
+  - a random PROFILING_SAMPLE_RATE fraction of requests, and
+  - any request carrying a valid signed `X-Profile` header
+    (generate one with `flask --app server.wsgi profile token`). Signed
+    headers need their own PROFILING_SECRET; without one, X-Profile is
+    ignored, so a deployment can't be profiled on demand with a guessable
+    key.
+
+Each profile is written to PROFILING_DIR/requests/ as a .prof file (open it
+with `python -m pstats`, snakeviz, ...); the `X-Profile-Id` response header
+gives the start of its file name. Only the newest PROFILING_MAX_FILES are kept.
+Every PROFILING_AGGREGATE_EVERY profiles, those kept files are merged into
+PROFILING_DIR/aggregate.prof, which therefore covers a rolling window of
+recent traffic. Saving, pruning and merging run on a background writer
+thread, not on the request; if it falls behind, new profiles are dropped.
+
+Only one request per process is profiled at a time; concurrent candidates
+run unprofiled. For streaming responses, only the view itself is profiled, not
+the streamed body.
+"""
+from __future__ import annotations
+
+import cProfile
+import hashlib
+import hmac
+import itertools
+import logging
+import os
+import pstats
+import queue
+import random
+import re
+import threading
+import time
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+HEADER = "X-Profile"
+_ENVIRON_HEADER = "HTTP_X_PROFILE"
+_SLUG_RE = re.compile(r"[^A-Za-z0-9]+")
+_WRITE_QUEUE_SIZE = 32
+
+logger = logging.getLogger(__name__)
+
+
+def sign_token(secret: str, ttl: float = 300) -> str:
+    """`X-Profile` header value valid for `ttl` seconds."""
+    expires = str(int(time.time() + ttl))
+    sig = hmac.new(secret.encode(), expires.encode(), hashlib.sha256).hexdigest()
+    return f"{expires}.{sig}"
+
+
+def verify_token(secret: str, token: str) -> bool:
+    expires, _, sig = token.partition(".")
+    if not expires.isdigit() or int(expires) < time.time():
+        return False
+    expected = hmac.new(secret.encode(), expires.encode(), hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, sig)
+
+
+class ProfilerMiddleware:
+    def __init__(self, wsgi_app, directory: str, sample_rate: float, secret: str | None,
+                 max_files: int = 200, aggregate_every: int = 20):
+        self.wsgi_app = wsgi_app
+        self.sample_rate = sample_rate
+        self.secret = secret
+        self.max_files = max_files
+        self.aggregate_every = aggregate_every
+        self.directory = directory
+        self.requests_dir = os.path.join(directory, "requests")
+        os.makedirs(self.requests_dir, exist_ok=True)
+        self._active = threading.Lock()  # one profiled request at a time
+        self._writer_lock = threading.Lock()
+        self._writer_pid = None  # the writer thread doesn't survive a fork; start one per process
+        self._queue: queue.Queue | None = None
+        self._since_aggregate = 0
+        self._seq = itertools.count(1)
+
+    def _wanted(self, environ) -> bool:
+        token = environ.get(_ENVIRON_HEADER)
+        if token and self.secret:
+            return verify_token(self.secret, token)
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def __call__(self, environ, start_response):
+        if not self._wanted(environ) or not self._active.acquire(blocking=False):
+            return self.wsgi_app(environ, start_response)
+
+        name = self._profile_name(environ)
+
+        def start_with_id(status, headers, exc_info=None):
+            headers.append(("X-Profile-Id", name))
+            return start_response(status, headers, exc_info)
+
+        profile = cProfile.Profile()
+        start = time.perf_counter()
+        try:
+            profile.enable()
+            try:
+                return self.wsgi_app(environ, start_with_id)
+            finally:
+                profile.disable()
+        finally:
+            self._active.release()
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self._enqueue(profile, f"{name}-{elapsed_ms:.0f}ms")
+
+    def _profile_name(self, environ) -> str:
+        path = _SLUG_RE.sub("_", environ.get("PATH_INFO", "")).strip("_") or "root"
+        stamp = f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}-{next(self._seq)}"
+        return f"{stamp}-{environ.get('REQUEST_METHOD', 'GET')}-{path[:60]}"
+
+    # ---- background writer ----
+
+    def _enqueue(self, profile: cProfile.Profile, name: str) -> None:
+        if self._writer_pid != os.getpid():
+            with self._writer_lock:
+                if self._writer_pid != os.getpid():
+                    self._queue = queue.Queue(maxsize=_WRITE_QUEUE_SIZE)
+                    threading.Thread(target=self._write_loop, args=(self._queue,), name="profile-writer",
+                                     daemon=True).start()
+                    self._writer_pid = os.getpid()
+        try:
+            self._queue.put_nowait((profile, name))
+        except queue.Full:
+            logger.warning("profile writer is behind; dropped profile %s", name)
+
+    def _write_loop(self, pending: queue.Queue) -> None:
+        while True:
+            profile, name = pending.get()
+            try:
+                self._save(profile, name)
+            except Exception:
+                logger.exception("saving profile %s failed", name)
+
+    def _save(self, profile: cProfile.Profile, name: str) -> None:
+        profile.dump_stats(os.path.join(self.requests_dir, f"{name}.prof"))
+        files = sorted(
+            (os.path.join(self.requests_dir, f) for f in os.listdir(self.requests_dir) if f.endswith(".prof")),
+            key=os.path.getmtime,
+        )
+        for old in files[:-self.max_files]:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+        self._since_aggregate += 1
+        if self._since_aggregate >= self.aggregate_every:
+            self._since_aggregate = 0
+            self._write_aggregate(files[-self.max_files:])
+
+    def _write_aggregate(self, files: list[str]) -> None:
+        existing = [f for f in files if os.path.exists(f)]
+        if not existing:
+            return
+        stats = pstats.Stats(*existing)
+        target = os.path.join(self.directory, "aggregate.prof")
+        tmp = f"{target}.{os.getpid()}.tmp"
+        stats.dump_stats(tmp)
+        os.replace(tmp, target)
+
+
+def init_app(app) -> None:
+    cfg = app.config
+    if not cfg.get("PROFILING_ENABLED"):
+        return
+    if not cfg.get("PROFILING_SECRET"):
+        app.logger.warning("PROFILING_SECRET is not set; X-Profile headers are ignored (sampling only)")
+    app.wsgi_app = ProfilerMiddleware(
+        app.wsgi_app,
+        directory=cfg["PROFILING_DIR"],
+        sample_rate=cfg["PROFILING_SAMPLE_RATE"],
+        secret=cfg.get("PROFILING_SECRET"),
+        max_files=cfg["PROFILING_MAX_FILES"],
+        aggregate_every=cfg["PROFILING_AGGREGATE_EVERY"],
+    )
+
+
+profile_cli = AppGroup("profile", help="Request profiler helpers.")
+
+
+@profile_cli.command("token")
+@click.option("--ttl", type=float, default=300, help="Seconds the header stays valid.")
+def token_command(ttl):
+    """Print a signed X-Profile header value."""
+    secret = current_app.config.get("PROFILING_SECRET")
+    if not secret:
+        raise click.ClickException("Set PROFILING_SECRET (on the server too) to use signed X-Profile headers")
+    click.echo(f"{HEADER}: {sign_token(secret, ttl)}")
+
+
+@profile_cli.command("report")
+@click.option("--file", "path", default=None, help="Profile to show (default: the rolling aggregate).")
+@click.option("--sort", default="cumulative", show_default=True)
+@click.option("--limit", type=int, default=30, show_default=True)
+def report_command(path, sort, limit):
+    """Print the top functions of a saved profile."""
+    path = path or os.path.join(current_app.config["PROFILING_DIR"], "aggregate.prof")
+    if not os.path.exists(path):
+        raise click.ClickException(f"No profile at {path}")
+    pstats.Stats(path).strip_dirs().sort_stats(sort).print_stats(limit)
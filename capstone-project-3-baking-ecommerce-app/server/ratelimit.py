@@ -0,0 +1,269 @@
+"""
+Token-bucket rate limiting for the expensive routes.
+
+Rules live in config, keyed by endpoint ("auth.login") or by blueprint
+("checkout"); an endpoint rule wins over its blueprint's rule:
+
+    RATELIMIT_RULES = {
+        "auth.login": ["10/minute", "100/hour"],
+        "checkout": ["20/minute"],
+    }
+
+Every rule is counted per client IP and, when the request carries a valid
+access token, per user as well. The check runs in `before_request`, so a
+rejected request never reaches the view or the database. The token is only
+decoded, not looked up. A request takes a token from each of its buckets only
+when every one has a token to give, so hammering past one limit doesn't also
+drain the others.
+
+Clients are told apart by `request.remote_addr`. Behind a reverse proxy or
+load balancer that is the proxy's address, and every client would share one
+bucket. Wrap the WSGI app in werkzeug's ProxyFix (x_for= the number of
+proxies you run) so remote_addr is the client's; never trust
+X-Forwarded-For when nothing in front of the app sets it.
+
+Storage is pluggable through RATELIMIT_STORAGE_URI:
+  - "memory://"                  per-process buckets (default)
+  - "sqlite:////path/limits.db"  shared by every worker on the host
+"""
+from __future__ import annotations
+
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+import weakref
+from typing import Optional
+
+from flask import current_app, request
+
+from .serializers import json_response
+
+_RATE_RE = re.compile(r"^\s*(\d+)\s*/\s*(\d*)\s*(second|minute|hour|day|s|m|h|d)s?\s*$")
+_PERIODS = {"second": 1, "s": 1, "minute": 60, "m": 60, "hour": 3600, "h": 3600, "day": 86400, "d": 86400}
+
+
+def parse_rate(spec: str) -> tuple[int, float]:
+    """'10/minute' or '5/30s' -> (capacity, tokens refilled per second)."""
+    m = _RATE_RE.match(spec)
+    if not m:
+        raise ValueError(f"Invalid rate limit {spec!r}")
+    count = int(m.group(1))
+    period = int(m.group(2) or 1) * _PERIODS[m.group(3)]
+    return count, count / period
+
+
+def _wait(buckets: list[tuple[str, int, float]], levels: list[float]) -> float:
+    """Seconds until every bucket holds a whole token, given their refilled `levels`; 0 if they all do."""
+    return max([(1.0 - tokens) / rate for (_key, _capacity, rate), tokens in zip(buckets, levels) if tokens < 1.0],
+               default=0.0)
+
+
+class MemoryBackend:
+    """Buckets in a dict of key -> [tokens, last_refill]; idle buckets are swept periodically."""
+
+    def __init__(self, evict_interval: float = 60.0):
+        self._buckets: dict[str, list] = {}
+        self._lock = threading.Lock()
+        self._evict_interval = evict_interval
+        self._next_evict = time.monotonic() + evict_interval
+        self._max_idle = 0.0
+
+    def hit(self, buckets: list[tuple[str, int, float]]) -> float:
+        """
+        Take one token from every (key, capacity, rate) bucket, or from none if any is empty.
+        Returns 0 when allowed, otherwise seconds until every bucket has a token.
+        """
+        now = time.monotonic()
+        with self._lock:
+            for _key, capacity, rate in buckets:
+                self._max_idle = max(self._max_idle, capacity / rate)
+            if now >= self._next_evict:
+                self._evict(now)
+
+            levels = []
+            for key, capacity, rate in buckets:
+                bucket = self._buckets.get(key)
+                levels.append(capacity if bucket is None else min(capacity, bucket[0] + (now - bucket[1]) * rate))
+            wait = _wait(buckets, levels)
+            spend = 0.0 if wait else 1.0
+            for (key, _capacity, _rate), tokens in zip(buckets, levels):
+                self._buckets[key] = [tokens - spend, now]
+            return wait
+
+    def _evict(self, now: float) -> None:
+        # a bucket idle for longer than the slowest full refill is indistinguishable from a new one
+        cutoff = now - self._max_idle
+        for key in [k for k, b in self._buckets.items() if b[1] < cutoff]:
+            del self._buckets[key]
+        self._next_evict = now + self._evict_interval
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class SQLiteBackend:
+    """Same algorithm in a SQLite file so every worker process shares the counters."""
+
+    def __init__(self, path: str, evict_interval: float = 60.0):
+        self.path = path
+        self._local = threading.local()
+        _sqlite_backends.add(self)
+        self._evict_interval = evict_interval
+        self._next_evict = 0.0
+        self._max_idle = 0.0
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS ratelimit_buckets ("
+                "key TEXT PRIMARY KEY, tokens REAL NOT NULL, ts REAL NOT NULL)"
+            )
+
+    def _forget_connections(self) -> None:
+        self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+        return conn
+
+    def hit(self, buckets: list[tuple[str, int, float]]) -> float:
+        now = time.time()
+        for _key, capacity, rate in buckets:
+            self._max_idle = max(self._max_idle, capacity / rate)
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if now >= self._next_evict:
+                conn.execute("DELETE FROM ratelimit_buckets WHERE ts < ?", (now - self._max_idle,))
+                self._next_evict = now + self._evict_interval
+
+            levels = []
+            for key, capacity, rate in buckets:
+                row = conn.execute("SELECT tokens, ts FROM ratelimit_buckets WHERE key = ?", (key,)).fetchone()
+                levels.append(capacity if row is None else min(capacity, row[0] + (now - row[1]) * rate))
+            wait = _wait(buckets, levels)
+            spend = 0.0 if wait else 1.0
+            conn.executemany(
+                "INSERT INTO ratelimit_buckets (key, tokens, ts) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, ts = excluded.ts",
+                [(key, tokens - spend, now) for (key, _capacity, _rate), tokens in zip(buckets, levels)],
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return wait
+
+
+# a connection opened before a fork (e.g. gunicorn preload) must not be used by the child;
+# one hook for every backend, so creating backends (one per app) doesn't pile up hooks
+_sqlite_backends: "weakref.WeakSet[SQLiteBackend]" = weakref.WeakSet()
+
+
+def _forget_connections_after_fork() -> None:
+    for backend in list(_sqlite_backends):
+        backend._forget_connections()
+
+
+os.register_at_fork(after_in_child=_forget_connections_after_fork)
+
+
+def backend_from_uri(uri: str, evict_interval: float):
+    if uri.startswith("memory://"):
+        return MemoryBackend(evict_interval)
+    if uri.startswith("sqlite:///"):
+        return SQLiteBackend(uri[len("sqlite:///"):], evict_interval)
+    raise ValueError(f"Unsupported RATELIMIT_STORAGE_URI {uri!r}")
+
+
+class AppLimits:
+    """One app's rules and bucket storage, kept in app.extensions["ratelimit"]."""
+
+    def __init__(self, cfg):
+        self.enabled = cfg.get("RATELIMIT_ENABLED", True)
+        self.rules: dict[str, list[tuple[str, int, float]]] = {
+            target: [(spec, *parse_rate(spec)) for spec in specs]
+            for target, specs in (cfg.get("RATELIMIT_RULES") or {}).items()
+        }
+        self.backend = backend_from_uri(
+            cfg.get("RATELIMIT_STORAGE_URI", "memory://"),
+            cfg.get("RATELIMIT_EVICT_INTERVAL", 60.0),
+        )
+
+    def rules_for(self, endpoint: Optional[str], blueprint: Optional[str]) -> tuple[Optional[str], list]:
+        if endpoint in self.rules:
+            return endpoint, self.rules[endpoint]
+        if blueprint in self.rules:
+            return blueprint, self.rules[blueprint]
+        return None, []
+
+
+class RateLimiter:
+    """
+    The Flask extension. It holds no state of its own: each app's limits live in its
+    extensions, so a second app in the process (tests, `flask db-advise`, benchmarks)
+    can't change the first one's rules or storage.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app) -> None:
+        limits = AppLimits(app.config)
+        app.extensions["ratelimit"] = limits
+        if limits.enabled and limits.rules:
+            app.before_request(self._check)
+
+    def _jwt_subject(self, header: str) -> Optional[str]:
+        if not header.startswith("Bearer "):
+            return None
+        from flask_jwt_extended import decode_token
+        try:
+            return str(decode_token(header[7:])["sub"])
+        except Exception:
+            return None  # invalid/expired tokens are rejected by the view itself
+
+    def wait_for(self, endpoint: Optional[str], blueprint: Optional[str], ip: str, authorization: str = "") -> float:
+        """
+        Take a token from every bucket that applies, or from none if any of them is empty.
+        Returns 0 when allowed, otherwise seconds until the caller may retry. Needs an app
+        context (for the app's limits and to decode the token); also used by the async
+        routes in asgi.py, which bypass before_request.
+        """
+        limits: AppLimits = current_app.extensions["ratelimit"]
+        if not limits.enabled:
+            return 0.0
+        target, rules = limits.rules_for(endpoint, blueprint)
+        if not rules:
+            return 0.0
+
+        subjects = [f"ip:{ip}"]
+        user = self._jwt_subject(authorization)
+        if user:
+            subjects.append(f"user:{user}")
+
+        return limits.backend.hit([
+            (f"{target}|{spec}|{subject}", capacity, rate)
+            for spec, capacity, rate in rules
+            for subject in subjects
+        ])
+
+    def _check(self):
+        if request.method == "OPTIONS":
+            return None
+        wait = self.wait_for(request.endpoint, request.blueprint, request.remote_addr,
+                             request.headers.get("Authorization", ""))
+        if wait > 0:
+            return (json_response({"error": "Too many requests, slow down"}), 429,
+                    {"Retry-After": str(max(1, math.ceil(wait)))})
+        return None
+
+
+limiter = RateLimiter()
@@ -0,0 +1,212 @@
+"""
+Daily sales rollups.
+
+`daily_sales` / `daily_product_sales` are maintained incrementally by the
+write paths (checkout, admin status changes) inside the caller's transaction,
+so the admin dashboard never has to scan orders/order_items.
+Only orders in COUNTED_STATUSES contribute; canceling an order subtracts it,
+reinstating it adds it back.
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Iterable, Tuple
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import and_, delete, func, insert, select, union_all, update
+
+from .models import (db, ArchivedOrder, ArchivedOrderItem, DailySales, DailyProductSales, Order, OrderItem,
+                     OrderStatus)
+
+COUNTED_STATUSES = (OrderStatus.placed, OrderStatus.complete)
+
+# (product_id, qty, unit_price_cents)
+Line = Tuple[int, int, int]
+
+
+def order_lines(order: Order) -> list[Line]:
+    return [(oi.product_id, oi.qty, oi.price_snapshot_cents) for oi in order.items]
+
+
+def _upsert_add(model, key: dict, deltas: dict) -> None:
+    """INSERT the row or add `deltas` to the existing counters, atomically where the dialect allows."""
+    table = model.__table__
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        stmt = dialect_insert(table).values(**key, **deltas)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(key),
+            set_={col: table.c[col] + stmt.excluded[col] for col in deltas},
+        )
+        db.session.execute(stmt)
+        return
+
+    where = and_(*(table.c[k] == v for k, v in key.items()))
+    res = db.session.execute(
+        update(table).where(where).values({col: table.c[col] + v for col, v in deltas.items()})
+    )
+    if res.rowcount == 0:
+        db.session.execute(insert(table).values(**key, **deltas))
+
+
+def apply_orders(day: date, orders: Iterable[Iterable[Line]], sign: int = 1) -> None:
+    """Add (sign=1) or remove (sign=-1) a batch of orders, all created on `day`, from the rollups."""
+    order_count = 0
+    per_product: dict[int, list] = defaultdict(lambda: [0, 0, 0])
+    for lines in orders:
+        seen = set()
+        for product_id, qty, price in lines:
+            bucket = per_product[product_id]
+            if product_id not in seen:
+                bucket[0] += 1
+                seen.add(product_id)
+            bucket[1] += qty
+            bucket[2] += qty * price
+        if seen:
+            order_count += 1
+
+    if not order_count:
+        return
+
+    units = sum(u for _, u, _ in per_product.values())
+    revenue = sum(r for _, _, r in per_product.values())
+
+    _upsert_add(DailySales, {"day": day}, {
+        "order_count": sign * order_count,
+        "units": sign * units,
+        "revenue_cents": sign * revenue,
+    })
+    for product_id, (p_orders, p_units, p_revenue) in per_product.items():
+        _upsert_add(DailyProductSales, {"day": day, "product_id": product_id}, {
+            "order_count": sign * p_orders,
+            "units": sign * p_units,
+            "revenue_cents": sign * p_revenue,
+        })
+
+
+def apply_order(day: date, lines: Iterable[Line], sign: int = 1) -> None:
+    """Add (sign=1) or remove (sign=-1) one order's lines from the rollups for `day`."""
+    apply_orders(day, [lines], sign)
+
+
+def apply_status_change(order: Order, old_status: OrderStatus, new_status: OrderStatus) -> None:
+    was_counted = old_status in COUNTED_STATUSES
+    now_counted = new_status in COUNTED_STATUSES
+    if was_counted == now_counted:
+        return
+    apply_order(order.created_at.date(), order_lines(order), 1 if now_counted else -1)
+
+
+def apply_bulk_status_change(changes: Iterable[Tuple[int, datetime, OrderStatus, OrderStatus]]) -> None:
+    """
+    Set-based counterpart of apply_status_change for (order_id, created_at, old, new) tuples.
+    Loads the affected order lines in one query and applies one delta per (day, direction).
+    """
+    signs: dict[int, Tuple[date, int]] = {}
+    for order_id, created_at, old_status, new_status in changes:
+        was_counted = old_status in COUNTED_STATUSES
+        now_counted = new_status in COUNTED_STATUSES
+        if was_counted != now_counted:
+            signs[order_id] = (created_at.date(), 1 if now_counted else -1)
+    if not signs:
+        return
+
+    lines_by_order: dict[int, list[Line]] = defaultdict(list)
+    rows = db.session.execute(
+        select(OrderItem.order_id, OrderItem.product_id, OrderItem.qty, OrderItem.price_snapshot_cents)
+        .where(OrderItem.order_id.in_(list(signs)))
+    )
+    for order_id, product_id, qty, price in rows:
+        lines_by_order[order_id].append((product_id, qty, price))
+
+    batches: dict[Tuple[date, int], list] = defaultdict(list)
+    for order_id, key in signs.items():
+        batches[key].append(lines_by_order[order_id])
+    for (day, sign), orders in batches.items():
+        apply_orders(day, orders, sign)
+
+
+def rebuild(start: date | None = None, end: date | None = None) -> int:
+    """
+    Recompute rollups from orders/order_items (live and archived) for [start, end] (inclusive, either side open).
+    Runs in the current transaction; the caller commits. Returns the number of days written.
+    """
+    # archived orders (see archive.py) still count; read both tables as one
+    lines = union_all(*(
+        select(o.id, o.created_at, o.status, i.product_id, i.qty, i.price_snapshot_cents)
+        .join(i, i.order_id == o.id)
+        for o, i in ((Order, OrderItem), (ArchivedOrder, ArchivedOrderItem))
+    )).subquery()
+
+    day_expr = func.date(lines.c.created_at)
+    order_filters = [lines.c.status.in_(COUNTED_STATUSES)]
+    if start:
+        order_filters.append(lines.c.created_at >= datetime.combine(start, datetime.min.time()))
+    if end:
+        order_filters.append(lines.c.created_at < datetime.combine(end + timedelta(days=1), datetime.min.time()))
+
+    for model in (DailyProductSales, DailySales):
+        stmt = delete(model)
+        if start:
+            stmt = stmt.where(model.day >= start)
+        if end:
+            stmt = stmt.where(model.day <= end)
+        db.session.execute(stmt)
+
+    revenue_expr = func.sum(lines.c.qty * lines.c.price_snapshot_cents)
+
+    per_product = (
+        select(
+            day_expr,
+            lines.c.product_id,
+            func.count(func.distinct(lines.c.id)),
+            func.sum(lines.c.qty),
+            revenue_expr,
+        )
+        .where(*order_filters)
+        .group_by(day_expr, lines.c.product_id)
+    )
+    db.session.execute(
+        insert(DailyProductSales).from_select(
+            ["day", "product_id", "order_count", "units", "revenue_cents"], per_product
+        )
+    )
+
+    per_day = (
+        select(
+            day_expr,
+            func.count(func.distinct(lines.c.id)),
+            func.sum(lines.c.qty),
+            revenue_expr,
+        )
+        .where(*order_filters)
+        .group_by(day_expr)
+    )
+    res = db.session.execute(
+        insert(DailySales).from_select(["day", "order_count", "units", "revenue_cents"], per_day)
+    )
+    return res.rowcount
+
+
+# ---------- CLI ----------
+
+rollups_cli = AppGroup("rollups", help="Maintain the daily sales rollup tables.")
+
+
+@rollups_cli.command("rebuild")
+@click.option("--from", "start", type=click.DateTime(formats=["%Y-%m-%d"]), default=None,
+              help="First day to rebuild (YYYY-MM-DD). Defaults to the beginning of time.")
+@click.option("--to", "end", type=click.DateTime(formats=["%Y-%m-%d"]), default=None,
+              help="Last day to rebuild (YYYY-MM-DD). Defaults to today and beyond.")
+def rebuild_command(start, end):
+    """Backfill rollups from orders/order_items."""
+    days = rebuild(start.date() if start else None, end.date() if end else None)
+    db.session.commit()
+    click.echo(f"Rebuilt sales rollups for {days} day(s).")
@@ -0,0 +1,154 @@
+"""
+Read/write routing between the primary database and an optional read replica.
+
+Views decorated with `@read_only` run their queries on the "replica" bind
+(SQLALCHEMY_REPLICA_URI). Everything else, plus any INSERT/UPDATE/DELETE or
+flush, stays on the primary. After a successful write request, the caller
+(user id from the JWT, else client IP) is pinned to the primary for
+REPLICA_PIN_SECONDS so they read their own writes while the replica catches up.
+Signup and login have no JWT yet, so they also pin the user they return
+(`pin_user`); the client's next request carries that user's token.
+
+Pins are kept per process. Behind several workers, a follow-up read may land
+on a worker that hasn't seen the pin, so keep REPLICA_PIN_SECONDS longer than
+the expected replica lag.
+
+For local testing with SQLite, `flask replica sync` copies the primary file
+into the replica file with SQLite's online backup API.
+"""
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from functools import wraps
+
+import click
+from flask import current_app, g, request
+from flask.cli import AppGroup
+from flask_sqlalchemy.session import Session
+from sqlalchemy.sql.dml import UpdateBase
+
+REPLICA_BIND = "replica"
+
+_pins: dict[str, float] = {}
+_pins_lock = threading.Lock()
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None
+            and not self._flushing
+            and not isinstance(clause, UpdateBase)
+            and g and g.get("db_read_only")
+        ):
+            replica = self._db.engines.get(REPLICA_BIND)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _subject() -> str:
+    from flask_jwt_extended import get_jwt_identity
+    try:
+        identity = get_jwt_identity()
+    except RuntimeError:
+        identity = None
+    return f"user:{identity}" if identity else f"ip:{request.remote_addr}"
+
+
+def _is_pinned(subject: str) -> bool:
+    until = _pins.get(subject)
+    if until is None:
+        return False
+    if until < time.monotonic():
+        with _pins_lock:
+            _pins.pop(subject, None)
+        return False
+    return True
+
+
+def read_only(fn):
+    """Serve this view from the replica unless the caller just wrote. Put it below @jwt_required()."""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        if REPLICA_BIND in current_app.config.get("SQLALCHEMY_BINDS", {}) and not _is_pinned(_subject()):
+            g.db_read_only = True
+        return fn(*args, **kwargs)
+    return wrapper
+
+
+def pin_user(user_id: int) -> None:
+    """Also pin `user_id` after this request, for writes made before the caller has a JWT."""
+    g.db_pin_user = user_id
+
+
+def _pin_after_write(response):
+    """
+    Pin the caller to the primary after a successful write. The pin lives in this
+    process only: another worker still serves the caller's reads from the replica.
+    """
+    if request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+        subjects = {_subject()}
+        if g.get("db_pin_user") is not None:
+            subjects.add(f"user:{g.db_pin_user}")
+        until = time.monotonic() + current_app.config["REPLICA_PIN_SECONDS"]
+        with _pins_lock:
+            if len(_pins) > 100_000:
+                now = time.monotonic()
+                for key in [k for k, v in _pins.items() if v < now]:
+                    del _pins[key]
+            for subject in subjects:
+                _pins[subject] = until
+    return response
+
+
+def init_app(app) -> None:
+    """Register the replica bind (before db.init_app) and the write pin hook."""
+    uri = app.config.get("SQLALCHEMY_REPLICA_URI")
+    if not uri:
+        return
+    binds = dict(app.config.get("SQLALCHEMY_BINDS") or {})
+    binds[REPLICA_BIND] = uri  # picks up SQLALCHEMY_ENGINE_OPTIONS like the primary
+    app.config["SQLALCHEMY_BINDS"] = binds
+    app.after_request(_pin_after_write)
+    app.cli.add_command(replica_cli)
+
+
+# ---------- local replica copier (SQLite only) ----------
+
+def _sqlite_path(uri: str) -> str:
+    from sqlalchemy.engine import make_url
+    url = make_url(uri)
+    if url.get_backend_name() != "sqlite" or not url.database:
+        raise click.ClickException("replica sync only supports file-backed SQLite databases")
+    return url.database
+
+
+def sync_sqlite(primary_path: str, replica_path: str) -> None:
+    src = sqlite3.connect(primary_path)
+    dst = sqlite3.connect(replica_path)
+    try:
+        src.backup(dst)
+    finally:
+        dst.close()
+        src.close()
+
+
+replica_cli = AppGroup("replica", help="Local read-replica helpers.")
+
+
+@replica_cli.command("sync")
+@click.option("--interval", type=float, default=0, help="Keep copying every N seconds (0 = copy once).")
+def sync_command(interval):
+    """Copy the primary SQLite database into the replica file."""
+    from .models import db
+    primary = _sqlite_path(str(db.engine.url))
+    replica = _sqlite_path(str(db.engines[REPLICA_BIND].url))
+    while True:
+        sync_sqlite(primary, replica)
+        click.echo(f"synced {primary} -> {replica}")
+        if interval <= 0:
+            break
+        time.sleep(interval)
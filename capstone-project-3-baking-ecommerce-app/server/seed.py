@@ -1,54 +1,296 @@
-import os
-from dotenv import load_dotenv
-from .app import create_app
-from .models import db, Product
+"""
+`flask seed`: demo and synthetic data.
 
-load_dotenv()                     
-app = create_app()
+    flask --app server.wsgi seed                                # the demo catalog only
+    flask --app server.wsgi seed --users 100000 --products 50000 --orders 1000000 --carts 20000
+    flask --app server.wsgi seed --orders 5000 --append         # add to what's there
+
+Rows are generated deterministically from --seed and --anchor (the "today"
+the data is built around) and written with Core executemany inserts, one
+transaction per --batch-size rows. By default every table is dropped and
+recreated first; --append keeps existing rows and continues after them.
+
+Orders respect the bakery's one-active-order-per-day rule. They fall in a
+window from ten years before the anchor to a year after it: each free day
+nearest the anchor, about half before it and half after, gets one order,
+complete (a few canceled) before the anchor and placed from it on. Orders
+beyond the free days are canceled ones spread across the window, at most
+MAX_ORDERS_PER_DAY a day. Sales rollups are rebuilt at the end.
+"""
+from __future__ import annotations
+
+import heapq
+import random
+from datetime import date, datetime, time, timedelta
+
+import click
+from sqlalchemy import bindparam, func, select, text
+
+from .models import db, User, Product, Cart, CartItem, Order, OrderItem, ArchivedOrder, ArchivedOrderItem
+from .enums import UserRole, CartStatus, OrderStatus, FulfillmentMethod
+from . import hashing, pricetable, rollups
 
 # some sample desserts
 SEED_PRODUCTS = [
     {
         "name": "Classic Carrot Cake",
         "description": "Moist carrot cake with cream cheese frosting",
-        "price": 24.00,
+        "price_cents": 2400,
         "image_url": "/images/carrot_cake.jpeg",
         "allergens_csv": "gluten,dairy,nuts",
     },
     {
         "name": "Chocolate Brownie Box",
         "description": "12 decadent chocolate brownies",
-        "price": 18.00,
+        "price_cents": 1800,
         "image_url": "/images/brownies.jpeg",
         "allergens_csv": "gluten,dairy,eggs",
     },
     {
         "name": "Macaron Assortment",
         "description": "12 assorted French macarons",
-        "price": 22.00,
+        "price_cents": 2200,
         "image_url": "/images/macarons.jpeg",
         "allergens_csv": "nuts,eggs,dairy",
     },
 ]
 
+FLAVORS = ["Chocolate", "Vanilla", "Lemon", "Raspberry", "Salted Caramel", "Pistachio", "Matcha", "Espresso",
+           "Coconut", "Strawberry", "Hazelnut", "Cinnamon", "Blueberry", "Maple", "Almond", "Passion Fruit"]
+KINDS = ["Layer Cake", "Cupcakes", "Cheesecake", "Tart", "Cookies", "Brownies", "Macarons", "Pie",
+         "Bundt Cake", "Eclairs", "Scones", "Roll Cake", "Blondies", "Pavlova", "Madeleines", "Donuts"]
+ALLERGENS = ["gluten", "dairy", "eggs", "nuts", "soy"]
+SEED_PASSWORD = "password"
+MAX_PAST_DAYS = 3650
+MAX_FUTURE_DAYS = 365
+MAX_ORDERS_PER_DAY = 2500
+
+
+# ids of archived rows are never reused, so new live rows start past them too
+_ARCHIVES = {Order: ArchivedOrder, OrderItem: ArchivedOrderItem}
+
+
+def _next_id(model) -> int:
+    used = [db.session.execute(select(func.max(m.id))).scalar() or 0 for m in (model, _ARCHIVES.get(model)) if m]
+    return max(used) + 1
+
+
+def _insert(table, rows, batch_size: int) -> int:
+    """executemany `rows` into `table`, committing every `batch_size` rows."""
+    batch, total = [], 0
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            db.session.execute(table.insert(), batch)
+            db.session.commit()
+            total += len(batch)
+            batch = []
+    if batch:
+        db.session.execute(table.insert(), batch)
+        db.session.commit()
+        total += len(batch)
+    return total
+
+
+def _reset_sequences() -> None:
+    # explicit ids bypass Postgres sequences; move them past what was inserted
+    if db.engine.dialect.name != "postgresql":
+        return
+    for model in (User, Product, Cart, CartItem, Order, OrderItem):
+        table = model.__tablename__
+        db.session.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), GREATEST({_next_id(model) - 1}, 1))"
+        ))
+    db.session.commit()
+
+
+def generate(*, users: int = 0, products: int = 0, orders: int = 0, carts: int = 0, seed: int = 1,
+             anchor: date | None = None, batch_size: int = 5000, reset: bool = True, echo=lambda msg: None) -> dict:
+    """
+    Write the demo catalog plus the requested synthetic rows. Runs inside an app context.
+    Returns the id range generated for each table ({"products": (first, last), ...}).
+    """
+    rnd = random.Random(seed)
+    anchor = anchor or date.today()
+    now = datetime.combine(anchor, time(12, 0))
+    window = [anchor + timedelta(days=d) for d in range(-MAX_PAST_DAYS, MAX_FUTURE_DAYS)]
+    if orders > len(window) * MAX_ORDERS_PER_DAY:
+        raise click.ClickException(
+            f"--orders {orders} doesn't fit: at most {MAX_ORDERS_PER_DAY} a day over {len(window)} days "
+            f"({len(window) * MAX_ORDERS_PER_DAY})"
+        )
 
-def seed():
-    with app.app_context():
-        db.drop_all()              
+    if reset:
+        db.drop_all()
         db.create_all()
 
-        for prod in SEED_PRODUCTS:
-            p = Product(
-                name=prod["name"],
-                description=prod["description"],
-                price=prod["price"],
-                image_url=prod["image_url"],
-                allergens_csv=prod["allergens_csv"],
-            )
-            db.session.add(p)
+    # ---- products: the demo catalog first (on a fresh database), then synthetic ----
+    first_product = _next_id(Product)
+    catalog = list(SEED_PRODUCTS) if first_product == 1 else []
 
+    def product_rows():
+        for n, demo in enumerate(catalog):
+            yield {"id": first_product + n, **demo, "is_active": True, "created_at": now}
+        for n in range(len(catalog), len(catalog) + products):
+            pid = first_product + n
+            yield {
+                "id": pid,
+                "name": f"{rnd.choice(FLAVORS)} {rnd.choice(KINDS)} #{pid}",
+                "description": "Baked fresh to order",
+                "price_cents": rnd.randrange(400, 4825, 25),
+                "image_url": f"/images/product_{pid % 40}.jpeg",
+                "allergens_csv": ",".join(a for a in ALLERGENS if rnd.random() < 0.35),
+                "is_active": rnd.random() >= 0.02,
+                "created_at": now - timedelta(days=rnd.randint(0, 720)),
+            }
+
+    n_products = _insert(Product.__table__, product_rows(), batch_size)
+    echo(f"products: {n_products}")
+    last_product = first_product + n_products - 1
+
+    # ---- users: one admin on a fresh database, then customers sharing one password hash ----
+    first_user = _next_id(User)
+    pwhash = hashing.hash_password(SEED_PASSWORD) if users else None
+
+    def user_rows():
+        for n in range(users):
+            uid = first_user + n
+            admin = uid == 1
+            yield {
+                "id": uid,
+                "email": "admin@example.com" if admin else f"customer{uid}@example.com",
+                "password_hash": pwhash,
+                "role": UserRole.admin if admin else UserRole.customer,
+                "token_version": 0,
+                "created_at": now - timedelta(days=rnd.randint(0, 1500), seconds=rnd.randint(0, 86399)),
+            }
+
+    n_users = _insert(User.__table__, user_rows(), batch_size)
+    echo(f"users: {n_users}")
+    last_user = first_user + n_users - 1
+    customers = (max(first_user, 2), last_user)
+
+    if orders or carts:
+        active = db.session.execute(
+            select(Product.id, Product.price_cents).where(Product.is_active.is_(True))
+        ).all()
+        if not active:
+            raise click.ClickException("Orders and carts need at least one active product")
+        if customers[0] > customers[1]:
+            customers = (1, (db.session.execute(select(func.max(User.id))).scalar() or 0))
+            if customers[1] == 0:
+                raise click.ClickException("Orders and carts need at least one user")
+
+    # ---- orders: one active order on each free day nearest the anchor, canceled ones past that ----
+    first_order = _next_id(Order)
+    booked = set(db.session.execute(
+        select(Order.fulfillment_date).where(
+            Order.fulfillment_date.between(window[0], window[-1]), Order.status.in_(rollups.COUNTED_STATUSES),
+        )
+    ).scalars()) if orders else set()
+    past = [day for day in reversed(window[:MAX_PAST_DAYS]) if day not in booked]
+    future = [day for day in window[MAX_PAST_DAYS:] if day not in booked]
+    n_past = min(orders // 2, len(past))
+    n_future = min(orders - n_past, len(future))
+    n_past = min(orders - n_future, len(past))
+    active_days = sorted(past[:n_past] + future[:n_future])
+    extra = orders - len(active_days)
+    totals: dict[int, int] = {}
+
+    def order_rows():
+        # both streams are in date order, so ids follow fulfillment dates
+        plan = heapq.merge(
+            ((day, True) for day in active_days),
+            ((window[k * len(window) // extra], False) for k in range(extra)),
+        )
+        for n, (day, active) in enumerate(plan):
+            if not active:
+                status = OrderStatus.canceled
+            elif day < anchor:
+                status = OrderStatus.canceled if rnd.random() < 0.05 else OrderStatus.complete
+            else:
+                status = OrderStatus.placed
+            created = datetime.combine(min(day, anchor), time(rnd.randint(7, 20), rnd.randint(0, 59)))
+            method = FulfillmentMethod.delivery if rnd.random() < 0.3 else FulfillmentMethod.pickup
+            row = {
+                "id": first_order + n,
+                "user_id": rnd.randint(*customers),
+                "fulfillment_date": day,
+                "requested_time": time(rnd.randint(9, 17), rnd.choice((0, 30))),
+                "fulfillment_method": method,
+                "status": status,
+                "total_cents": 0,
+                "created_at": created - timedelta(days=rnd.randint(1, 14)),
+                # executemany needs the same keys in every row
+                "delivery_name": None, "delivery_line1": None, "delivery_line2": None,
+                "delivery_city": None, "delivery_state": None, "delivery_zip": None,
+            }
+            if method is FulfillmentMethod.delivery:
+                row.update(delivery_name="Sam Baker", delivery_line1=f"{rnd.randint(1, 9999)} Main St",
+                           delivery_city="Springfield", delivery_state="IL", delivery_zip=f"{rnd.randint(60000, 62999)}")
+            yield row
+
+    def order_item_rows():
+        for n in range(orders):
+            oid = first_order + n
+            total = 0
+            for pid, price in rnd.sample(active, k=min(len(active), rnd.randint(1, 4))):
+                qty = rnd.randint(1, 3)
+                total += qty * price
+                yield {"order_id": oid, "product_id": pid, "qty": qty, "price_snapshot_cents": price}
+            totals[oid] = total
+
+    n_orders = _insert(Order.__table__, order_rows(), batch_size)
+    _insert(OrderItem.__table__, order_item_rows(), batch_size)
+    orders_t = Order.__table__
+    set_total = orders_t.update().where(orders_t.c.id == bindparam("oid")).values(total_cents=bindparam("total"))
+    pending = [{"oid": oid, "total": total} for oid, total in totals.items()]
+    for lo in range(0, len(pending), batch_size):
+        db.session.execute(set_total, pending[lo:lo + batch_size])
         db.session.commit()
-        print(f"Seeded {len(SEED_PRODUCTS)} products.")
+    echo(f"orders: {n_orders}")
+
+    # ---- carts: a draft cart for the first customers that don't have one yet ----
+    first_cart = _next_id(Cart)
+    has_draft = set(db.session.execute(select(Cart.user_id).where(Cart.status == CartStatus.draft)).scalars())
+    cart_owners = [uid for uid in range(customers[0], customers[1] + 1) if uid not in has_draft][:carts] if carts else []
+
+    n_carts = _insert(Cart.__table__, (
+        {"id": first_cart + n, "user_id": uid, "status": CartStatus.draft, "created_at": now, "updated_at": now}
+        for n, uid in enumerate(cart_owners)
+    ), batch_size)
+    _insert(CartItem.__table__, (
+        {"cart_id": first_cart + n, "product_id": pid, "qty": rnd.randint(1, 3)}
+        for n in range(n_carts)
+        for pid, _price in rnd.sample(active, k=min(len(active), rnd.randint(1, 3)))
+    ), batch_size)
+    echo(f"carts: {n_carts}")
+
+    _reset_sequences()
+    if n_orders:
+        rollups.rebuild()
+        db.session.commit()
+    pricetable.rebuild()  # Core inserts don't trigger the after-commit rebuild
+
+    return {
+        "products": (first_product, last_product),
+        "users": (first_user, last_user),
+        "orders": (first_order, first_order + n_orders - 1),
+        "carts": (first_cart, first_cart + n_carts - 1),
+    }
+
 
-if __name__ == "__main__":
-    seed()
+@click.command("seed")
+@click.option("--users", type=int, default=0, show_default=True, help="Users to create (the first one on a fresh database is the admin).")
+@click.option("--products", type=int, default=0, show_default=True, help="Synthetic products, on top of the demo catalog.")
+@click.option("--orders", type=int, default=0, show_default=True, help="Orders: one active per free fulfillment day near --anchor, canceled ones beyond that.")
+@click.option("--carts", type=int, default=0, show_default=True, help="Draft carts with a few items each.")
+@click.option("--seed", "seed_", type=int, default=1, show_default=True, help="Random seed.")
+@click.option("--anchor", type=click.DateTime(["%Y-%m-%d"]), default=None, help="Date the data is built around (default: today).")
+@click.option("--batch-size", type=int, default=5000, show_default=True, help="Rows per insert/transaction.")
+@click.option("--append", is_flag=True, help="Keep existing data and add to it instead of dropping all tables.")
+def seed_command(users, products, orders, carts, seed_, anchor, batch_size, append):
+    """Seed the demo catalog and, optionally, bulk synthetic data."""
+    generate(users=users, products=products, orders=orders, carts=carts, seed=seed_,
+             anchor=anchor.date() if anchor else None, batch_size=batch_size, reset=not append, echo=click.echo)
+    click.echo("Seeded.")
@@ -0,0 +1,178 @@
+"""
+Response serialization.
+
+The encoders below build the same JSON shapes as the models' `to_dict()`, but
+read columns with one precompiled `attrgetter` call per object and leave
+datetimes, dates and enums as-is for the JSON backend to encode natively.
+`json_response()` encodes straight to bytes with orjson when it is installed,
+and with the stdlib `json` module otherwise.
+"""
+from __future__ import annotations
+
+import enum
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from functools import lru_cache
+from operator import attrgetter
+
+from flask import current_app
+
+from .enums import FulfillmentMethod
+from .money import to_dollars
+
+try:
+    import orjson
+except ImportError:  # optional fast backend
+    orjson = None
+
+
+def _default(obj):
+    if isinstance(obj, enum.Enum):
+        return obj.value
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, datetime):
+        return obj.isoformat() + "Z"
+    if isinstance(obj, (date, time)):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+_encoder = json.JSONEncoder(default=_default, separators=(",", ":"), ensure_ascii=False)
+
+
+def stdlib_dumps(obj) -> bytes:
+    return _encoder.encode(obj).encode("utf-8")
+
+
+if orjson is not None:
+    # naive datetimes are UTC throughout the app and go out as "...Z", like isoformat() + "Z"
+    _ORJSON_OPTS = orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z
+
+    def dumps(obj) -> bytes:
+        return orjson.dumps(obj, default=_default, option=_ORJSON_OPTS)
+else:
+    dumps = stdlib_dumps
+
+
+def json_response(payload, status: int = 200):
+    return current_app.response_class(dumps(payload), status=status, mimetype="application/json")
+
+
+# ---------- per-model encoders ----------
+
+@lru_cache(maxsize=4096)
+def _allergens(csv: str) -> tuple:
+    return tuple(a for a in csv.split(",") if a.strip()) if csv else ()
+
+
+_user_cols = attrgetter("id", "email", "role", "created_at")
+
+
+def user(u) -> dict:
+    """Works for User rows and identity.UserSnapshot alike."""
+    id_, email, role, created_at = _user_cols(u)
+    return {"id": id_, "email": email, "role": role, "created_at": created_at}
+
+
+_product_cols = attrgetter("id", "name", "description", "price_cents", "image_url", "allergens_csv", "is_active")
+
+
+def product(p) -> dict:
+    id_, name, description, price_cents, image_url, allergens_csv, is_active = _product_cols(p)
+    return {
+        "id": id_,
+        "name": name,
+        "description": description,
+        "price": to_dollars(price_cents),
+        "image_url": image_url,
+        "allergens": _allergens(allergens_csv),
+        "is_active": is_active,
+    }
+
+
+_cart_item_cols = attrgetter("id", "cart_id", "product_id", "qty", "product")
+
+
+def _cart_item(ci) -> tuple[dict, int]:
+    id_, cart_id, product_id, qty, prod = _cart_item_cols(ci)
+    line_cents = qty * prod.price_cents if prod else 0
+    return {
+        "id": id_,
+        "cart_id": cart_id,
+        "product_id": product_id,
+        "qty": qty,
+        "product": product(prod) if prod else None,
+        "line_total": to_dollars(line_cents),
+    }, line_cents
+
+
+def cart_item(ci) -> dict:
+    return _cart_item(ci)[0]
+
+
+_cart_cols = attrgetter("id", "user_id", "status", "items", "updated_at")
+
+
+def cart(c) -> dict:
+    id_, user_id, status, items, updated_at = _cart_cols(c)
+    encoded, total_cents = [], 0
+    for ci in items:
+        entry, line_cents = _cart_item(ci)
+        encoded.append(entry)
+        total_cents += line_cents
+    return {
+        "id": id_,
+        "user_id": user_id,
+        "status": status,
+        "items": encoded,
+        "total": to_dollars(total_cents),
+        "updated_at": updated_at,
+    }
+
+
+_order_item_cols = attrgetter("id", "order_id", "product_id", "qty", "price_snapshot_cents", "product")
+
+
+def order_item(oi) -> dict:
+    id_, order_id, product_id, qty, price_cents, prod = _order_item_cols(oi)
+    return {
+        "id": id_,
+        "order_id": order_id,
+        "product_id": product_id,
+        "qty": qty,
+        "price_snapshot": to_dollars(price_cents),
+        "line_total": to_dollars(qty * price_cents),
+        "product": product(prod) if prod else None,
+    }
+
+
+_order_cols = attrgetter(
+    "id", "user_id", "fulfillment_date", "requested_time", "fulfillment_method",
+    "status", "total_cents", "items", "created_at",
+)
+_delivery_cols = attrgetter(
+    "delivery_name", "delivery_line1", "delivery_line2", "delivery_city", "delivery_state", "delivery_zip",
+)
+
+
+def order(o) -> dict:
+    id_, user_id, fdate, rtime, method, status, total_cents, items, created_at = _order_cols(o)
+    if method is FulfillmentMethod.delivery:
+        name, line1, line2, city, state, zip_ = _delivery_cols(o)
+        delivery = {"name": name, "line1": line1, "line2": line2, "city": city, "state": state, "zip": zip_}
+    else:
+        delivery = None
+    return {
+        "id": id_,
+        "user_id": user_id,
+        "fulfillment_date": fdate,
+        "requested_time": rtime.isoformat(timespec="minutes") if rtime else None,
+        "fulfillment_method": method,
+        "status": status,
+        "total": to_dollars(total_cents),
+        "items": [order_item(oi) for oi in items],
+        "created_at": created_at,
+        "delivery": delivery,
+    }
@@ -0,0 +1,98 @@
+"""
+Spoonacular request/response mapping shared by the sync blueprint
+(products.py) and the async handlers (asgi.py), so both paths answer with
+identical bodies.
+"""
+from __future__ import annotations
+
+import os
+
+from .models import db, Product
+from .money import to_cents, to_dollars
+
+SPOONACULAR_KEY = os.getenv("SPOONACULAR_API_KEY")
+BASE_URL = os.getenv("SPOONACULAR_BASE_URL", "https://api.spoonacular.com/recipes/")  # point at a stub for benchmarks
+SPOONACULAR_PRICES_CENTS = {
+    1095742: 2400,   # Carrot Cake (example)
+    782622: 1600,    # Brownies (example)
+    "default": 1400,
+}
+
+SEARCH_ERROR = "Spoonacular API unavailable"
+INFO_ERROR = "Dessert not found"
+
+
+# each upstream call as (operation label for metrics, path under BASE_URL, params, error message)
+
+def search_request(query: str, number: int) -> tuple[str, str, dict, str]:
+    params = {"query": query, "type": "dessert", "number": number, "addRecipeNutrition": False}
+    return "search", "complexSearch", params, SEARCH_ERROR
+
+
+def info_request(recipe_id: int) -> tuple[str, str, dict, str]:
+    return "information", f"{recipe_id}/information", {"includeNutrition": False}, INFO_ERROR
+
+
+def _price_cents(recipe_id) -> int:
+    return SPOONACULAR_PRICES_CENTS.get(recipe_id, SPOONACULAR_PRICES_CENTS["default"])
+
+
+def _allergens(data: dict) -> list[str]:
+    allergens = []
+    if data.get("glutenFree") is False:
+        allergens.append("contains-gluten")
+    if data.get("dairyFree") is False:
+        allergens.append("contains-dairy")
+    return allergens
+
+
+def desserts(data: dict) -> list[dict]:
+    return [{
+        "id": r["id"],
+        "name": r["title"],
+        "image_url": r.get("image"),
+        "price": to_dollars(_price_cents(r["id"])),
+        "is_active": True,
+    } for r in data.get("results", [])]
+
+
+def dessert_detail(data: dict) -> dict:
+    return {
+        "id": data["id"],
+        "name": data["title"],
+        "image_url": data.get("image"),
+        "price": to_dollars(_price_cents(data["id"])),
+        "allergens": _allergens(data),
+        "instructions": data.get("instructions"),
+        "is_active": True,
+    }
+
+
+def ingest(recipe_id: int, data: dict, body: dict) -> tuple[Product, bool]:
+    """Create (or reuse) the local Product for a fetched recipe. Returns (product, created)."""
+    name = (data.get("title") or f"Spoonacular #{recipe_id}").strip()
+    image_url = data.get("image")
+
+    # allow client to override price, otherwise use default mapping
+    price = body.get("price")
+    if isinstance(price, (int, float)) and not isinstance(price, bool) and price >= 0:
+        price_cents = to_cents(price)
+    else:
+        price_cents = _price_cents(recipe_id)
+
+    # reuse existing local product if we’ve already ingested the same recipe
+    existing = Product.query.filter_by(name=name, image_url=image_url).first()
+    if existing:
+        return existing, False
+
+    p = Product(
+        name=name,
+        description=data.get("summary") or data.get("title"),
+        price_cents=price_cents,
+        image_url=image_url,
+        allergens_csv=",".join(_allergens(data)),
+        is_active=True,
+    )
+    db.session.add(p)
+    db.session.commit()
+    return p, True
@@ -0,0 +1,312 @@
+"""
+Short-lived access tokens, rotating refresh tokens, and revocation.
+
+Signup and login return a pair:
+  - an access token: the JWT that authorizes requests, valid for
+    ACCESS_TOKEN_TTL_MINUTES;
+  - a refresh token: an opaque random string, valid for REFRESH_TOKEN_TTL_DAYS.
+
+Only the refresh token's SHA-256 is stored, in `refresh_tokens`, next to the
+jti of the access token issued with it. POST /auth/refresh trades a refresh
+token for a new pair and marks the old row replaced. Every token rotated from
+one login belongs to the same family. Presenting a replaced token again means
+someone kept a copy, so the whole family is revoked.
+
+Revocation (logout, token reuse, `flask tokens revoke-user`) sets revoked_at
+on the rows, which blocklists their access tokens until they expire. The
+JWTManager blocklist loader checks each access token against a per-process
+Bloom filter of revoked jtis:
+  - a miss (almost every request) costs a few hashes and no query;
+  - a hit is confirmed against the table, so a false positive never rejects
+    a valid token.
+
+Keeping the filter current:
+  - Each process loads the filter from the table, then adds rows revoked
+    since, at most every TOKEN_BLOCKLIST_SYNC seconds. A revocation made by
+    another worker takes effect within that time.
+  - A revocation made by this process is added as soon as it commits.
+  - Bloom filters can't delete, so the filter is rebuilt from scratch every
+    TOKEN_BLOCKLIST_REBUILD seconds. The rebuild drops entries whose access
+    token has expired, and grows the filter when revocations outnumber
+    TOKEN_BLOCKLIST_CAPACITY.
+
+    flask --app server.wsgi tokens revoke-user alice@example.com
+    flask --app server.wsgi tokens prune      # drop rows whose refresh and access tokens have both expired
+"""
+from __future__ import annotations
+
+import hashlib
+import math
+import secrets
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+
+import click
+from flask import current_app, has_app_context
+from flask.cli import AppGroup
+from sqlalchemy import delete, event as sa_event, or_, select, update
+from sqlalchemy.orm import Session
+
+from .models import db, RefreshToken, User
+from . import identity
+
+_REVOKED_KEY = "_tokens_revoked"
+# a revocation stamped before the previous sync may commit after it; re-read this much overlap
+_SYNC_OVERLAP = timedelta(seconds=5)
+
+
+def _hash(raw_token: str) -> str:
+    # refresh tokens are 256 random bits, so a fast unsalted hash is enough
+    return hashlib.sha256(raw_token.encode()).hexdigest()
+
+
+class BloomFilter:
+    """Bit array sized for `capacity` strings at `error_rate` false positives."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = max(1, capacity)
+        self.size = math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str) -> list[int]:
+        # double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item: str) -> None:
+        for p in self._positions(item):
+            self._bits[p >> 3] |= 1 << (p & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[p >> 3] & (1 << (p & 7)) for p in self._positions(item))
+
+
+class Blocklist:
+    """This process's view of the revoked access-token jtis."""
+
+    def __init__(self, capacity: int, error_rate: float, sync_every: float, rebuild_every: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_every = sync_every
+        self.rebuild_every = rebuild_every
+        self._filter: Optional[BloomFilter] = None
+        self._since: Optional[datetime] = None
+        self._next_sync = self._next_rebuild = 0.0
+        self._lock = threading.Lock()
+        self.hits = self.false_positives = 0
+
+    def _revoked_jtis(self, since: Optional[datetime] = None) -> list[str]:
+        stmt = select(RefreshToken.access_jti).where(
+            RefreshToken.revoked_at.is_not(None), RefreshToken.access_expires_at > datetime.utcnow(),
+        )
+        if since is not None:
+            stmt = stmt.where(RefreshToken.revoked_at >= since)
+        # outside the request's session, so a read-only view's replica routing doesn't apply
+        with db.engine.connect() as conn:
+            return list(conn.execute(stmt).scalars())
+
+    def _sync(self) -> None:
+        started, now = datetime.utcnow(), time.monotonic()
+        if self._filter is None or now >= self._next_rebuild:
+            jtis = self._revoked_jtis()
+            fresh = BloomFilter(max(self.capacity, 2 * len(jtis)), self.error_rate)
+            for jti in jtis:
+                fresh.add(jti)
+            self._filter, self._next_rebuild = fresh, now + self.rebuild_every
+        else:
+            for jti in self._revoked_jtis(self._since):
+                self.add(jti)
+        self._since = started - _SYNC_OVERLAP
+        self._next_sync = now + self.sync_every
+
+    def _maybe_sync(self) -> None:
+        if self._filter is not None and time.monotonic() < self._next_sync:
+            return
+        # the first load blocks; later syncs are skipped while another thread runs one
+        if self._lock.acquire(blocking=self._filter is None):
+            try:
+                if self._filter is None or time.monotonic() >= self._next_sync:
+                    self._sync()
+            finally:
+                self._lock.release()
+
+    def add(self, jti: str) -> None:
+        current = self._filter
+        if current is None:
+            return  # the first load will read it from the table
+        current.add(jti)
+        if current.count > current.capacity:
+            self._next_sync = self._next_rebuild = 0.0
+
+    def is_revoked(self, jti: str) -> bool:
+        self._maybe_sync()
+        if jti not in self._filter:
+            return False
+        self.hits += 1
+        with db.engine.connect() as conn:
+            revoked = conn.execute(
+                select(RefreshToken.id).where(RefreshToken.access_jti == jti, RefreshToken.revoked_at.is_not(None))
+            ).first() is not None
+        if not revoked:
+            self.false_positives += 1
+        return revoked
+
+
+# ---------- app integration ----------
+
+def _blocklist() -> Optional[Blocklist]:
+    return current_app.extensions.get("token_blocklist") if has_app_context() else None
+
+
+def is_revoked(claims: dict) -> bool:
+    """JWTManager blocklist check for a decoded access token."""
+    jti = claims.get("jti")
+    blocklist = _blocklist()
+    return bool(jti) and blocklist is not None and blocklist.is_revoked(jti)
+
+
+def issue(user: User, family_id: Optional[str] = None) -> dict:
+    """A new access/refresh pair for `user`, stored in `family_id` (a new family by default). Caller commits."""
+    cfg = current_app.config
+    jti = str(uuid.uuid4())
+    access = identity.issue_access_token(user, jti=jti)
+    refresh = secrets.token_urlsafe(32)
+    now = datetime.utcnow()
+    db.session.add(RefreshToken(
+        user_id=user.id,
+        family_id=family_id or uuid.uuid4().hex,
+        token_hash=_hash(refresh),
+        access_jti=jti,
+        access_expires_at=now + identity.access_token_ttl(),
+        expires_at=now + timedelta(days=cfg["REFRESH_TOKEN_TTL_DAYS"]),
+    ))
+    return {"token": access, "refresh_token": refresh}
+
+
+def rotate(raw_token: str) -> Optional[dict]:
+    """
+    Trade a refresh token for a new pair, or None if it isn't valid. Presenting one that was
+    already rotated revokes its whole family. Commits either way.
+    """
+    row = db.session.execute(
+        select(RefreshToken).where(RefreshToken.token_hash == _hash(raw_token))
+    ).scalar_one_or_none()
+    now = datetime.utcnow()
+    if row is None or row.revoked_at is not None or row.expires_at <= now:
+        return None
+
+    # the conditional update settles two concurrent refreshes with the same token: one wins
+    claimed = db.session.execute(
+        update(RefreshToken)
+        .where(RefreshToken.id == row.id, RefreshToken.replaced_at.is_(None), RefreshToken.revoked_at.is_(None))
+        .values(replaced_at=now)
+    ).rowcount
+    if not claimed:
+        current_app.logger.warning("refresh token reuse for user %s; revoking family %s", row.user_id, row.family_id)
+        revoke_family(row.family_id)
+        db.session.commit()
+        return None
+
+    user = db.session.get(User, row.user_id)
+    pair = issue(user, row.family_id)
+    db.session.commit()
+    return pair
+
+
+def _revoke(*where) -> int:
+    live = (RefreshToken.revoked_at.is_(None), *where)
+    jtis = list(db.session.execute(select(RefreshToken.access_jti).where(*live)).scalars())
+    if jtis:
+        db.session.execute(update(RefreshToken).where(*live).values(revoked_at=datetime.utcnow()))
+        db.session.info.setdefault(_REVOKED_KEY, set()).update(jtis)
+    return len(jtis)
+
+
+def revoke_family(family_id: str) -> int:
+    """Revoke every token rotated from one login. Caller commits."""
+    return _revoke(RefreshToken.family_id == family_id)
+
+
+def revoke_refresh_token(raw_token: str) -> int:
+    """Logout: revoke the family this refresh token belongs to. Caller commits."""
+    family_id = db.session.execute(
+        select(RefreshToken.family_id).where(RefreshToken.token_hash == _hash(raw_token))
+    ).scalar()
+    return revoke_family(family_id) if family_id else 0
+
+
+def revoke_user(user_id: int) -> int:
+    """Revoke every refresh token and every unexpired access token of a user. Caller commits."""
+    now = datetime.utcnow()
+    return _revoke(
+        RefreshToken.user_id == user_id,
+        or_(RefreshToken.expires_at > now, RefreshToken.access_expires_at > now),
+    )
+
+
+def _note_revoked(jtis: Iterable[str]) -> None:
+    blocklist = _blocklist()
+    if blocklist is not None:
+        for jti in jtis:
+            blocklist.add(jti)
+
+
+@sa_event.listens_for(Session, "after_commit")
+def _add_committed_revocations(session):
+    _note_revoked(session.info.pop(_REVOKED_KEY, ()))
+
+
+@sa_event.listens_for(Session, "after_rollback")
+def _drop_pending_revocations(session):
+    session.info.pop(_REVOKED_KEY, None)
+
+
+def init_app(app) -> None:
+    cfg = app.config
+    cfg.setdefault("ACCESS_TOKEN_TTL_MINUTES", 15)
+    cfg.setdefault("REFRESH_TOKEN_TTL_DAYS", 30)
+    cfg.setdefault("TOKEN_BLOCKLIST_CAPACITY", 100_000)
+    cfg.setdefault("TOKEN_BLOCKLIST_ERROR_RATE", 0.001)
+    cfg.setdefault("TOKEN_BLOCKLIST_SYNC", 5)
+    cfg.setdefault("TOKEN_BLOCKLIST_REBUILD", 900)
+    app.extensions["token_blocklist"] = Blocklist(
+        cfg["TOKEN_BLOCKLIST_CAPACITY"], cfg["TOKEN_BLOCKLIST_ERROR_RATE"],
+        cfg["TOKEN_BLOCKLIST_SYNC"], cfg["TOKEN_BLOCKLIST_REBUILD"],
+    )
+
+
+# ---------- CLI ----------
+
+tokens_cli = AppGroup("tokens", help="Refresh tokens and revocation.")
+
+
+@tokens_cli.command("revoke-user")
+@click.argument("email")
+def revoke_user_command(email):
+    """Sign a user out everywhere: revoke all their refresh and access tokens."""
+    user = User.query.filter_by(email=email.strip().lower()).first()
+    if user is None:
+        raise click.ClickException(f"No user {email}")
+    revoked = revoke_user(user.id)
+    db.session.commit()
+    click.echo(f"Revoked {revoked} token(s) for {user.email}; other workers apply it within "
+               f"{current_app.config['TOKEN_BLOCKLIST_SYNC']:g}s.")
+
+
+@tokens_cli.command("prune")
+def prune_command():
+    """Delete rows whose refresh token and access token have both expired."""
+    now = datetime.utcnow()
+    deleted = db.session.execute(
+        delete(RefreshToken).where(RefreshToken.expires_at <= now, RefreshToken.access_expires_at <= now)
+    ).rowcount
+    db.session.commit()
+    click.echo(f"Deleted {deleted} expired refresh token(s).")
@@ -0,0 +1,24 @@
+"""
+WSGI entry point.
+
+    gunicorn server.wsgi:app                      # uses ./gunicorn.conf.py
+    flask --app server.wsgi run
+    flask --app server.wsgi db upgrade
+
+This is the only module that reads the .env files and builds an app at import
+time. Everything else (tests, scripts, benchmarks) should call
+`server.app.create_app()` itself.
+"""
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+_here = Path(__file__).resolve().parent
+# config.py reads the environment at import, so load .env before importing the app;
+# real environment variables win over both files
+load_dotenv(_here / ".env")
+load_dotenv(_here.parent / ".env")
+
+from .app import create_app  # noqa: E402
+
+app = create_app()
@@ -1,7 +1,7 @@
 import axios from "axios";
 
 const api = axios.create({
-  baseURL: "http://127.0.0.1:5000", 
+  baseURL: "http://127.0.0.1:5000",
 });
 
 api.interceptors.request.use((config) => {
@@ -10,4 +10,53 @@ api.interceptors.request.use((config) => {
   return config;
 });
 
+// endpoints whose 401 means bad credentials, not an expired access token
+const NO_REFRESH = ["/auth/login", "/auth/signup", "/auth/refresh", "/auth/logout"];
+
+let refreshing = null;
+
+async function rotate(staleRefreshToken) {
+  // another tab already traded this refresh token; its new pair is in localStorage
+  if (localStorage.getItem("refresh_token") !== staleRefreshToken) return;
+  if (!staleRefreshToken) throw new Error("no refresh token");
+  const { data } = await axios.post(`${api.defaults.baseURL}/auth/refresh`, {
+    refresh_token: staleRefreshToken,
+  });
+  localStorage.setItem("token", data.token);
+  localStorage.setItem("refresh_token", data.refresh_token);
+}
+
+// Access tokens expire after a few minutes. Concurrent callers share one refresh, and a Web Lock
+// keeps two tabs from presenting the same refresh token (the server treats reuse as theft and
+// revokes the session). If the refresh fails the session is over: "auth:expired" signs us out.
+export function refreshAccessToken() {
+  if (!refreshing) {
+    const stale = localStorage.getItem("refresh_token");
+    const run = () => rotate(stale);
+    refreshing = (navigator.locks ? navigator.locks.request("auth-refresh", run) : run())
+      .catch((err) => {
+        window.dispatchEvent(new Event("auth:expired"));
+        throw err;
+      })
+      .finally(() => {
+        refreshing = null;
+      });
+  }
+  return refreshing;
+}
+
+api.interceptors.response.use(undefined, async (error) => {
+  const { config, response } = error;
+  if (response?.status !== 401 || !config || config._retried || NO_REFRESH.includes(config.url)) {
+    throw error;
+  }
+  config._retried = true;
+  try {
+    await refreshAccessToken();
+  } catch {
+    throw error;
+  }
+  return api(config);
+});
+
 export default api;
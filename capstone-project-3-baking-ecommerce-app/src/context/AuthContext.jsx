@@ -13,25 +13,34 @@ export function AuthProvider({ children }) {
 
   const isAdmin = !!user && user.role === "admin";
 
-  function setAuth({ user, token }) {
+  function setAuth({ user, token, refresh_token }) {
     setUser(user);
     setToken(token);
     localStorage.setItem("user", JSON.stringify(user));
     localStorage.setItem("token", token);
+    localStorage.setItem("refresh_token", refresh_token);
   }
 
-  function clearAuth() {
+  function dropAuth() {
     setUser(null);
     setToken(null);
     localStorage.removeItem("user");
     localStorage.removeItem("token");
+    localStorage.removeItem("refresh_token");
+  }
+
+  function clearAuth() {
+    // revoke the session server-side too, so the tokens left behind stop working
+    const refreshToken = localStorage.getItem("refresh_token");
+    if (refreshToken) api.post("/auth/logout", { refresh_token: refreshToken }).catch(() => {});
+    dropAuth();
   }
 
   async function login(email, password) {
     setLoading(true);
     try {
       const { data } = await api.post("/auth/login", { email, password });
-      setAuth({ user: data.user, token: data.token });
+      setAuth(data);
       return { ok: true };
     } catch (err) {
       return { ok: false, error: err.response?.data?.error || "Login failed" };
@@ -44,7 +53,7 @@ export function AuthProvider({ children }) {
     setLoading(true);
     try {
       const { data } = await api.post("/auth/signup", { email, password });
-      setAuth({ user: data.user, token: data.token });
+      setAuth(data);
       return { ok: true };
     } catch (err) {
       return { ok: false, error: err.response?.data?.error || "Signup failed" };
@@ -70,6 +79,12 @@ export function AuthProvider({ children }) {
     if (token && !user) fetchMe();
   }, [token, user]);
 
+  // the api client couldn't refresh the access token: the session was revoked or has expired
+  useEffect(() => {
+    window.addEventListener("auth:expired", dropAuth);
+    return () => window.removeEventListener("auth:expired", dropAuth);
+  }, []);
+
   return (
     <AuthContext.Provider value={{ user, token, loading, login, isAdmin, signup, clearAuth }}>
       {children}
@@ -15,6 +15,7 @@ import Dialog from "@mui/material/Dialog";
 import DialogTitle from "@mui/material/DialogTitle";
 import DialogContent from "@mui/material/DialogContent";
 import DialogActions from "@mui/material/DialogActions";
+import Checkbox from "@mui/material/Checkbox";
 
 const FALLBACK_IMG = "/placeholder-dessert.jpg";
 
@@ -25,6 +26,7 @@ export default function AdminOrders() {
   const [openId, setOpenId] = useState(null);
   const [detail, setDetail] = useState(null);
   const [loadingDetail, setLoadingDetail] = useState(false);
+  const [selected, setSelected] = useState([]);
 
   async function load() {
     setErr("");
@@ -32,6 +34,7 @@ export default function AdminOrders() {
       const url = statusFilter ? `/orders/?status=${statusFilter}` : "/orders/";
       const { data } = await api.get(url);
       setOrders(data.items);
+      setSelected([]);
     } catch (e) {
       setErr(e?.response?.data?.error || "Failed to load orders");
     }
@@ -42,6 +45,50 @@ export default function AdminOrders() {
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, [statusFilter]);
 
+  // live feed of new orders / status changes (EventSource resumes with Last-Event-ID on reconnect)
+  useEffect(() => {
+    let source = null;
+    let stopped = false;
+    let retried = false;
+    let lastEventId = "";
+    const refresh = (e) => {
+      if (e.lastEventId) lastEventId = e.lastEventId;
+      load();
+    };
+
+    // EventSource can't send the Authorization header: trade the access token for a short-lived
+    // stream ticket (the api client refreshes an expired access token on the way)
+    async function open() {
+      if (stopped || !localStorage.getItem("token")) return;
+      const { data } = await api.post("/admin/orders/stream-ticket");
+      if (stopped) return;
+      const resume = lastEventId ? `&last_event_id=${encodeURIComponent(lastEventId)}` : "";
+      source = new EventSource(
+        `${api.defaults.baseURL}/admin/orders/stream?ticket=${encodeURIComponent(data.ticket)}${resume}`
+      );
+      source.addEventListener("open", () => {
+        retried = false;
+      });
+      source.addEventListener("order.created", refresh);
+      source.addEventListener("order.status", refresh);
+      source.addEventListener("reset", refresh);
+      // a rejected ticket (expired, or too many streams) closes the stream instead of retrying:
+      // get a new ticket once and reopen
+      source.addEventListener("error", () => {
+        if (source.readyState !== EventSource.CLOSED || retried) return;
+        retried = true;
+        open().catch(() => {});
+      });
+    }
+
+    open().catch(() => {});
+    return () => {
+      stopped = true;
+      source?.close();
+    };
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [statusFilter]);
+
   async function updateStatus(orderId, status) {
     try {
       await api.patch(`/admin/orders/${orderId}/status`, { status });
@@ -53,6 +100,21 @@ export default function AdminOrders() {
     }
   }
 
+  async function bulkUpdateStatus(status) {
+    try {
+      await api.patch("/admin/orders/status", { ids: selected, status, summary: true });
+      await load();
+    } catch (e) {
+      alert(e?.response?.data?.error || "Bulk update failed");
+    }
+  }
+
+  function toggleSelected(orderId) {
+    setSelected((prev) =>
+      prev.includes(orderId) ? prev.filter((id) => id !== orderId) : [...prev, orderId]
+    );
+  }
+
   async function fetchDetail(orderId) {
     setLoadingDetail(true);
     try {
@@ -98,16 +160,35 @@ export default function AdminOrders() {
         </TextField>
       </Stack>
 
+      {selected.length > 0 && (
+        <Stack direction="row" spacing={1} alignItems="center" sx={{ mb: 2 }}>
+          <Typography variant="body2">{selected.length} selected</Typography>
+          <Button size="small" variant="contained" onClick={() => bulkUpdateStatus("complete")}>
+            Mark Selected Complete
+          </Button>
+          <Button size="small" variant="outlined" color="error" onClick={() => bulkUpdateStatus("canceled")}>
+            Cancel Selected
+          </Button>
+        </Stack>
+      )}
+
       <Stack spacing={2}>
         {orders.map((o) => (
           <Paper key={o.id} sx={{ p: 2 }}>
             <Stack direction="row" justifyContent="space-between" alignItems="center">
+              <Stack direction="row" spacing={1} alignItems="center">
+              <Checkbox
+                size="small"
+                checked={selected.includes(o.id)}
+                onChange={() => toggleSelected(o.id)}
+              />
               <Stack spacing={0.5}>
                 <Typography variant="subtitle1">Order #{o.id}</Typography>
                 <Typography variant="body2">
                   {o.fulfillment_date}{o.requested_time ? ` • ${o.requested_time}` : ""} • {o.fulfillment_method}
                 </Typography>
               </Stack>
+              </Stack>
               <Stack direction="row" spacing={1} alignItems="center">
                 <Chip label={o.status} />
                 <Typography variant="h6">${Number(o.total).toFixed(2)}</Typography>
@@ -0,0 +1,58 @@
+from datetime import date
+
+import pytest
+
+from server.app import create_app
+from server.models import db, User
+from server import identity, seed
+
+# the "today" seeded data is built around: orders before it are complete, from it on placed
+ANCHOR = date(2026, 1, 1)
+
+
+@pytest.fixture
+def make_app(tmp_path):
+    """make_app(name="app", **config) -> a seeded app with its own SQLite file and price table."""
+    apps = []
+
+    def build(name: str = "app", **config):
+        app = create_app({
+            "TESTING": True,
+            "JWT_SECRET_KEY": "test-jwt-secret-long-enough-for-hs256",
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / name}.db",
+            "DB_MIGRATIONS": False,
+            "RATELIMIT_ENABLED": False,
+            "PASSWORD_HASH_WORKERS": 0,
+            "PRICE_TABLE_PATH": str(tmp_path / f"{name}.prices"),
+            **config,
+        })
+        with app.app_context():
+            # user 1 is the admin; users 2 and 3 are customers with a draft cart each
+            seed.generate(users=3, products=10, orders=20, carts=2, seed=1, anchor=ANCHOR)
+        apps.append(app)
+        return app
+
+    yield build
+    for app in apps:
+        with app.app_context():
+            db.engine.dispose()
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def auth(app):
+    """auth(user_id) -> Authorization header with a fresh access token for that user."""
+    def headers(user_id: int) -> dict:
+        with app.app_context():
+            token = identity.issue_access_token(db.session.get(User, user_id))
+        return {"Authorization": f"Bearer {token}"}
+    return headers
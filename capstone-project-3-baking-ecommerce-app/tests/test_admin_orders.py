@@ -0,0 +1,29 @@
+from sqlalchemy import event, select
+
+from server.models import db, Order, OrderStatus
+
+
+def test_bulk_status_counts_only_rows_the_guarded_update_changed(app, client, auth):
+    with app.app_context():
+        placed = list(db.session.execute(select(Order.id).where(Order.status == OrderStatus.placed)).scalars())
+        engine = db.engine
+    victim = placed[0]
+    fired = []
+
+    def cancel_concurrently(conn, clauseelement, multiparams, params, execution_options):
+        # another admin cancels one order between the read and the guarded UPDATE
+        if not fired and getattr(clauseelement, "is_update", False) and clauseelement.table.name == "orders":
+            fired.append(victim)
+            conn.exec_driver_sql(f"UPDATE orders SET status = 'canceled' WHERE id = {victim}")
+
+    event.listen(engine, "before_execute", cancel_concurrently)
+    try:
+        r = client.patch("/admin/orders/status", json={"ids": placed, "status": "complete", "summary": True},
+                         headers=auth(1))
+    finally:
+        event.remove(engine, "before_execute", cancel_concurrently)
+
+    assert fired and r.status_code == 200
+    assert r.json["updated"] == len(placed) - 1
+    with app.app_context():
+        assert db.session.get(Order, victim).status == OrderStatus.canceled
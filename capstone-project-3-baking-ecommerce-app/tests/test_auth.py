@@ -0,0 +1,34 @@
+from server.seed import SEED_PASSWORD
+
+
+def login(client, email="customer2@example.com"):
+    r = client.post("/auth/login", json={"email": email, "password": SEED_PASSWORD})
+    assert r.status_code == 200
+    return r.json
+
+
+def bearer(pair):
+    return {"Authorization": f"Bearer {pair['token']}"}
+
+
+def test_refresh_rotates_the_pair(client):
+    first = login(client)
+    r = client.post("/auth/refresh", json={"refresh_token": first["refresh_token"]})
+    assert r.status_code == 200
+    assert r.json["refresh_token"] != first["refresh_token"]
+    assert client.get("/auth/me", headers=bearer(r.json)).status_code == 200
+
+
+def test_reusing_a_rotated_refresh_token_revokes_the_family(client):
+    first = login(client)
+    second = client.post("/auth/refresh", json={"refresh_token": first["refresh_token"]}).json
+    other_session = login(client)
+
+    # the old token again: someone kept a copy
+    assert client.post("/auth/refresh", json={"refresh_token": first["refresh_token"]}).status_code == 401
+
+    assert client.post("/auth/refresh", json={"refresh_token": second["refresh_token"]}).status_code == 401
+    assert client.get("/auth/me", headers=bearer(second)).status_code == 401
+    # another login of the same user is its own family
+    assert client.get("/auth/me", headers=bearer(other_session)).status_code == 200
+    assert client.post("/auth/refresh", json={"refresh_token": other_session["refresh_token"]}).status_code == 200
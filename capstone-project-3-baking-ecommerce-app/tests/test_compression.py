@@ -0,0 +1,50 @@
+import gzip
+import json
+
+from server.models import db, Product
+
+GZIP = {"Accept-Encoding": "gzip"}
+
+
+def cache(app):
+    return app.extensions["compression"].cache
+
+
+def test_json_is_gzipped_for_clients_that_accept_it(client):
+    plain = client.get("/products/")
+    assert "Content-Encoding" not in plain.headers
+
+    r = client.get("/products/", headers=GZIP)
+    assert r.headers["Content-Encoding"] == "gzip" and "Accept-Encoding" in r.headers["Vary"]
+    assert json.loads(gzip.decompress(r.data)) == plain.json
+
+
+def test_bodies_under_the_minimum_size_are_left_alone(client):
+    r = client.get("/products/1", headers=GZIP)
+    assert r.status_code == 200 and "Content-Encoding" not in r.headers
+
+
+def test_shared_views_reuse_the_compressed_body_until_it_changes(app, client):
+    first = client.get("/products/", headers=GZIP).data
+    assert client.get("/products/", headers=GZIP).data == first
+    assert (cache(app).hits, cache(app).misses) == (1, 1)
+
+    with app.app_context():
+        db.session.get(Product, 1).name = "Renamed"
+        db.session.commit()
+    changed = client.get("/products/", headers=GZIP).data
+    assert changed != first and b"Renamed" in gzip.decompress(changed)
+    assert (cache(app).hits, cache(app).misses, len(cache(app))) == (1, 2, 2)
+
+
+def test_per_caller_views_are_compressed_but_not_cached(app, client, auth):
+    r = client.get("/orders/?per_page=50", headers={**GZIP, **auth(1)})
+    assert r.headers["Content-Encoding"] == "gzip"
+    assert (cache(app).hits, cache(app).misses) == (0, 0)
+
+
+def test_each_app_keeps_its_own_settings(app, make_app):
+    other = make_app("other", COMPRESS_MIN_SIZE=1_000_000)
+    assert "Content-Encoding" not in other.test_client().get("/products/", headers=GZIP).headers
+    assert app.test_client().get("/products/", headers=GZIP).headers["Content-Encoding"] == "gzip"
+    assert cache(app) is not cache(other)
@@ -0,0 +1,65 @@
+import pytest
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, generate_password_hash
+
+from server import hashing
+from server.models import db, User
+from server.seed import SEED_PASSWORD
+
+
+@pytest.mark.parametrize("method,stored", [
+    ("scrypt", "scrypt:32768:8:1"),
+    ("scrypt:16384:8:2", "scrypt:16384:8:2"),
+    ("pbkdf2", f"pbkdf2:sha256:{DEFAULT_PBKDF2_ITERATIONS}"),
+    ("pbkdf2:sha512", f"pbkdf2:sha512:{DEFAULT_PBKDF2_ITERATIONS}"),
+    ("pbkdf2:sha256:600000", "pbkdf2:sha256:600000"),
+])
+def test_normalize_method_matches_what_werkzeug_stores(method, stored):
+    assert hashing.normalize_method(method) == stored
+    assert generate_password_hash("x", method).split("$")[0] == stored
+
+
+@pytest.mark.parametrize("method", ["pbkdf2:sha256", "scrypt"])
+def test_short_hand_methods_dont_flag_their_own_hashes(make_app, method):
+    app = make_app(PASSWORD_HASH_METHOD=method)
+    with app.app_context():
+        assert not hashing.needs_rehash(hashing.hash_password("x"))
+        assert hashing.needs_rehash(generate_password_hash("x", "pbkdf2:sha256:1000"))
+        assert hashing.needs_rehash(generate_password_hash("x", method, salt_length=8))
+
+
+def test_login_moves_an_old_hash_to_the_current_method(app, client):
+    with app.app_context():
+        db.session.get(User, 2).password_hash = generate_password_hash(SEED_PASSWORD, "pbkdf2:sha256:1000")
+        db.session.commit()
+    assert client.post("/auth/login", json={"email": "customer2@example.com", "password": SEED_PASSWORD}).status_code == 200
+    with app.app_context():
+        assert db.session.get(User, 2).password_hash.startswith("scrypt:32768:8:1$")
+
+
+def test_each_app_keeps_its_own_settings(make_app):
+    first = make_app("first", PASSWORD_HASH_METHOD="pbkdf2:sha256:1000")
+    make_app("second", PASSWORD_HASH_METHOD="scrypt")
+    with first.app_context():
+        assert hashing.hash_password("x").startswith("pbkdf2:sha256:1000$")
+
+
+def test_full_queue_answers_503(app, client):
+    app.extensions["hashing"] = hashing.Hasher({
+        **app.extensions["hashing"].settings, "PASSWORD_HASH_WORKERS": 1, "PASSWORD_HASH_MAX_PENDING": 0,
+    })
+    r = client.post("/auth/login", json={"email": "customer2@example.com", "password": SEED_PASSWORD})
+    assert r.status_code == 503 and r.headers["Retry-After"] == "1"
+    assert r.json == {"error": "Server busy, please retry"}
+
+
+def test_pool_hashes_off_the_calling_process(app):
+    app.extensions["hashing"] = hasher = hashing.Hasher({
+        **app.extensions["hashing"].settings, "PASSWORD_HASH_WORKERS": 1, "PASSWORD_HASH_METHOD": "pbkdf2:sha256:1000",
+    })
+    try:
+        with app.app_context():
+            pwhash = hashing.hash_password("secret")
+            assert hashing.verify_password(pwhash, "secret")
+            assert not hashing.verify_password(pwhash, "wrong")
+    finally:
+        hasher.shutdown()
@@ -0,0 +1,50 @@
+from server import identity
+from server.enums import UserRole
+from server.instrumentation import count_queries
+from server.models import db, User
+
+
+def _users_queries(stats):
+    return [s for s in stats.statements if "FROM users" in s]
+
+
+def test_repeat_requests_read_the_user_from_the_cache(client, auth):
+    headers = auth(2)
+    assert client.get("/auth/me", headers=headers).json["email"] == "customer2@example.com"
+    with count_queries() as stats:
+        assert client.get("/auth/me", headers=headers).status_code == 200
+    assert not _users_queries(stats)
+
+
+def test_customer_tokens_are_refused_admin_routes_from_the_claim_alone(client, auth):
+    headers = auth(2)
+    client.get("/auth/me", headers=headers)
+    with count_queries() as stats:
+        assert client.get("/admin/stats/", headers=headers).status_code == 403
+    assert not _users_queries(stats)
+
+
+def test_demotion_takes_effect_on_the_next_request(app, client, auth):
+    headers = auth(1)
+    assert client.get("/admin/stats/", headers=headers).status_code == 200
+    with app.app_context():
+        db.session.get(User, 1).role = UserRole.customer
+        db.session.commit()
+    assert client.get("/admin/stats/", headers=headers).status_code == 403
+
+
+def test_each_app_has_its_own_cache(make_app):
+    first = make_app("first", IDENTITY_CACHE_TTL=30)
+    second = make_app("second", IDENTITY_CACHE_TTL=5, IDENTITY_CACHE_SIZE=10)
+    with first.app_context():
+        assert identity.load_user(2).email == "customer2@example.com"
+    with second.app_context():
+        db.session.get(User, 2).email = "renamed@example.com"
+        db.session.commit()
+        assert identity.load_user(2).email == "renamed@example.com"
+    with first.app_context():
+        assert identity.load_user(2).email == "customer2@example.com"
+
+    cache = second.extensions["identity_cache"]
+    assert (cache.ttl, cache.maxsize) == (5, 10)
+    assert first.extensions["identity_cache"] is not cache
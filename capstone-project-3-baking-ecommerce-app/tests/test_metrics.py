@@ -0,0 +1,61 @@
+import json
+
+import pytest
+
+from server import metrics
+
+TOKEN = "scrape-token"
+LIST_PRODUCTS = 'blueprint="products",endpoint="products.list_local_products",method="GET"'
+
+
+@pytest.fixture(autouse=True)
+def fresh_registry():
+    metrics.registry.reset()
+    yield
+    metrics.registry.reset()
+
+
+def scrape(client, token=TOKEN):
+    r = client.get("/metrics", headers={"Authorization": f"Bearer {token}"})
+    assert r.status_code == 200
+    return r.get_data(as_text=True)
+
+
+def test_metrics_is_not_routed_without_a_token_or_opt_in(client):
+    assert client.get("/metrics").status_code == 404
+
+
+def test_metrics_needs_the_token(make_app):
+    client = make_app(METRICS_TOKEN=TOKEN).test_client()
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert client.get("/metrics", headers={"Authorization": f"Bearer {TOKEN}"}).status_code == 200
+
+
+def test_public_metrics_need_no_token(make_app):
+    assert make_app(METRICS_PUBLIC=True).test_client().get("/metrics").status_code == 200
+
+
+def test_requests_are_counted_and_timed_per_route(make_app):
+    client = make_app(METRICS_TOKEN=TOKEN).test_client()
+    for _ in range(3):
+        assert client.get("/products/").status_code == 200
+
+    body = scrape(client)
+    assert f'http_requests_total{{{LIST_PRODUCTS},status="200"}} 3' in body
+    assert f'http_request_duration_seconds_bucket{{{LIST_PRODUCTS},le="+Inf"}} 3' in body
+    assert f"http_request_duration_seconds_count{{{LIST_PRODUCTS}}} 3" in body
+    # the scrape itself isn't counted
+    assert 'endpoint="metrics"' not in body
+
+
+def test_multiprocess_scrape_sums_every_worker(make_app, tmp_path):
+    directory = tmp_path / "metrics"
+    client = make_app(METRICS_TOKEN=TOKEN, METRICS_MULTIPROC_DIR=str(directory)).test_client()
+    assert client.get("/products/").status_code == 200
+    # another worker's snapshot
+    (directory / "metrics-1.json").write_text(json.dumps({
+        "http_requests_total": [[["products", "products.list_local_products", "GET", "200"], 4]],
+    }))
+
+    assert f'http_requests_total{{{LIST_PRODUCTS},status="200"}} 5' in scrape(client)
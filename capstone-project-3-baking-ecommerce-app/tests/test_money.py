@@ -0,0 +1,36 @@
+from decimal import Decimal
+
+import pytest
+
+from server import spoonacular
+from server.money import to_cents, to_dollars
+from server.seed import SEED_PASSWORD
+
+
+@pytest.mark.parametrize("amount, cents", [
+    (19.99, 1999), ("19.99", 1999), (Decimal("19.99"), 1999), (16, 1600),
+    (0.1, 10), ("0.005", 1), (1.005, 101), (2.675, 268),  # half-up on the decimal the caller wrote
+])
+def test_to_cents(amount, cents):
+    assert to_cents(amount) == cents
+
+
+def test_every_cent_amount_round_trips_through_json_dollars():
+    assert all(to_cents(to_dollars(c)) == c for c in range(0, 1_000_000, 7))
+
+
+def test_prices_and_totals_stay_exact_end_to_end(app, client):
+    with app.app_context():
+        product, _ = spoonacular.ingest(4242, {"title": "Lemon bar"}, {"price": 1.15})
+        product_id = product.id
+    assert client.get(f"/products/{product_id}").json["price"] == 1.15
+
+    r = client.post("/auth/signup", json={"email": "cents@example.com", "password": SEED_PASSWORD})
+    headers = {"Authorization": f"Bearer {r.json['token']}"}
+    cart = client.post("/cart/items", json={"product_id": product_id, "qty": 3}, headers=headers).json
+    # 1.15 * 3 in floats is 3.4499999999999997
+    assert cart["total"] == 3.45 and cart["items"][0]["line_total"] == 3.45
+
+    r = client.post("/checkout/", json={"fulfillment_date": "2030-06-02", "fulfillment_method": "pickup"},
+                    headers=headers)
+    assert r.status_code == 201 and r.json["total"] == 3.45
@@ -0,0 +1,103 @@
+import time
+
+import pytest
+
+from server import events
+from server.enums import UserRole
+from server.models import db, User
+from server.seed import SEED_PASSWORD
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app(SSE_HEARTBEAT_SECONDS=0.05)
+
+
+def ticket(client, headers):
+    r = client.post("/admin/orders/stream-ticket", headers=headers)
+    assert r.status_code == 200
+    return r.json["ticket"]
+
+
+def open_stream(client, headers):
+    return client.get(f"/admin/orders/stream?ticket={ticket(client, headers)}", buffered=False)
+
+
+def test_stream_opens_with_a_ticket_not_an_access_token(client, auth):
+    token = auth(1)["Authorization"].split()[1]
+    assert client.get(f"/admin/orders/stream?jwt={token}").status_code == 401
+
+    r = open_stream(client, auth(1))
+    try:
+        assert r.status_code == 200 and r.mimetype == "text/event-stream"
+        assert next(iter(r.response)).startswith(b"retry:")
+    finally:
+        r.close()
+
+
+def test_only_admins_get_stream_tickets(client, auth):
+    assert client.post("/admin/orders/stream-ticket", headers=auth(2)).status_code == 403
+
+
+def test_expired_ticket_is_rejected(app, client, auth):
+    t = ticket(client, auth(1))
+    app.config["SSE_TICKET_SECONDS"] = -1
+    assert client.get(f"/admin/orders/stream?ticket={t}").status_code == 401
+
+
+def test_streams_past_the_per_process_cap_get_503(app, client, auth):
+    app.config["SSE_MAX_STREAMS"] = 1
+    first = open_stream(client, auth(1))
+    assert first.status_code == 200
+
+    r = open_stream(client, auth(1))
+    assert r.status_code == 503 and r.headers["Retry-After"]
+
+    # closing a stream frees its slot, even one that never sent a byte
+    first.close()
+    assert events.broker.subscriber_count == 0
+    again = open_stream(client, auth(1))
+    assert again.status_code == 200
+    again.close()
+
+
+def ended(stream, timeout=5.0) -> bool:
+    """Read `stream` until the server ends it; False if it is still going after `timeout` seconds."""
+    deadline = time.monotonic() + timeout
+    for _ in stream.response:
+        if time.monotonic() > deadline:
+            return False
+    return True
+
+
+def test_stream_stays_open_while_the_admin_is_authorized(client, auth):
+    r = open_stream(client, auth(1))
+    chunks = iter(r.response)
+    try:
+        # a heartbeat re-checks authorization, then sends a keepalive
+        assert [next(chunks) for _ in range(4)][1:] == [b": keepalive\n\n"] * 3
+    finally:
+        r.close()
+
+
+def test_stream_ends_when_its_session_is_revoked(client):
+    session = client.post("/auth/login", json={"email": "admin@example.com", "password": SEED_PASSWORD}).json
+    r = open_stream(client, {"Authorization": f"Bearer {session['token']}"})
+    assert r.status_code == 200
+    assert client.post("/auth/logout", json={"refresh_token": session["refresh_token"]}).status_code == 204
+    assert ended(r)
+
+
+def test_stream_ends_when_the_admin_is_demoted(app, client, auth):
+    r = open_stream(client, auth(1))
+    with app.app_context():
+        db.session.get(User, 1).role = UserRole.customer
+        db.session.commit()
+    assert ended(r)
+
+
+def test_stream_ends_when_the_access_token_expires(app, client, auth):
+    app.config["ACCESS_TOKEN_TTL_MINUTES"] = 1 / 60
+    r = open_stream(client, auth(1))
+    assert r.status_code == 200
+    assert ended(r)
@@ -0,0 +1,50 @@
+from sqlalchemy import select
+
+from server import archive
+from server.instrumentation import count_queries
+from server.models import db, ArchivedOrder, Order
+
+from conftest import ANCHOR
+
+
+def _archive_past_orders(app):
+    with app.app_context():
+        archive.archive_orders(ANCHOR, 100)
+        live = list(db.session.execute(select(Order.id).order_by(Order.created_at.desc())).scalars())
+        archived = list(db.session.execute(select(ArchivedOrder.id).order_by(ArchivedOrder.created_at.desc())).scalars())
+    assert live and archived
+    return live, archived
+
+
+def test_pages_run_from_live_orders_into_the_archive(app, client, auth):
+    live, archived = _archive_past_orders(app)
+    # a page size that doesn't divide the live count, so one page straddles the boundary
+    per_page = 3
+    assert len(live) % per_page
+
+    headers, seen, page = auth(1), [], 1
+    while True:
+        r = client.get(f"/orders/?page={page}&per_page={per_page}", headers=headers)
+        assert r.status_code == 200
+        assert r.json["total"] == len(live)
+        seen += [o["id"] for o in r.json["items"]]
+        if len(r.json["items"]) < per_page:
+            break
+        page += 1
+
+    assert seen == live + archived
+
+
+def test_archive_is_only_read_past_the_live_orders_or_on_request(app, client, auth):
+    live, archived = _archive_past_orders(app)
+    headers = auth(1)
+    client.get("/auth/me", headers=headers)
+
+    with count_queries() as stats:
+        r = client.get(f"/orders/?per_page={len(live)}", headers=headers)
+    assert [o["id"] for o in r.json["items"]] == live
+    assert "archived_total" not in r.json
+    assert not any("orders_archive" in s for s in stats.statements)
+
+    r = client.get("/orders/?include_archived=1", headers=headers)
+    assert r.json["total"] == len(live) and r.json["archived_total"] == len(archived)
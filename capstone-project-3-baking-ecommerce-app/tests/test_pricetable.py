@@ -0,0 +1,70 @@
+from sqlalchemy import select
+
+from server import pricetable
+from server.instrumentation import count_queries
+from server.models import db, Product
+
+
+def _table(app) -> pricetable.PriceTable:
+    return app.extensions["price_table"]
+
+
+def _db_prices(app) -> dict:
+    with app.app_context():
+        return {id_: (price, bool(active)) for id_, price, active in
+                db.session.execute(select(Product.id, Product.price_cents, Product.is_active))}
+
+
+def test_an_app_on_another_database_cannot_overwrite_the_table(make_app, tmp_path):
+    shared = str(tmp_path / "shared-prices")
+    serving = make_app("serving", PRICE_TABLE_PATH=shared)
+    scratch = make_app("scratch", PRICE_TABLE_PATH=shared)
+    with scratch.app_context():
+        db.session.get(Product, 1).price_cents = 1
+        db.session.commit()
+        pricetable.rebuild()
+
+    assert _table(serving).path != _table(scratch).path
+    assert _table(serving).entries() == _db_prices(serving)
+    assert _table(serving).entries()[1] != (1, True)
+
+
+def test_a_product_commit_rewrites_only_its_slot(app):
+    table = _table(app)
+    generation = table._current()[1]
+    with app.app_context():
+        product = db.session.get(Product, 3)
+        product.price_cents, product.is_active = 4321, False
+        with count_queries() as stats:
+            db.session.commit()
+        assert pricetable.lookup(3) == (4321, False)
+    reads = [s for s in stats.statements if s.lstrip().startswith("SELECT") and "FROM products" in s]
+    assert len(reads) == 1 and "IN" in reads[0]  # the changed id, not the whole table
+    assert table.generation() == generation
+    assert table.entries() == _db_prices(app)
+
+
+def test_new_and_deleted_products(app):
+    table = _table(app)
+    generation = table._current()[1]
+    with app.app_context():
+        product = Product(name="New Tart", price_cents=999, allergens_csv="")
+        db.session.add(product)
+        db.session.commit()
+        new_id = product.id
+        assert table._current()[1] == generation + 1  # past the end of the table: a full rebuild
+        assert table.get(new_id) == (999, True)
+
+        db.session.delete(product)
+        db.session.commit()
+        assert table.get(new_id) is None
+        assert pricetable.lookup(new_id) is None
+
+
+def test_rebuilds_without_fcntl(app, monkeypatch):
+    monkeypatch.setattr(pricetable, "fcntl", None)
+    table = _table(app)
+    generation = table._current()[1]
+    with app.app_context():
+        assert pricetable.rebuild() == generation + 1
+    assert table.entries() == _db_prices(app)
@@ -0,0 +1,65 @@
+import time
+
+import pytest
+
+from server import profiling
+
+SECRET = "profiling-secret"
+
+
+@pytest.fixture
+def profiled(make_app, tmp_path):
+    """profiled(**config) -> (app, requests dir) with the profiler on and sampling off."""
+    def build(**config):
+        app = make_app(PROFILING_ENABLED=True, PROFILING_SAMPLE_RATE=0, PROFILING_DIR=str(tmp_path / "profiles"),
+                       **config)
+        return app, tmp_path / "profiles" / "requests"
+    return build
+
+
+def wait_for_files(directory, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        files = list(directory.glob("*.prof"))
+        if files:
+            return files
+        time.sleep(0.02)
+    return []
+
+
+def test_profiler_is_not_installed_by_default(app):
+    assert not isinstance(app.wsgi_app, profiling.ProfilerMiddleware)
+
+
+def test_only_a_signed_header_profiles_a_request(profiled):
+    app, requests_dir = profiled(PROFILING_SECRET=SECRET)
+    client = app.test_client()
+    forged = [
+        "1",
+        f"{int(time.time()) + 300}.{'0' * 64}",
+        profiling.sign_token("someone-elses-secret"),
+        profiling.sign_token(SECRET, ttl=-10),  # expired
+    ]
+    for value in forged:
+        assert "X-Profile-Id" not in client.get("/products/", headers={profiling.HEADER: value}).headers
+
+    r = client.get("/products/", headers={profiling.HEADER: profiling.sign_token(SECRET)})
+    assert r.status_code == 200
+    files = wait_for_files(requests_dir)
+    assert len(files) == 1 and files[0].name.startswith(r.headers["X-Profile-Id"])
+
+
+def test_headers_are_ignored_without_a_secret(profiled):
+    app, _ = profiled(PROFILING_SECRET=None)
+    r = app.test_client().get("/products/", headers={profiling.HEADER: profiling.sign_token("")})
+    assert "X-Profile-Id" not in r.headers
+
+
+def test_token_command_requires_the_secret(make_app):
+    result = make_app(PROFILING_SECRET=None).test_cli_runner().invoke(args=["profile", "token"])
+    assert result.exit_code != 0 and "PROFILING_SECRET" in result.output
+
+    result = make_app("signed", PROFILING_SECRET=SECRET).test_cli_runner().invoke(args=["profile", "token"])
+    assert result.exit_code == 0
+    value = result.output.strip().removeprefix(f"{profiling.HEADER}: ")
+    assert profiling.verify_token(SECRET, value)
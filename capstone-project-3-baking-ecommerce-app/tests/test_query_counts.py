@@ -0,0 +1,53 @@
+"""
+Query budgets for the hot endpoints. A budget that stops holding usually means a
+relationship started loading lazily, once per row.
+"""
+from datetime import timedelta
+
+import pytest
+
+from server.instrumentation import assert_max_queries
+from server.models import db, Cart, CartStatus
+
+from conftest import ANCHOR
+
+
+@pytest.fixture
+def customer(client, auth):
+    headers = auth(2)
+    client.get("/auth/me", headers=headers)  # first request loads the token blocklist
+    return headers
+
+
+def test_products_list(client):
+    with assert_max_queries(1):
+        assert client.get("/products/").status_code == 200
+
+
+def test_cart(client, customer):
+    with assert_max_queries(3):
+        assert client.get("/cart/", headers=customer).status_code == 200
+    with assert_max_queries(5):
+        assert client.post("/cart/items", json={"product_id": 4, "qty": 2}, headers=customer).status_code == 200
+
+
+@pytest.mark.parametrize("user_id", [2, 1], ids=["customer", "admin"])
+def test_orders_list_does_not_grow_with_page_size(client, auth, user_id):
+    headers = auth(user_id)
+    client.get("/auth/me", headers=headers)
+    for per_page in (1, 50):
+        with assert_max_queries(5):
+            r = client.get(f"/orders/?per_page={per_page}", headers=headers)
+        assert r.status_code == 200
+        assert r.json["items"] and all(item["product"] for o in r.json["items"] for item in o["items"])
+
+
+def test_checkout(app, client, customer):
+    with app.app_context():
+        lines = len(db.session.execute(
+            db.select(Cart).where(Cart.user_id == 2, Cart.status == CartStatus.draft)
+        ).unique().scalar_one().items)
+    payload = {"fulfillment_date": (ANCHOR + timedelta(days=400)).isoformat(), "fulfillment_method": "pickup"}
+    # writes are per line (the item and its product rollup), plus reloading each line's product
+    with assert_max_queries(10 + 3 * lines):
+        assert client.post("/checkout/", json=payload, headers=customer).status_code == 201
@@ -0,0 +1,79 @@
+import pytest
+
+from server import ratelimit
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    time = monotonic
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(ratelimit, "time", fake)
+    return fake
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path, clock):
+    if request.param == "memory":
+        return ratelimit.MemoryBackend()
+    return ratelimit.SQLiteBackend(str(tmp_path / "limits.db"))
+
+
+def test_parse_rate():
+    assert ratelimit.parse_rate("10/minute") == (10, 10 / 60)
+    assert ratelimit.parse_rate("5/30s") == (5, 5 / 30)
+    with pytest.raises(ValueError):
+        ratelimit.parse_rate("often")
+
+
+def test_bucket_empties_then_refills(backend, clock):
+    bucket = [("k", 2, 1.0)]  # 2 tokens, one back per second
+    assert backend.hit(bucket) == 0
+    assert backend.hit(bucket) == 0
+    assert backend.hit(bucket) == pytest.approx(1.0)
+    clock.now += 0.5
+    assert backend.hit(bucket) == pytest.approx(0.5)
+    clock.now += 0.5
+    assert backend.hit(bucket) == 0
+
+
+def test_a_denied_request_takes_no_token_from_the_other_buckets(backend, clock):
+    tight, loose = ("tight", 1, 1 / 60), ("loose", 100, 100 / 3600)
+    for _ in range(10):
+        backend.hit([tight, loose])
+    # one allowed request spent one of loose's tokens; the nine denied ones spent none
+    for _ in range(99):
+        assert backend.hit([loose]) == 0
+    assert backend.hit([loose]) > 0
+
+
+def _login(client, ip="10.0.0.1"):
+    return client.post("/auth/login", json={"email": "nobody@example.com", "password": "x"},
+                       environ_base={"REMOTE_ADDR": ip})
+
+
+def test_rules_answer_429_with_retry_after_per_client(make_app):
+    app = make_app(RATELIMIT_ENABLED=True, RATELIMIT_RULES={"auth.login": ["3/minute"]})
+    client = app.test_client()
+    assert [_login(client).status_code for _ in range(4)] == [401, 401, 401, 429]
+    r = _login(client)
+    assert r.status_code == 429 and r.headers["Retry-After"] == "20"
+    assert _login(client, ip="10.0.0.2").status_code == 401
+
+
+def test_each_app_keeps_its_own_limits(make_app):
+    strict = make_app("strict", RATELIMIT_ENABLED=True, RATELIMIT_RULES={"auth.login": ["1/minute"]})
+    make_app("other", RATELIMIT_ENABLED=True, RATELIMIT_RULES={"auth.login": ["100/minute"]})
+    make_app("off")  # RATELIMIT_ENABLED=False
+
+    client = strict.test_client()
+    assert [_login(client).status_code for _ in range(2)] == [401, 429]
+    assert strict.extensions["ratelimit"].rules["auth.login"][0][0] == "1/minute"
@@ -0,0 +1,53 @@
+from server import rollups
+from server.models import db
+
+ALL_TIME = "/admin/stats/?from=2000-01-01&top=100"
+
+
+def stats(client, auth):
+    r = client.get(ALL_TIME, headers=auth(1))
+    assert r.status_code == 200
+    return r.json
+
+
+def checkout(client, auth, user_id=2):
+    r = client.post("/checkout/", json={"fulfillment_date": "2030-06-01", "fulfillment_method": "pickup"},
+                    headers=auth(user_id))
+    assert r.status_code == 201
+    return r.json
+
+
+def set_status(client, auth, order_id, status):
+    r = client.patch(f"/admin/orders/{order_id}/status", json={"status": status}, headers=auth(1))
+    assert r.status_code == 200
+
+
+def test_checkout_and_status_changes_keep_the_totals(client, auth):
+    before = stats(client, auth)["totals"]
+    order = checkout(client, auth)
+    units = sum(item["qty"] for item in order["items"])
+
+    after = stats(client, auth)["totals"]
+    assert after["order_count"] == before["order_count"] + 1
+    assert after["units"] == before["units"] + units
+    assert round(after["revenue"] - before["revenue"], 2) == order["total"]
+
+    # canceling takes the order out, reinstating puts it back
+    set_status(client, auth, order["id"], "canceled")
+    assert stats(client, auth)["totals"] == before
+    set_status(client, auth, order["id"], "placed")
+    assert stats(client, auth)["totals"] == after
+
+
+def test_incremental_rollups_match_a_rebuild(app, client, auth):
+    order = checkout(client, auth)
+    set_status(client, auth, order["id"], "complete")
+    r = client.patch("/admin/orders/status", json={"ids": [order["id"], 1, 2], "status": "canceled", "summary": True},
+                     headers=auth(1))
+    assert r.status_code == 200
+    incremental = stats(client, auth)
+
+    with app.app_context():
+        rollups.rebuild()
+        db.session.commit()
+    assert stats(client, auth) == incremental
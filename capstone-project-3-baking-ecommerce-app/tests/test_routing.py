@@ -0,0 +1,36 @@
+import sqlite3
+
+import pytest
+
+from server import routing
+from server.seed import SEED_PASSWORD
+
+
+@pytest.fixture
+def app(make_app, tmp_path):
+    replica = tmp_path / "replica.db"
+    app = make_app("primary", SQLALCHEMY_REPLICA_URI=f"sqlite:///{replica}", REPLICA_PIN_SECONDS=60)
+    routing.sync_sqlite(str(tmp_path / "primary.db"), str(replica))
+    # the replica lags: it hasn't seen customer 3's orders yet
+    with sqlite3.connect(replica) as conn:
+        conn.execute("DELETE FROM orders WHERE user_id = 3")
+    yield app
+    routing._pins.clear()
+
+
+def order_count(client, headers):
+    r = client.get("/orders/", headers=headers)
+    assert r.status_code == 200
+    return r.json["total"]
+
+
+def test_read_only_views_read_the_replica(client, auth):
+    assert order_count(client, auth(3)) == 0
+
+
+def test_login_pins_the_user_to_the_primary(client):
+    r = client.post("/auth/login", json={"email": "customer3@example.com", "password": SEED_PASSWORD})
+    assert r.status_code == 200
+
+    # login has no JWT to pin by; the user it returns is pinned too
+    assert order_count(client, {"Authorization": f"Bearer {r.json['token']}"}) > 0